@@ -0,0 +1,157 @@
+"""
+Module : data.py
+But : Chargement de bougies historiques depuis des fichiers locaux en tableaux NumPy.
+      - CSV au format Binance (data.binance.vision), avec ou sans ligne d'en-tête,
+        éventuellement compressés en .zip (un CSV par archive).
+      - Plusieurs fichiers (ex : un par mois) fusionnés, triés, doublons retirés.
+      - Cache .npz à côté de chaque fichier : les rechargements ne relisent pas le CSV.
+      - Regroupement 1m → 3m/5m/... si seules les bougies 1m sont disponibles.
+"""
+
+import os
+import glob
+import zipfile
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# Colonnes des fichiers klines Binance (seules les 6 premières sont chargées)
+KLINE_COLUMNS = ["open_time", "open", "high", "low", "close", "volume"]
+SUPPORTED_EXTENSIONS = (".csv", ".zip", ".npz")
+
+INTERVAL_MS = {
+    "1m": 60_000,
+    "3m": 180_000,
+    "5m": 300_000,
+    "15m": 900_000,
+    "30m": 1_800_000,
+    "1h": 3_600_000,
+}
+
+
+class Klines(namedtuple("Klines", KLINE_COLUMNS)):
+    """
+    Bougies en colonnes : open_time (int64, ms) puis open/high/low/close/volume (float64).
+    """
+    __slots__ = ()
+
+    def __len__(self):
+        return len(self.open_time)
+
+    def slice(self, start=None, end=None):
+        return Klines(*(column[start:end] for column in self))
+
+    def between(self, start_ms=None, end_ms=None):
+        # Bougies dont l'ouverture est dans [start_ms, end_ms)
+        lo = 0 if start_ms is None else np.searchsorted(self.open_time, start_ms, side="left")
+        hi = len(self) if end_ms is None else np.searchsorted(self.open_time, end_ms, side="left")
+        return self.slice(lo, hi)
+
+
+def _read_csv(handle) -> Klines:
+    # Fichiers récents : première ligne = en-tête (open_time,open,...)
+    has_header = not handle.readline()[:1].isdigit()
+    handle.seek(0)
+    frame = pd.read_csv(
+        handle,
+        header=None,
+        skiprows=1 if has_header else 0,
+        usecols=range(6),
+        names=KLINE_COLUMNS,
+        dtype={name: np.float64 for name in KLINE_COLUMNS[1:]} | {"open_time": np.int64},
+    )
+    return Klines(*(frame[name].to_numpy() for name in KLINE_COLUMNS))
+
+def _read_file(path: str) -> Klines:
+    if path.endswith(".npz"):
+        with np.load(path) as data:
+            return Klines(*(data[name] for name in KLINE_COLUMNS))
+    if path.endswith(".zip"):
+        with zipfile.ZipFile(path) as archive:
+            name = next(n for n in archive.namelist() if n.endswith(".csv"))
+            with archive.open(name) as handle:
+                return _read_csv(handle)
+    with open(path, "rb") as handle:
+        return _read_csv(handle)
+
+def _cache_path(path: str) -> str:
+    return os.path.splitext(path)[0] + ".npz"
+
+def load_file(path: str, use_cache: bool = True) -> Klines:
+    """
+    Charge un fichier ; le cache .npz est utilisé s'il est plus récent que le fichier source.
+    """
+    if path.endswith(".npz") or not use_cache:
+        return _read_file(path)
+    cache = _cache_path(path)
+    if os.path.exists(cache) and os.path.getmtime(cache) >= os.path.getmtime(path):
+        return _read_file(cache)
+    klines = _read_file(path)
+    try:
+        np.savez(cache, **klines._asdict())
+    except OSError:
+        pass  # Dossier en lecture seule : pas de cache
+    return klines
+
+def _expand(paths):
+    if isinstance(paths, str):
+        paths = [paths]
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(
+                os.path.join(path, name) for name in os.listdir(path)
+                if name.endswith(SUPPORTED_EXTENSIONS)
+            )
+        else:
+            files.extend(glob.glob(path) or [path])
+    # Un CSV et son cache .npz : seul le CSV est gardé (load_file utilise le cache)
+    sources = {os.path.splitext(f)[0] for f in files if not f.endswith(".npz")}
+    return sorted(f for f in files if not (f.endswith(".npz") and os.path.splitext(f)[0] in sources))
+
+def load_klines(paths, use_cache: bool = True) -> Klines:
+    """
+    Charge et fusionne des fichiers de bougies (chemins, motifs glob ou dossiers).
+    """
+    files = _expand(paths)
+    if not files:
+        raise FileNotFoundError(f"Aucun fichier de bougies trouvé : {paths}")
+    parts = [load_file(f, use_cache) for f in files]
+    merged = Klines(*(np.concatenate(columns) for columns in zip(*parts)))
+    # Tri par heure d'ouverture et suppression des doublons (fichiers qui se chevauchent)
+    open_time, index = np.unique(merged.open_time, return_index=True)
+    return Klines(open_time, *(column[index] for column in merged[1:]))
+
+def resample(klines: Klines, interval: str, base_interval: str = "1m") -> Klines:
+    """
+    Regroupe des bougies (1m par défaut) en bougies plus longues alignées sur l'heure (ex : 1m → 5m).
+    """
+    step = INTERVAL_MS[interval]
+    if step == INTERVAL_MS[base_interval]:
+        return klines
+    buckets = klines.open_time // step * step
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(klines)] - 1
+    return Klines(
+        buckets[starts],
+        klines.open[starts],
+        np.maximum.reduceat(klines.high, starts),
+        np.minimum.reduceat(klines.low, starts),
+        klines.close[ends],
+        np.add.reduceat(klines.volume, starts),
+    )
+
+def synthetic_klines(n: int, start_price: float = 0.25, volatility: float = 0.002,
+                     interval: str = "5m", seed: int = 0) -> Klines:
+    """
+    Marche aléatoire géométrique (tests de performance, essais sans données).
+    """
+    rng = np.random.default_rng(seed)
+    close = start_price * np.exp(np.cumsum(rng.normal(0.0, volatility, n)))
+    open_ = np.r_[start_price, close[:-1]]
+    spread = np.abs(rng.normal(0.0, volatility / 2, n)) * close
+    high = np.maximum(open_, close) + spread
+    low = np.minimum(open_, close) - spread
+    open_time = np.arange(n, dtype=np.int64) * INTERVAL_MS[interval]
+    return Klines(open_time, open_, high, low, close, rng.uniform(1e3, 1e5, n))
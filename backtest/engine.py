@@ -0,0 +1,247 @@
+"""
+Module : engine.py
+But : Simulation de la stratégie EMA20/EMA50 sur l'historique.
+      - Signaux calculés d'un bloc (backtest/signals.py).
+      - Boucle bougie par bougie limitée au strict nécessaire (entrée, SL/TP, paliers
+        du trailing, retournement sur signal opposé), écrite pour numba : compilée si
+        le paquet est installé, sinon exécutée en Python sur des listes.
+      - PnL et courbe d'équité calculés ensuite en NumPy (backtest/results.py).
+
+Règles reprises du bot :
+      - Signal à la clôture d'une bougie → entrée à l'ouverture de la suivante.
+      - bullish_only (défaut) : seuls les croisements haussiers ouvrent une position (longue),
+        comme en production où detect_ema_cross est appelé avec bullish=True ; la sortie se fait
+        alors uniquement par SL/TP/trailing.
+      - bullish_only=False (les deux sens) : signal opposé avec position ouverte → fermeture
+        puis ouverture inverse, comme execute_ema_cross_strategy le ferait avec un signal baissier.
+      - SL stop_loss_pct / TP take_profit_pct posés à l'entrée.
+      - Trailing (core/trailing_levels.py) réévalué à chaque clôture : le SL ne fait que
+        se resserrer, le TP ne fait que s'éloigner.
+      - SL et TP touchés dans la même bougie : le SL est retenu (hypothèse prudente).
+"""
+
+import os
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from backtest.signals import ema_cross_signals
+from backtest.results import BacktestResult
+from core import trailing_levels
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# === Motifs de sortie ===
+EXIT_SL = 0
+EXIT_TP = 1
+EXIT_TRAILING_SL = 2
+EXIT_SIGNAL = 3
+EXIT_END = 4
+EXIT_REASONS = ("SL", "TP", "SL trailing", "Signal opposé", "Fin des données")
+
+_PARAM_FIELDS = [
+    "stop_loss_pct", "take_profit_pct", "trailing", "fee_rate", "slippage",
+    "quantity_usdt", "leverage", "initial_balance", "fast", "slow", "sl_levels", "tp_levels", "bullish_only",
+]
+
+
+class BacktestParams(namedtuple("BacktestParams", _PARAM_FIELDS)):
+    """
+    Paramètres d'une simulation ; valeurs par défaut = variables d'environnement du bot (core/config.py).
+    fee_rate : frais par côté (taker Binance Futures), slippage : glissement défavorable en fraction du prix.
+    sl_levels / tp_levels : paliers du trailing ((gain, niveau), ...), ceux du bot par défaut ;
+    au-delà du dernier palier, le niveau progresse par pas (SL_STEP / TP_STEP) comme en réel.
+    bullish_only : positions longues seulement, comme le bot en production (False : les deux sens).
+    """
+    __slots__ = ()
+
+    def __new__(cls,
+                stop_loss_pct: float = float(os.getenv("STOP_LOSS_PCT", 0.0085)),
+                take_profit_pct: float = float(os.getenv("TAKE_PROFIT_PCT", 0.015)),
+                trailing: bool = True,
+                fee_rate: float = 0.0004,
+                slippage: float = 0.0,
+                quantity_usdt: float = float(os.getenv("QUANTITY_USDT", 2)),
+                leverage: int = int(os.getenv("LEVERAGE", 10)),
+                initial_balance: float = 100.0,
+                fast: int = 20,
+                slow: int = 50,
+                sl_levels: tuple = trailing_levels.SL_LEVELS,
+                tp_levels: tuple = trailing_levels.TP_LEVELS,
+                bullish_only: bool = True):
+        return super().__new__(cls, stop_loss_pct, take_profit_pct, trailing, fee_rate, slippage,
+                               quantity_usdt, leverage, initial_balance, fast, slow,
+                               tuple(map(tuple, sl_levels)), tuple(map(tuple, tp_levels)), bool(bullish_only))
+
+    @property
+    def notional(self) -> float:
+        return self.quantity_usdt * self.leverage
+
+
+def _ladder(levels, step):
+    # Paliers validés et triés (core/trailing_levels.TrailingLadder) sous forme de tableaux (types simples pour numba) ;
+    # la progression par pas part du dernier palier (0.015 → 0.010 pour le SL du bot)
+    ladder = trailing_levels.TrailingLadder(levels, step)
+    return (np.array(ladder.thresholds, dtype=np.float64), np.array(ladder.values, dtype=np.float64),
+            ladder.step_from, ladder.step_base)
+
+
+def _simulate(open_, high, low, close, signals, signal_idx,
+              stop_loss_pct, take_profit_pct, trailing, slippage,
+              sl_thresholds, sl_levels, sl_step_from, sl_step_base, sl_step, sl_min_distance,
+              tp_thresholds, tp_levels, tp_step_from, tp_step_base, tp_step,
+              entry_idx, exit_idx, sides, entry_prices, exit_prices, reasons):
+    """
+    Boucle de simulation ; remplit les tableaux de trades et retourne leur nombre.
+    Seules les bougies en position sont parcourues : hors position on saute au signal suivant.
+    """
+    n = len(close)
+    n_signals = len(signal_idx)
+    count = 0
+    s = 0
+    i = 0
+    side = 0
+    entry = 0.0
+    stop = 0.0
+    target = 0.0
+    tp_pct = 0.0
+    trailed = False
+
+    while True:
+        if side == 0:
+            # Hors position : prochain signal à partir de la bougie i
+            while s < n_signals and signal_idx[s] < i:
+                s += 1
+            if s == n_signals or signal_idx[s] + 1 >= n:
+                break
+            i = signal_idx[s] + 1
+            s += 1
+            side = signals[i - 1]
+            entry = open_[i] * (1.0 + side * slippage)
+            stop = entry * (1.0 - side * stop_loss_pct)
+            tp_pct = take_profit_pct
+            target = entry * (1.0 + side * tp_pct)
+            trailed = False
+            entry_idx[count] = i
+            sides[count] = side
+            entry_prices[count] = entry
+
+        # --- SL / TP touchés pendant la bougie i ---
+        exit_price = 0.0
+        reason = -1
+        if side == 1:
+            if low[i] <= stop:
+                exit_price = min(stop, open_[i])
+                reason = EXIT_TRAILING_SL if trailed else EXIT_SL
+            elif high[i] >= target:
+                exit_price = max(target, open_[i])
+                reason = EXIT_TP
+        else:
+            if high[i] >= stop:
+                exit_price = max(stop, open_[i])
+                reason = EXIT_TRAILING_SL if trailed else EXIT_SL
+            elif low[i] <= target:
+                exit_price = min(target, open_[i])
+                reason = EXIT_TP
+        if reason >= 0:
+            exit_idx[count] = i
+            exit_prices[count] = exit_price * (1.0 - side * slippage)
+            reasons[count] = reason
+            count += 1
+            side = 0
+            continue  # Un signal à la clôture de cette bougie peut rouvrir une position
+
+        # --- Paliers du trailing à la clôture ---
+        if trailing:
+            gain = side * (close[i] - entry) / entry
+            level = -1.0
+            for j in range(len(sl_thresholds)):
+                if gain >= sl_thresholds[j]:
+                    level = sl_levels[j]
+            if gain >= sl_step_from:
+                level = sl_step_base + int((gain - sl_step_from) / sl_step) * sl_step
+            if level > 0:
+                new_sl = entry * (1.0 + side * level)
+                if abs(close[i] - new_sl) >= entry * sl_min_distance and side * (new_sl - stop) > 0:
+                    stop = new_sl
+                    trailed = True
+            new_tp = take_profit_pct
+            for j in range(len(tp_thresholds)):
+                if gain >= tp_thresholds[j]:
+                    new_tp = tp_levels[j]
+            if gain > tp_step_from:
+                new_tp = tp_step_base + int((gain - tp_step_from) / tp_step) * tp_step
+            if new_tp > tp_pct:
+                tp_pct = new_tp
+                target = entry * (1.0 + side * tp_pct)
+
+        # --- Signal opposé : fermeture à l'ouverture suivante puis retournement ---
+        if signals[i] == -side and i + 1 < n:
+            exit_idx[count] = i + 1
+            exit_prices[count] = open_[i + 1] * (1.0 - side * slippage)
+            reasons[count] = EXIT_SIGNAL
+            count += 1
+            side = 0
+            continue
+
+        i += 1
+        if i >= n:
+            exit_idx[count] = n - 1
+            exit_prices[count] = close[n - 1]
+            reasons[count] = EXIT_END
+            count += 1
+            break
+
+    return count
+
+
+if njit is not None:
+    _kernel = njit(cache=True, nogil=True)(_simulate)
+else:
+    _kernel = None
+
+
+def run_backtest(klines, params: BacktestParams = None, signals: np.ndarray = None) -> BacktestResult:
+    """
+    Simule la stratégie sur des bougies (backtest/data.Klines).
+    signals : signaux déjà calculés (balayage de paramètres sur les mêmes EMA), sinon calculés ici.
+    """
+    params = params or BacktestParams()
+    started = time.perf_counter()
+    if signals is None:
+        signals = ema_cross_signals(klines.close, params.fast, params.slow, bullish_only=params.bullish_only)
+    signal_idx = np.flatnonzero(signals)
+
+    size = len(signal_idx) + 1
+    sl_thresholds, sl_levels, sl_step_from, sl_step_base = _ladder(params.sl_levels, trailing_levels.SL_STEP)
+    tp_thresholds, tp_levels, tp_step_from, tp_step_base = _ladder(params.tp_levels, trailing_levels.TP_STEP)
+    ladders = (
+        sl_thresholds, sl_levels, sl_step_from, sl_step_base, trailing_levels.SL_STEP,
+        trailing_levels.SL_MIN_DISTANCE,
+        tp_thresholds, tp_levels, tp_step_from, tp_step_base, trailing_levels.TP_STEP,
+    )
+    options = (float(params.stop_loss_pct), float(params.take_profit_pct), bool(params.trailing), float(params.slippage))
+    prices = (klines.open, klines.high, klines.low, klines.close)
+
+    if _kernel is not None:
+        outputs = (
+            np.zeros(size, dtype=np.int64), np.zeros(size, dtype=np.int64), np.zeros(size, dtype=np.int8),
+            np.zeros(size), np.zeros(size), np.zeros(size, dtype=np.int8),
+        )
+        count = _kernel(*prices, signals, signal_idx, *options, *ladders, *outputs)
+    else:
+        # Sans numba : listes Python, bien plus rapides que l'accès élément par élément aux tableaux NumPy
+        outputs = tuple([0] * size for _ in range(6))
+        ladders = tuple(v.tolist() if isinstance(v, np.ndarray) else v for v in ladders)
+        count = _simulate(*(p.tolist() for p in prices), signals.tolist(), signal_idx.tolist(),
+                          *options, *ladders, *outputs)
+
+    entry_idx, exit_idx, sides, entry_prices, exit_prices, reasons = (np.asarray(o[:count]) for o in outputs)
+    return BacktestResult(
+        klines, params, entry_idx, exit_idx, sides, entry_prices, exit_prices, reasons,
+        elapsed=time.perf_counter() - started,
+    )
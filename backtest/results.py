@@ -0,0 +1,106 @@
+"""
+Module : results.py
+But : Trades, courbe d'équité et statistiques d'une simulation (calculs NumPy).
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class BacktestResult:
+    """
+    Trades d'une simulation (tableaux alignés) et dérivés :
+    pnl par trade (frais inclus), courbe d'équité bougie par bougie, statistiques.
+    """
+
+    def __init__(self, klines, params, entry_idx, exit_idx, sides, entry_prices, exit_prices, reasons, elapsed=0.0):
+        self.klines = klines
+        self.params = params
+        self.entry_idx = entry_idx
+        self.exit_idx = exit_idx
+        self.sides = sides.astype(np.int8)
+        self.entry_prices = entry_prices.astype(np.float64)
+        self.exit_prices = exit_prices.astype(np.float64)
+        self.reasons = reasons.astype(np.int8)
+        self.elapsed = elapsed
+        # Quantité comme en réel : notionnel (quantité USDT x levier) / prix d'entrée
+        self.quantities = params.notional / self.entry_prices if len(self.entry_prices) else self.entry_prices
+        self.fees = params.fee_rate * (self.entry_prices + self.exit_prices) * self.quantities
+        self.pnl = self.sides * (self.exit_prices - self.entry_prices) * self.quantities - self.fees
+        self._equity = None
+
+    def __len__(self):
+        return len(self.pnl)
+
+    # === Courbe d'équité ===
+    @property
+    def equity(self) -> np.ndarray:
+        """
+        Solde + PnL latent à la clôture de chaque bougie (frais d'entrée déduits dès l'ouverture).
+        """
+        if self._equity is None:
+            n = len(self.klines)
+            realized = np.zeros(n)
+            np.add.at(realized, self.exit_idx, self.pnl)
+            equity = self.params.initial_balance + np.cumsum(realized)
+
+            # Bougies [entrée, sortie) de chaque trade, sans boucle Python
+            lengths = self.exit_idx - self.entry_idx
+            if lengths.sum() > 0:
+                trade = np.repeat(np.arange(len(lengths)), lengths)
+                bars = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths) + self.entry_idx[trade]
+                entry_fee = self.params.fee_rate * self.entry_prices[trade] * self.quantities[trade]
+                equity[bars] += (
+                    self.sides[trade] * (self.klines.close[bars] - self.entry_prices[trade]) * self.quantities[trade]
+                    - entry_fee
+                )
+            self._equity = equity
+        return self._equity
+
+    # === Tableaux ===
+    def trades(self) -> pd.DataFrame:
+        from backtest.engine import EXIT_REASONS  # Import local pour éviter l'import circulaire
+        open_time = self.klines.open_time
+        return pd.DataFrame({
+            "entry_time": pd.to_datetime(open_time[self.entry_idx], unit="ms"),
+            "exit_time": pd.to_datetime(open_time[self.exit_idx], unit="ms"),
+            "direction": np.where(self.sides > 0, "bullish", "bearish"),
+            "entry_price": self.entry_prices,
+            "exit_price": self.exit_prices,
+            "quantity": self.quantities,
+            "fees": self.fees,
+            "pnl": self.pnl,
+            "reason": np.asarray(EXIT_REASONS)[self.reasons] if len(self) else [],
+        })
+
+    def equity_curve(self) -> pd.DataFrame:
+        return pd.DataFrame({
+            "time": pd.to_datetime(self.klines.open_time, unit="ms"),
+            "equity": self.equity,
+        })
+
+    # === Statistiques ===
+    def max_drawdown(self) -> float:
+        equity = self.equity
+        if not len(equity):
+            return 0.0
+        peak = np.maximum.accumulate(equity)
+        return float(np.max((peak - equity) / peak))
+
+    def stats(self) -> dict:
+        from backtest.engine import EXIT_REASONS  # Import local pour éviter l'import circulaire
+        wins = self.pnl[self.pnl > 0]
+        losses = self.pnl[self.pnl < 0]
+        counts = np.bincount(self.reasons, minlength=len(EXIT_REASONS)) if len(self) else np.zeros(len(EXIT_REASONS), int)
+        return {
+            "candles": len(self.klines),
+            "trades": len(self),
+            "win_rate": round(len(wins) / len(self), 4) if len(self) else 0.0,
+            "total_pnl": round(float(self.pnl.sum()), 4),
+            "fees": round(float(self.fees.sum()), 4),
+            "profit_factor": round(float(wins.sum() / -losses.sum()), 3) if len(losses) else float("inf"),
+            "max_drawdown": round(self.max_drawdown(), 4),
+            "final_equity": round(float(self.equity[-1]), 4) if len(self.klines) else self.params.initial_balance,
+            "exits": {reason: int(c) for reason, c in zip(EXIT_REASONS, counts)},
+            "elapsed_s": round(self.elapsed, 3),
+        }
@@ -0,0 +1,85 @@
+"""
+Module : run.py
+But : Lancement d'un backtest en ligne de commande.
+      python -m backtest.run data/ALGOUSDT-5m-*.zip --sl 0.0085 --tp 0.015 --out resultats/
+      python -m backtest.run data/ALGOUSDT-1m-*.zip --interval 5m   (regroupement 1m → 5m)
+      python -m backtest.run data/ALGOUSDT-5m-*.zip --both-directions (longs et shorts ; le bot ne prend que des longs)
+"""
+
+import os
+import json
+import argparse
+
+import pandas as pd
+
+from backtest.data import load_klines, resample, synthetic_klines, INTERVAL_MS
+from backtest.engine import BacktestParams, run_backtest
+
+
+def _timestamp_ms(value):
+    return None if value is None else int(pd.Timestamp(value).timestamp() * 1000)
+
+def parse_args(argv=None):
+    defaults = BacktestParams()
+    parser = argparse.ArgumentParser(description="Backtest de la stratégie EMA20/EMA50")
+    parser.add_argument("paths", nargs="*", help="Fichiers CSV/ZIP/NPZ de bougies, motifs glob ou dossiers")
+    parser.add_argument("--interval", choices=sorted(INTERVAL_MS), help="Regroupe les bougies 1m dans cet intervalle")
+    parser.add_argument("--start", help="Date de début (ex : 2023-01-01)")
+    parser.add_argument("--end", help="Date de fin exclue")
+    parser.add_argument("--synthetic", type=int, default=0, help="Nombre de bougies synthétiques (sans fichiers)")
+    parser.add_argument("--sl", type=float, default=defaults.stop_loss_pct, help="Stop loss (fraction du prix)")
+    parser.add_argument("--tp", type=float, default=defaults.take_profit_pct, help="Take profit (fraction du prix)")
+    parser.add_argument("--no-trailing", action="store_true", help="Désactive les paliers du trailing SL/TP")
+    parser.add_argument("--fee", type=float, default=defaults.fee_rate, help="Frais par côté")
+    parser.add_argument("--slippage", type=float, default=defaults.slippage, help="Glissement par exécution")
+    parser.add_argument("--quantity", type=float, default=defaults.quantity_usdt, help="Marge USDT par trade")
+    parser.add_argument("--leverage", type=int, default=defaults.leverage, help="Levier")
+    parser.add_argument("--balance", type=float, default=defaults.initial_balance, help="Solde initial")
+    parser.add_argument("--fast", type=int, default=defaults.fast, help="Période EMA rapide")
+    parser.add_argument("--slow", type=int, default=defaults.slow, help="Période EMA lente")
+    parser.add_argument("--both-directions", action="store_true",
+                        help="Trade aussi les croisements baissiers (le bot en production ne prend que les haussiers)")
+    parser.add_argument("--out", help="Dossier de sortie (trades.csv, equity.csv, stats.json)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.synthetic:
+        klines = synthetic_klines(args.synthetic)
+    elif args.paths:
+        klines = load_klines(args.paths)
+        if args.interval:
+            klines = resample(klines, args.interval)
+    else:
+        raise SystemExit("❌ Aucun fichier de bougies (ou --synthetic N)")
+    klines = klines.between(_timestamp_ms(args.start), _timestamp_ms(args.end))
+
+    params = BacktestParams(
+        stop_loss_pct=args.sl,
+        take_profit_pct=args.tp,
+        trailing=not args.no_trailing,
+        fee_rate=args.fee,
+        slippage=args.slippage,
+        quantity_usdt=args.quantity,
+        leverage=args.leverage,
+        initial_balance=args.balance,
+        fast=args.fast,
+        slow=args.slow,
+        bullish_only=not args.both_directions,
+    )
+    result = run_backtest(klines, params)
+    stats = result.stats()
+    print(json.dumps(stats, indent=2, ensure_ascii=False))
+
+    if args.out:
+        os.makedirs(args.out, exist_ok=True)
+        result.trades().to_csv(os.path.join(args.out, "trades.csv"), index=False)
+        result.equity_curve().to_csv(os.path.join(args.out, "equity.csv"), index=False)
+        with open(os.path.join(args.out, "stats.json"), "w") as f:
+            json.dump({"params": params._asdict(), **stats}, f, indent=2, ensure_ascii=False)
+        print(f"📁 Résultats écrits dans {args.out}")
+    return result
+
+
+if __name__ == "__main__":
+    main()
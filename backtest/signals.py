@@ -0,0 +1,37 @@
+"""
+Module : signals.py
+But : Croisements EMA calculés sur tout l'historique d'un coup (NumPy / pandas).
+      Croisement strict de strategies/ema_cross.detect_ema_cross ; en réel, get_ema_values et
+      ema_live_step l'appellent avec bullish=True (défaut) : seuls les croisements haussiers
+      déclenchent une entrée. bullish_only=True reproduit ce comportement.
+"""
+
+import numpy as np
+import pandas as pd
+
+BULLISH = 1
+BEARISH = -1
+
+
+def ema(values: np.ndarray, span: int) -> np.ndarray:
+    """
+    Même EMA que core/indicators.IncrementalEMA (pandas ewm(span, adjust=False)).
+    """
+    return pd.Series(values, copy=False).ewm(span=span, adjust=False).mean().to_numpy()
+
+def ema_cross_signals(close: np.ndarray, fast: int = 20, slow: int = 50, warmup: int = None,
+                      bullish_only: bool = False) -> np.ndarray:
+    """
+    Signal à la clôture de chaque bougie : 1 = croisement haussier, -1 = baissier, 0 = rien.
+    Croisement strict comme en réel : EMA rapide sous la lente à la bougie précédente, au-dessus à celle-ci.
+    Les `warmup` premières bougies (slow par défaut) sont ignorées, le temps que les EMA se stabilisent.
+    bullish_only : croisements baissiers ignorés, comme le bot en production.
+    """
+    diff = ema(close, fast) - ema(close, slow)
+    signals = np.zeros(len(close), dtype=np.int8)
+    prev, now = diff[:-1], diff[1:]
+    signals[1:][(prev < 0) & (now > 0)] = BULLISH
+    if not bullish_only:
+        signals[1:][(prev > 0) & (now < 0)] = BEARISH
+    signals[:warmup if warmup is not None else slow] = 0
+    return signals
@@ -0,0 +1,313 @@
+"""
+Module : sweep.py
+But : Balayage de paramètres (grille ou tirage aléatoire) du backtest, en parallèle.
+      - Les bougies sont placées une seule fois en mémoire partagée (multiprocessing.shared_memory) :
+        les processus s'y attachent au démarrage, rien n'est recopié par tâche.
+      - Signaux EMA mis en cache dans chaque processus par (fast, slow, bullish_only) ; les combinaisons
+        sont regroupées par couple d'EMA pour en profiter.
+      - Résultats mis en cache par empreinte des paramètres et des données (fichier JSONL) :
+        une relance ne calcule que les combinaisons nouvelles.
+
+      python -m backtest.sweep data/ALGOUSDT-5m-*.zip
+      python -m backtest.sweep data/ALGOUSDT-5m-*.zip --space espace.json --random 500 --workers 8
+
+Espace de recherche (JSON) : nom du paramètre → liste de valeurs, ou {"min": a, "max": b}
+pour un tirage uniforme (mode --random). Les paliers du trailing sont des listes de [gain, niveau] :
+      {"fast": [9, 20], "slow": [50, 100], "stop_loss_pct": {"min": 0.005, "max": 0.015},
+       "sl_levels": [[[0.005, 0.002], [0.015, 0.010]], [[0.01, 0.004], [0.02, 0.012]]]}
+"""
+
+import os
+import json
+import time
+import random
+import hashlib
+import argparse
+import itertools
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory, resource_tracker
+
+import numpy as np
+import pandas as pd
+
+from backtest.data import Klines, load_klines, resample, synthetic_klines, INTERVAL_MS
+from backtest.engine import BacktestParams, run_backtest
+from backtest.signals import ema_cross_signals
+from core import trailing_levels
+
+SWEEP_CACHE_DIR = os.getenv("SWEEP_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache"))
+CHUNK_SIZE = 8  # Combinaisons par tâche
+
+# Paliers plus larges que ceux du bot (x2) pour comparaison
+_WIDE_SL_LEVELS = tuple((t * 2, l * 2) for t, l in trailing_levels.SL_LEVELS)
+
+DEFAULT_SPACE = {
+    "fast": [9, 12, 20],
+    "slow": [26, 50, 100],
+    "stop_loss_pct": [0.005, 0.0085, 0.012],
+    "take_profit_pct": [0.01, 0.015, 0.02, 0.03],
+    "trailing": [True, False],
+    "sl_levels": [trailing_levels.SL_LEVELS, _WIDE_SL_LEVELS],
+}
+
+SharedArray = namedtuple("SharedArray", ["name", "shape", "dtype"])
+
+
+# === Bougies en mémoire partagée ===
+class SharedKlines:
+    """
+    Copie les colonnes des bougies dans des segments de mémoire partagée (une fois).
+    À utiliser comme gestionnaire de contexte : les segments sont libérés à la sortie.
+    """
+
+    def __init__(self, klines: Klines):
+        self._segments = []
+        self.descriptors = []
+        for column in klines:
+            column = np.ascontiguousarray(column)
+            segment = shared_memory.SharedMemory(create=True, size=max(column.nbytes, 1))
+            np.ndarray(column.shape, dtype=column.dtype, buffer=segment.buf)[:] = column
+            self._segments.append(segment)
+            self.descriptors.append(SharedArray(segment.name, column.shape, column.dtype.str))
+
+    def close(self):
+        for segment in self._segments:
+            segment.close()
+            segment.unlink()
+        self._segments = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _attach(descriptor: SharedArray):
+    try:
+        segment = shared_memory.SharedMemory(name=descriptor.name, track=False)  # Python 3.13+
+    except TypeError:
+        segment = shared_memory.SharedMemory(name=descriptor.name)
+        # Le segment appartient au processus parent : pas de suppression à la sortie du worker
+        try:
+            resource_tracker.unregister(segment._name, "shared_memory")
+        except Exception:
+            pass
+    return segment, np.ndarray(descriptor.shape, dtype=descriptor.dtype, buffer=segment.buf)
+
+
+# === Processus de calcul ===
+_worker_klines = None
+_worker_segments = []
+_worker_signals = {}
+
+def _init_worker(descriptors):
+    global _worker_klines
+    columns = []
+    for descriptor in descriptors:
+        segment, array = _attach(descriptor)
+        _worker_segments.append(segment)  # Garde le segment ouvert tant que le processus vit
+        columns.append(array)
+    _worker_klines = Klines(*columns)
+
+def _signals_for(klines, fast, slow, bullish_only):
+    key = (fast, slow, bullish_only)
+    signals = _worker_signals.get(key)
+    if signals is None:
+        signals = _worker_signals[key] = ema_cross_signals(klines.close, fast, slow, bullish_only=bullish_only)
+    return signals
+
+def _run_chunk(combos):
+    results = []
+    for combo in combos:
+        params = BacktestParams(**combo)
+        result = run_backtest(_worker_klines, params, _signals_for(_worker_klines, params.fast, params.slow, params.bullish_only))
+        results.append((combo, _flatten_stats(result.stats())))
+    return results
+
+def _flatten_stats(stats: dict) -> dict:
+    flat = {k: v for k, v in stats.items() if k != "exits"}
+    flat.update({f"exit_{reason}": count for reason, count in stats["exits"].items()})
+    return flat
+
+
+# === Espace de recherche ===
+def _normalize(name, value):
+    # Les paliers arrivent du JSON en listes : tuples pour le hachage et BacktestParams
+    if name in ("sl_levels", "tp_levels"):
+        return tuple(tuple(level) for level in value)
+    return value
+
+def grid(space: dict):
+    """
+    Toutes les combinaisons de l'espace (produit cartésien).
+    """
+    names = list(space)
+    for values in itertools.product(*(space[name] for name in names)):
+        yield {name: _normalize(name, value) for name, value in zip(names, values)}
+
+def random_search(space: dict, n: int, seed: int = 0):
+    """
+    n combinaisons tirées au hasard : choix dans une liste, ou uniforme entre "min" et "max".
+    """
+    rng = random.Random(seed)
+    for _ in range(n):
+        combo = {}
+        for name, values in space.items():
+            if isinstance(values, dict):
+                low, high = values["min"], values["max"]
+                combo[name] = rng.randint(low, high) if isinstance(low, int) and isinstance(high, int) else rng.uniform(low, high)
+            else:
+                combo[name] = _normalize(name, rng.choice(values))
+        yield combo
+
+def _valid(combo: dict) -> bool:
+    return combo.get("fast", 20) < combo.get("slow", 50)
+
+
+# === Cache des résultats ===
+def data_fingerprint(klines: Klines) -> str:
+    digest = hashlib.sha256()
+    digest.update(np.ascontiguousarray(klines.open_time).tobytes())
+    digest.update(np.ascontiguousarray(klines.close).tobytes())
+    return digest.hexdigest()[:16]
+
+def params_key(combo: dict) -> str:
+    # Paramètres complets (valeurs par défaut comprises) : un changement de défaut invalide le cache
+    params = BacktestParams(**combo)._asdict()
+    if not params["trailing"]:
+        # Sans trailing les paliers n'ont aucun effet : une seule simulation pour toutes leurs variantes
+        params["sl_levels"] = params["tp_levels"] = None
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()[:24]
+
+
+class ResultCache:
+    """
+    Résultats déjà calculés pour un jeu de données : un fichier JSONL, une ligne par combinaison.
+    """
+
+    def __init__(self, fingerprint: str, cache_dir: str = SWEEP_CACHE_DIR):
+        self.path = os.path.join(cache_dir, f"sweep_{fingerprint}.jsonl")
+        self._results = {}
+        if os.path.exists(self.path):
+            with open(self.path, "r") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        self._results[entry["key"]] = entry
+                    except (ValueError, KeyError):
+                        continue  # Ligne tronquée (interruption pendant l'écriture)
+
+    def __contains__(self, key):
+        return key in self._results
+
+    def __len__(self):
+        return len(self._results)
+
+    def get(self, key):
+        return self._results.get(key)
+
+    def add(self, key, combo, stats):
+        entry = {"key": key, "params": combo, "stats": stats}
+        self._results[key] = entry
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+
+
+# === Balayage ===
+def sweep(klines: Klines, combos, workers: int = None, cache_dir: str = SWEEP_CACHE_DIR,
+          use_cache: bool = True, progress=None) -> pd.DataFrame:
+    """
+    Évalue les combinaisons en parallèle et retourne un DataFrame (paramètres + statistiques),
+    trié par PnL décroissant. Les combinaisons déjà en cache ne sont pas recalculées.
+    """
+    combos = [c for c in combos if _valid(c)]
+    cache = ResultCache(data_fingerprint(klines), cache_dir) if use_cache else None
+    keys = [params_key(c) for c in combos]
+
+    todo, seen = [], set()
+    for key, combo in zip(keys, combos):
+        if (cache is None or key not in cache) and key not in seen:
+            seen.add(key)
+            todo.append((key, combo))
+    # Regroupement par couple d'EMA : les signaux calculés par un processus resservent
+    todo.sort(key=lambda item: (item[1].get("fast", 20), item[1].get("slow", 50)))
+
+    computed = {}
+    if todo:
+        chunks = [todo[i:i + CHUNK_SIZE] for i in range(0, len(todo), CHUNK_SIZE)]
+        done = 0
+        with SharedKlines(klines) as shared, ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(shared.descriptors,)
+        ) as executor:
+            futures = {executor.submit(_run_chunk, [combo for _, combo in chunk]): chunk for chunk in chunks}
+            for future in as_completed(futures):
+                chunk = futures[future]
+                for (key, _), (combo, stats) in zip(chunk, future.result()):
+                    computed[key] = stats
+                    if cache is not None:
+                        cache.add(key, combo, stats)
+                done += len(chunk)
+                if progress:
+                    progress(done, len(todo))
+
+    rows = []
+    for key, combo in zip(keys, combos):
+        stats = computed.get(key) or cache.get(key)["stats"]
+        rows.append({**combo, **stats, "cached": key not in computed})
+    frame = pd.DataFrame(rows)
+    if not frame.empty:
+        frame = frame.sort_values("total_pnl", ascending=False, ignore_index=True)
+    return frame
+
+
+# === Ligne de commande ===
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Balayage de paramètres du backtest EMA")
+    parser.add_argument("paths", nargs="*", help="Fichiers CSV/ZIP/NPZ de bougies, motifs glob ou dossiers")
+    parser.add_argument("--interval", choices=sorted(INTERVAL_MS), help="Regroupe les bougies 1m dans cet intervalle")
+    parser.add_argument("--synthetic", type=int, default=0, help="Nombre de bougies synthétiques (sans fichiers)")
+    parser.add_argument("--space", help="Fichier JSON de l'espace de recherche (DEFAULT_SPACE sinon)")
+    parser.add_argument("--random", type=int, default=0, help="Nombre de tirages aléatoires (grille complète sinon)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="Nombre de processus (tous les cœurs par défaut)")
+    parser.add_argument("--cache-dir", default=SWEEP_CACHE_DIR)
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--top", type=int, default=20, help="Nombre de lignes affichées")
+    parser.add_argument("--out", help="Fichier CSV de tous les résultats")
+    args = parser.parse_args(argv)
+
+    if args.synthetic:
+        klines = synthetic_klines(args.synthetic)
+    elif args.paths:
+        klines = load_klines(args.paths)
+        if args.interval:
+            klines = resample(klines, args.interval)
+    else:
+        raise SystemExit("❌ Aucun fichier de bougies (ou --synthetic N)")
+
+    space = DEFAULT_SPACE
+    if args.space:
+        with open(args.space, "r") as f:
+            space = json.load(f)
+    combos = list(random_search(space, args.random, args.seed) if args.random else grid(space))
+
+    started = time.perf_counter()
+    frame = sweep(
+        klines, combos, workers=args.workers, cache_dir=args.cache_dir, use_cache=not args.no_cache,
+        progress=lambda done, total: print(f"\r⏳ {done}/{total}", end="", flush=True),
+    )
+    print(f"\n✅ {len(frame)} combinaisons ({int((~frame['cached']).sum()) if len(frame) else 0} calculées) "
+          f"sur {len(klines)} bougies en {time.perf_counter() - started:.1f}s")
+    with pd.option_context("display.width", 200, "display.max_columns", 20):
+        print(frame.head(args.top))
+    if args.out:
+        frame.to_csv(args.out, index=False)
+        print(f"📁 Résultats écrits dans {args.out}")
+    return frame
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Benchmarks : EMA et détection de croisement (chemin bougie → signal).
+"""
+
+import pandas as pd
+import pytest
+from ta.trend import EMAIndicator
+
+from core.market_data import CandleSnapshot
+from core.indicators import EMAPair
+
+
+@pytest.fixture(scope="module")
+def closes(corpus):
+    return corpus.close[-52:].tolist()
+
+@pytest.fixture(scope="module")
+def kline_rows(corpus):
+    # Lignes au format API (open_time, open, high, low, close...) pour les instantanés
+    return [[int(t), o, h, l, c] for t, o, h, l, c in zip(corpus.open_time.tolist(), corpus.open.tolist(),
+                                                        corpus.high.tolist(), corpus.low.tolist(), corpus.close.tolist())]
+
+
+def bench_detect_ema_cross(benchmark):
+    from strategies.ema_cross import detect_ema_cross
+    ema20, ema50 = (0.2501, 0.2503), (0.2500, 0.2501)  # Pas de croisement : cas courant à chaque tick
+    assert benchmark(detect_ema_cross, ema20, ema50) is None
+
+def bench_ema_pandas_window(benchmark, closes):
+    # Recalcul complet sur la fenêtre de 52 bougies (ancien get_ema_values, ema4/ema5)
+    def compute():
+        series = pd.Series(closes)
+        return (EMAIndicator(series, window=20).ema_indicator().iloc[-2:].tolist(),
+                EMAIndicator(series, window=50).ema_indicator().iloc[-2:].tolist())
+    benchmark(compute)
+
+def bench_ema_incremental_sync(benchmark, kline_rows):
+    # get_ema_values actuel : une nouvelle bougie clôturée par appel (fenêtre de 52 bougies recalculée)
+    pair = EMAPair(20, 50)
+    snapshots = [CandleSnapshot("ALGOUSDT", "5m", kline_rows[i - 52:i], None, 0.0)
+                 for i in range(52, min(len(kline_rows), 5_000))]
+    pair.sync(snapshots[0])
+    state = {"i": 0}
+
+    def step():
+        state["i"] = (state["i"] + 1) % len(snapshots)
+        return pair.sync(snapshots[state["i"]])
+    benchmark(step)
+
+def bench_get_ema_values(benchmark, client):
+    # Bout en bout : cache de bougies (core/market_data.py) + EMA incrémentales + détection
+    from strategies.ema_cross import get_ema_values
+    signal, close_time, emas = get_ema_values()
+    assert emas is not None
+    benchmark(get_ema_values)
+
+def bench_ema_cross_signals_corpus(benchmark, corpus):
+    # Signaux du backtest sur tout le corpus (backtest/signals.py)
+    from backtest.signals import ema_cross_signals
+    benchmark(ema_cross_signals, corpus.close, 20, 50)
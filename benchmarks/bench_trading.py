@@ -0,0 +1,62 @@
+"""
+Benchmarks : calculs du chemin d'ordre (trailing, quantité) et journal des trades.
+"""
+
+import pytest
+
+LOG_ROWS = 1_000
+
+
+@pytest.fixture(scope="module")
+def price_path(corpus):
+    # 1000 prix successifs du corpus autour d'une entrée : tous les paliers du trailing sont traversés
+    closes = corpus.close[-1_000:].tolist()
+    return closes[0], closes
+
+
+def bench_get_trailing_sl(benchmark, price_path):
+    from core.trailing import get_trailing_sl
+    entry, prices = price_path
+
+    def sweep():
+        for price in prices:
+            get_trailing_sl(entry, price, "bullish")
+            get_trailing_sl(entry, price, "bearish")
+    benchmark(sweep)
+
+def bench_get_trailing_tp(benchmark, price_path):
+    from core.trailing import get_trailing_tp
+    from core.config import take_profit_pct
+    entry, prices = price_path
+
+    def sweep():
+        for price in prices:
+            get_trailing_tp(entry, price, "bullish", take_profit_pct)
+            get_trailing_tp(entry, price, "bearish", take_profit_pct)
+    benchmark(sweep)
+
+def bench_trailing_ladder_evaluate(benchmark, corpus):
+    # Paliers SL évalués d'un bloc sur tout le corpus (backtest, balayages)
+    from core.trailing_levels import SL_LADDER
+    closes = corpus.close
+    benchmark(SL_LADDER.evaluate, closes, float(closes[0]), "bullish")
+
+def bench_calculate_quantity(benchmark, client):
+    from core.trading_utils import calculate_quantity
+    price = float(client.futures_mark_price(symbol=client.wrapped.symbol)["markPrice"])
+    assert benchmark(calculate_quantity, price, 2.0, 10) > 0
+
+def bench_log_trade(benchmark, trade_log):
+    from core.trading_utils import log_trade
+    benchmark(log_trade, "bullish", 0.2512, 0.2491, 0.2549, "auto")
+
+def bench_update_trade_status(benchmark, trade_log):
+    # Réécriture complète de logs.csv : coût proportionnel à l'historique (1000 trades)
+    from core.trading_utils import log_trade, update_trade_status
+    for i in range(LOG_ROWS):
+        log_trade("bullish", 0.25 + i * 1e-4, 0.24, 0.26, "auto", status="FERMÉ - TP")
+    log_trade("bearish", 0.2512, 0.2533, 0.2474, "auto")
+
+    def update():
+        update_trade_status(0.2512, "OUVERT", direction="bearish")  # Statut inchangé : mesure répétable
+    benchmark(update)
@@ -0,0 +1,25 @@
+"""
+Benchmarks : zones de supports / résistances (ema4.py).
+"""
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def ema4():
+    import ema4
+    return ema4
+
+@pytest.fixture(scope="module")
+def pivots(corpus):
+    # Plus hauts/bas de 500 bougies : entrée réaliste pour le regroupement
+    return corpus.high[-250:].tolist() + corpus.low[-250:].tolist()
+
+
+def bench_detect_supports_resistances_multi(benchmark, ema4, candles_df):
+    supports, resistances = benchmark(ema4.detect_supports_resistances_multi, candles_df)
+    assert len(supports) <= 3 and len(resistances) <= 3
+
+def bench_regrouper_zones_proches(benchmark, ema4, pivots):
+    zones = benchmark(ema4.regrouper_zones_proches, pivots)
+    assert sum(len(z) for z in zones) == len(set(pivots))
@@ -0,0 +1,57 @@
+"""
+Module : conftest.py
+But : Environnement des benchmarks : exchange simulé sur le corpus, Telegram en dry-run,
+      journaux hors du dépôt. Les variables sont posées avant tout import de core/.
+"""
+
+import os
+import logging
+
+from benchmarks.corpus import corpus_source, CORPUS_CANDLES
+
+os.environ["BINANCE_MOCK"] = corpus_source()
+os.environ.setdefault("BINANCE_MOCK_CANDLES", str(CORPUS_CANDLES))
+os.environ["BINANCE_MOCK_LATENCY"] = "0"
+os.environ["TELEGRAM_DRY_RUN"] = "1"
+os.environ.setdefault("TELEGRAM_CHAT_ID", "0")
+os.environ["USE_WEBSOCKET"] = "0"
+os.environ["METRICS_PORT"] = "0"
+
+# Pas d'écriture dans bot.log : les basicConfig des modules deviennent sans effet
+logging.basicConfig(level=logging.CRITICAL, handlers=[logging.NullHandler()])
+
+import pytest
+import pandas as pd
+
+KLINE_COLUMNS = [
+    "open_time", "open", "high", "low", "close", "volume",
+    "close_time", "quote_asset_volume", "number_of_trades",
+    "taker_buy_base_asset_volume", "taker_buy_quote_asset_volume", "ignore",
+]
+
+
+@pytest.fixture(scope="session")
+def client():
+    from core.binance_client import get_client
+    return get_client()
+
+@pytest.fixture(scope="session")
+def corpus(client):
+    # Bougies de l'exchange simulé : le corpus et le client voient les mêmes données
+    return client.wrapped.klines
+
+@pytest.fixture(scope="session")
+def candles_df(client):
+    # Même DataFrame que ema4.get_klines (100 dernières bougies, valeurs texte de l'API)
+    df = pd.DataFrame(client.get_klines(symbol=client.wrapped.symbol, interval=client.wrapped.interval, limit=100),
+                      columns=KLINE_COLUMNS)
+    df["close"] = df["close"].astype(float)
+    return df
+
+@pytest.fixture
+def trade_log(tmp_path, monkeypatch):
+    # logs.csv temporaire : les benchmarks n'écrivent jamais dans logs/
+    from core import trading_utils
+    path = str(tmp_path / "logs.csv")
+    monkeypatch.setattr(trading_utils, "log_file", path)
+    return path
@@ -0,0 +1,70 @@
+"""
+Module : corpus.py
+But : Bougies utilisées par les benchmarks (et par l'exchange simulé qu'ils interrogent).
+      - BENCH_KLINES=<chemin> ou fichiers présents dans benchmarks/data/ → bougies enregistrées.
+      - Sinon : bougies synthétiques déterministes (mêmes que BINANCE_MOCK=1).
+      Enregistrement d'un corpus depuis Binance Futures :
+      python -m benchmarks.corpus --symbol ALGOUSDT --interval 5m --candles 20000
+"""
+
+import os
+import csv
+import glob
+import argparse
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+CORPUS_CANDLES = int(os.getenv("BENCH_CANDLES", 20_000))
+CORPUS_INTERVAL = os.getenv("BINANCE_MOCK_INTERVAL", os.getenv("EMA_INTERVAL", "5m"))
+
+
+def corpus_source() -> str:
+    """
+    Valeur de BINANCE_MOCK à utiliser : chemin des bougies enregistrées, ou "1" (synthétiques).
+    """
+    path = os.getenv("BENCH_KLINES")
+    if path:
+        return path
+    if glob.glob(os.path.join(CORPUS_DIR, "*.csv")) or glob.glob(os.path.join(CORPUS_DIR, "*.zip")):
+        return CORPUS_DIR
+    return "1"
+
+def load_corpus():
+    from backtest.data import load_klines, synthetic_klines  # Import local : pandas/numpy seulement ici
+    source = corpus_source()
+    if source == "1":
+        return synthetic_klines(CORPUS_CANDLES, interval=CORPUS_INTERVAL)
+    return load_klines(source)
+
+def record_corpus(symbol: str, interval: str, candles: int, out_dir: str = CORPUS_DIR) -> str:
+    """
+    Télécharge les `candles` dernières bougies Futures (pages de 1500) au format CSV Binance.
+    """
+    from backtest.data import INTERVAL_MS
+    from core.binance_client import get_client
+    client = get_client()
+    step = INTERVAL_MS[interval]
+    end = client.get_server_time()["serverTime"] // step * step
+    start = end - candles * step
+    rows = []
+    while start < end:
+        page = client.futures_klines(symbol=symbol, interval=interval, startTime=start, limit=1500)
+        if not page:
+            break
+        rows.extend(page)
+        start = page[-1][0] + step
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f"{symbol}-{interval}.csv")
+    with open(path, "w", newline="") as f:
+        csv.writer(f).writerows(rows)
+    print(f"📁 {len(rows)} bougies écrites dans {path}")
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Enregistre un corpus de bougies pour les benchmarks")
+    parser.add_argument("--symbol", default=os.getenv("SYMBOL", "ALGOUSDT"))
+    parser.add_argument("--interval", default=CORPUS_INTERVAL)
+    parser.add_argument("--candles", type=int, default=CORPUS_CANDLES)
+    parser.add_argument("--out", default=CORPUS_DIR)
+    args = parser.parse_args()
+    record_corpus(args.symbol, args.interval, args.candles, args.out)
@@ -0,0 +1,156 @@
+"""
+Module : async_gateway.py
+But : Passerelle asyncio vers Binance : appels indépendants lancés en parallèle.
+      - Une boucle asyncio dédiée tourne dans son propre thread ; chaque appel du client
+        (bloquant) y est exécuté dans un pool de GATEWAY_WORKERS threads.
+      - Les appels passent toujours par le client enveloppé (budget de poids, exchange simulé,
+        métriques binance_request_ms) : la passerelle n'ajoute que le parallélisme.
+      - Depuis du code synchrone (threads du bot, handlers Telegram) :
+            future = gateway.submit(client.futures_account)           # concurrent.futures.Future
+            balance, info, ticker = gateway.gather(
+                client.futures_account_balance,
+                client.futures_exchange_info,
+                lambda: client.futures_mark_price(symbol=symbol),
+            )                                                          # durée ≈ la plus lente
+      - Depuis une coroutine exécutée sur la boucle : await gateway.run(...) / await gateway.fan_out(...).
+      - La priorité de requête du thread appelant (core/rate_limiter.request_priority) suit l'appel.
+"""
+
+import time
+import asyncio
+import threading
+import logging
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+
+from core.rate_limiter import request_priority, current_priority
+from core.metrics import metrics
+from core.config import gateway_workers
+
+logging.basicConfig(
+    filename='bot.log',
+    level=logging.WARNING,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+
+class AsyncExchangeGateway:
+    """
+    Boucle asyncio démarrée au premier appel, arrêtée par stop().
+    """
+
+    def __init__(self, workers: int = gateway_workers, name: str = "exchange-gateway"):
+        self.workers = workers
+        self.name = name
+        self._loop = None
+        self._thread = None
+        self._executor = None
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+
+    # === Cycle de vie ===
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return self
+            self._ready.clear()
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=f"{self.name}-io")
+            self._thread = threading.Thread(target=self._run_loop, name=self.name, daemon=True)
+            self._thread.start()
+        self._ready.wait()
+        return self
+
+    def _run_loop(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        loop.set_default_executor(self._executor)
+        self._loop = loop
+        self._ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.close()
+
+    def stop(self, timeout: float = 5.0):
+        """
+        Arrête la boucle puis le pool (les appels en cours se terminent).
+        """
+        with self._lock:
+            loop, thread, executor = self._loop, self._thread, self._executor
+            self._loop = self._thread = self._executor = None
+        if loop is None:
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+        executor.shutdown(wait=False)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    # === API asyncio (coroutines exécutées sur la boucle de la passerelle) ===
+    async def run(self, func, *args, priority: int = None, **kwargs):
+        """
+        Exécute un appel bloquant dans le pool sans bloquer la boucle.
+        """
+        self.calls += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._executor, partial(_call, func, args, kwargs, priority))
+        except Exception:
+            self.errors += 1
+            raise
+
+    async def fan_out(self, *funcs, priority: int = None, return_exceptions: bool = False) -> list:
+        """
+        Lance tous les appels (fonctions sans argument) en même temps ; résultats dans l'ordre.
+        """
+        return await asyncio.gather(*(self.run(f, priority=priority) for f in funcs),
+                                    return_exceptions=return_exceptions)
+
+    # === API synchrone (thread-safe) ===
+    def _loop_for_caller(self):
+        self.start()
+        if threading.current_thread() is self._thread:
+            # Attendre un résultat depuis la boucle elle-même la bloquerait définitivement
+            raise RuntimeError("Appel synchrone depuis la boucle de la passerelle : utiliser await gateway.run()")
+        return self._loop
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Programme un appel et retourne un concurrent.futures.Future (.result(timeout) pour attendre).
+        """
+        loop = self._loop_for_caller()
+        coro = self.run(func, *args, priority=current_priority(None), **kwargs)
+        return asyncio.run_coroutine_threadsafe(coro, loop)
+
+    def gather(self, *funcs, timeout: float = None, return_exceptions: bool = False) -> list:
+        """
+        Appels indépendants en parallèle depuis du code synchrone ; bloque jusqu'au dernier résultat.
+        return_exceptions=True : une erreur est renvoyée à sa place au lieu d'être levée.
+        """
+        loop = self._loop_for_caller()
+        started = time.perf_counter()
+        coro = self.fan_out(*funcs, priority=current_priority(None), return_exceptions=return_exceptions)
+        try:
+            return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout)
+        finally:
+            metrics.observe("gateway_gather_ms", (time.perf_counter() - started) * 1000, calls=len(funcs))
+
+    def stats(self) -> dict:
+        return {"running": self.running, "workers": self.workers, "calls": self.calls, "errors": self.errors}
+
+
+def _call(func, args, kwargs, priority):
+    # Exécuté dans un thread du pool : la priorité du thread appelant y est rétablie
+    if priority is None:
+        return func(*args, **kwargs)
+    with request_priority(priority):
+        return func(*args, **kwargs)
+
+
+# ✅ Instance globale unique
+gateway = AsyncExchangeGateway()
@@ -1,10 +1,11 @@
 import os
 import time
-from binance.client import Client
 from dotenv import load_dotenv
 import traceback
 from core.notifier import send_telegram
-from core.config import symbol  # <-- Import du symbole centralisé
+from core.rate_limiter import ThrottledClient, rate_limiter
+from core.http_session import PooledClient
+from core.config import symbol, binance_mock  # <-- Import du symbole centralisé
 import logging
 
 # === Chargement des variables d’environnement (.env) ===
@@ -13,16 +14,32 @@ load_dotenv()
 _client = None
 def get_client():
     global _client
+    if _client is None and binance_mock:
+        from core.mock_exchange import mock_client_from_env  # Import local : uniquement en mode simulé
+        _client = ThrottledClient(mock_client_from_env(), rate_limiter)
     if _client is None:
         API_KEY = os.getenv("BINANCE_API_KEY")
         API_SECRET = os.getenv("BINANCE_API_SECRET")
         if not API_KEY or not API_SECRET:
             raise Exception("❌ Clés API Binance manquantes dans .env")
-        _client = Client(API_KEY, API_SECRET)
+        # Toutes les requêtes passent par le budget de poids partagé (core/rate_limiter.py)
+        # et par la session HTTP unique (core/http_session.py)
+        _client = ThrottledClient(PooledClient(API_KEY, API_SECRET), rate_limiter)
     return _client
 
 client = get_client() 
 
+def set_client(new_client):
+    """
+    Remplace le client (ex : MockClient) ; à appeler avant d'importer les modules
+    qui font `from core.binance_client import client`.
+    """
+    global _client, client
+    if not isinstance(new_client, ThrottledClient):
+        new_client = ThrottledClient(new_client, rate_limiter)
+    _client = client = new_client
+    return client
+
 # Configuration du logging
 logging.basicConfig(
     filename='bot.log',
@@ -63,13 +80,25 @@ def check_futures_permissions() -> None:
         send_telegram(err_msg)
         raise
 
+# Décalage (secondes) entre l'heure serveur Binance et l'heure locale, mis à jour par sync_time()
+time_offset = 0.0
+
+def server_time() -> float:
+    """
+    Heure serveur Binance estimée (secondes), sans appel réseau.
+    """
+    return time.time() + time_offset
+
 def sync_time() -> None:
     """
     Compare l'heure locale avec celle du serveur Binance (timestamps en secondes).
     Affiche un avertissement si l'écart est trop important.
+    Mémorise le décalage pour server_time().
     """
+    global time_offset
     try:
         server_time_ms = get_client().get_server_time()["serverTime"]
+        time_offset = server_time_ms / 1000 - time.time()
         server_time = server_time_ms // 1000  # Converti en secondes
         local_time = int(time.time())
         delta = server_time - local_time
@@ -84,8 +113,15 @@ def sync_time() -> None:
         logging.error(err_msg)
         send_telegram(err_msg)
 
-def check_position_open(symbol: str = symbol) -> bool:
+def check_position_open(symbol: str = symbol, fresh: bool = False) -> bool:
+    """
+    fresh=True : lecture REST même si le flux user-data est connecté (juste après un ordre du bot,
+    l'événement ACCOUNT_UPDATE peut arriver après la réponse REST).
+    """
     try:
+        from core.user_stream import account_book  # Import local pour éviter l'import circulaire
+        if account_book.is_live and not fresh:
+            return account_book.position_amt(symbol) != 0
         positions = get_client().futures_position_information(symbol=symbol)
         for pos in positions:
             if float(pos["positionAmt"]) != 0:
@@ -97,13 +133,28 @@ def check_position_open(symbol: str = symbol) -> bool:
         send_telegram(err_msg)
         return False
 
+# === Levier appliqué ===
+applied_leverage = {}  # Dernier levier confirmé par Binance, par symbole
+
+def set_leverage(symbol: str, leverage: int):
+    """
+    Seul point d'appel de futures_change_leverage : tient le cache applied_leverage à jour.
+    En cas d'échec, le levier réel est inconnu : l'entrée du cache est retirée.
+    """
+    try:
+        get_client().futures_change_leverage(symbol=symbol, leverage=leverage)
+    except Exception:
+        applied_leverage.pop(symbol, None)
+        raise
+    applied_leverage[symbol] = leverage
+
 def change_leverage(symbol: str, leverage: int) -> bool:
     """
     Change le levier sur un symbole avec retries.
     Retourne True si succès, False sinon.
     """
     def try_change():
-        get_client().futures_change_leverage(symbol=symbol, leverage=leverage)
+        set_leverage(symbol, leverage)
         logging.info(f"🔧 Levier mis à jour : x{leverage} sur {symbol}")
 
     try:
@@ -119,8 +170,8 @@ def change_leverage(symbol: str, leverage: int) -> bool:
 # === Vérifie si un symbole est valide (optionnel) ===
 def is_symbol_valid(symbol: str) -> bool:
     try:
-        info = get_client().futures_exchange_info()
-        return any(s['symbol'] == symbol for s in info['symbols'])
+        from core.symbol_info import symbol_info  # Import local pour éviter l'import circulaire
+        return symbol_info.is_valid(symbol)
     except Exception as e:
         logging.error(f"❌ Erreur vérification du symbole : {e}")
         return False
@@ -2,7 +2,6 @@ import os
 import time
 import threading
 import traceback
-import gc
 import logging
 import psutil
 from binance.client import Client
@@ -21,11 +20,19 @@ from core.config import (
     GAIN_ALERT_FILE
 )
 from core.binance_client import client, check_position_open, change_leverage
+from core.symbol_info import symbol_info
+from core.runtime_config import runtime_config
+from core.commands import command_bus, CloseRequest, Shutdown
+from core.notifier import flush_telegram
+from core.user_stream import account_snapshot
 from core.trade_interface import open_trade, close_position
 from core.position_utils import sync_position
 from core.trailing import update_trailing_sl_and_tp, wait_for_tp_or_exit
-from core.utils import safe_round, retry_order
+from core.utils import safe_round
 from core.trading_utils import calculate_quantity, log_trade, get_mode, get_leverage_from_file
+from core.trade_executor import sltp_watchdog_step, check_and_update_leverage
+from core.scheduler import scheduler
+from core.rate_limiter import REQUEST_LOW
 import subprocess
 import math
 
@@ -42,7 +49,10 @@ stop_event = threading.Event()
 last_bot_tp = None
 last_bot_sl = None
 position_lock = threading.Lock()
-threads = []
+MONITOR_INTERVAL = 1.0
+
+# Tâches de fond du bot, supervisées par core/scheduler.py (voir start_supervised_jobs)
+BOT_JOBS = ("monitor_position", "sltp_watchdog", "leverage_watchdog", "system_usage")
 
 logging.basicConfig(
     filename='bot.log',
@@ -54,6 +64,8 @@ def log_system_usage():
     mem = psutil.virtual_memory()
     cpu = psutil.cpu_percent()
     logging.warning(f"RAM utilisée : {mem.percent}% | CPU : {cpu}%")
+    if mem.percent > 90:
+        logging.error("RAM presque pleine !")
 
 def check_futures_permissions():
     try:
@@ -86,107 +98,13 @@ def sync_windows_time():
         send_telegram(f"⚠️ Erreur synchronisation heure Windows : {e}")
 
 def get_price_precision(symbol):
-    info = client.futures_exchange_info()
-    for s in info['symbols']:
-        if s['symbol'] == symbol:
-            tick_size = float([f for f in s['filters'] if f['filterType'] == 'PRICE_FILTER'][0]['tickSize'])
-            return int(round(-math.log10(tick_size)))
+    filters = symbol_info.get(symbol)
+    if filters is not None and filters.tick_size > 0:
+        return filters.price_precision
     return 4
 
-def auto_set_sl_tp(stop_event):
-    while not stop_event.is_set():
-        try:
-            positions = client.futures_position_information(symbol=symbol)
-            position_handled = False
-
-            for pos in positions:
-                amt = float(pos['positionAmt'])
-
-                if amt != 0 and not position_handled:
-                    position_handled = True
-
-                    try:
-                        account_info = client.futures_account()
-                        current_leverage = default_leverage
-                        for asset in account_info['positions']:
-                            if asset['symbol'] == symbol:
-                                current_leverage = int(asset.get('leverage', default_leverage))
-                                break
-                        client.futures_change_leverage(symbol=symbol, leverage=current_leverage)
-                    except Exception as e:
-                        logging.error(f"⚠️ Erreur application du levier : {e}")
-                        send_telegram(f"⚠️ Erreur application du levier : {e}")
-
-                    state.position_open = True
-                    entry_price = float(pos['entryPrice'])
-                    state.current_entry_price = entry_price
-                    direction = "bullish" if amt > 0 else "bearish"
-                    state.current_direction = direction
-                    qty = abs(amt)
-                    state.current_quantity = qty
-
-                    side_close = "SELL" if direction == "bullish" else "BUY"
-                    take_profit = entry_price * (1 + take_profit_pct if amt > 0 else 1 - take_profit_pct)
-                    stop_price = entry_price * (1 - stop_loss_pct if amt > 0 else 1 + stop_loss_pct)
-
-                    precision = get_price_precision(symbol)
-                    stop_price = round(stop_price, precision)
-                    take_profit = round(take_profit, precision)
-
-                    orders = client.futures_get_open_orders(symbol=symbol)
-                    sl_orders = [o for o in orders if o['type'] == "STOP_MARKET" and o['side'] == side_close and o.get('closePosition', False)]
-                    tp_orders = [o for o in orders if o['type'] == "TAKE_PROFIT_MARKET" and o['side'] == side_close and o.get('closePosition', False)]
-
-                    has_sl = len(sl_orders) > 0
-                    has_tp = len(tp_orders) > 0
-
-                    logging.info(f"Positions: {amt}, SL orders found: {len(sl_orders)}, TP orders found: {len(tp_orders)}")
-                    logging.info(f"Has SL: {has_sl}, Has TP: {has_tp}")
-
-                    if not has_tp:
-                        retry_order(lambda: client.futures_create_order(
-                            symbol=symbol,
-                            side=side_close,
-                            type="TAKE_PROFIT_MARKET",
-                            stopPrice=take_profit,
-                            closePosition=True,
-                            timeInForce="GTC"
-                        ))
-                        global last_bot_tp
-                        last_bot_tp = take_profit
-                        send_telegram(f"🎯Take profit automatique à {take_profit}$")
-
-                    if not has_sl:
-                        retry_order(lambda: client.futures_create_order(
-                            symbol=symbol,
-                            side=side_close,
-                            type="STOP_MARKET",
-                            stopPrice=stop_price,
-                            closePosition=True,
-                            timeInForce="GTC"
-                        ))
-                        global last_bot_sl
-                        last_bot_sl = stop_price
-                        send_telegram(f"🛡 Stop loss automatique à {stop_price}$")
-
-            if not position_handled:
-                state.position_open = False
-                state.current_entry_price = None
-                state.current_direction = None
-                state.current_quantity = None
-
-            gc.collect()
-            time.sleep(3)
-
-        except Exception as e:
-            logging.error(f"❌ Erreur dans auto_set_sl_tp : {e}")
-            send_telegram(f"❌ Erreur dans auto_set_sl_tp : {e}")
-            gc.collect()
-            time.sleep(3)
-
 def should_stop():
-    stop_path = os.path.join(BASE_DIR, "stop.txt")
-    return os.path.exists(stop_path)
+    return runtime_config.stop_requested
 
 def update_status(text):
     try:
@@ -197,72 +115,91 @@ def update_status(text):
         logging.error(f"Erreur écriture status.txt : {e}")
 
 def manual_close_requested():
-    manual_close_path = os.path.join(BASE_DIR, "manual_close_request.txt")
-    return os.path.exists(manual_close_path)
+    return runtime_config.manual_close
 
 def reset_manual_close():
-    manual_close_path = os.path.join(BASE_DIR, "manual_close_request.txt")
-    if os.path.exists(manual_close_path):
-        os.remove(manual_close_path)
+    runtime_config.clear("manual_close")
+
+# === COMMANDES (bus interne) ===
+last_close_started = 0.0
 
-def manual_close_watcher(stop_event):
-    while not stop_event.is_set():
+def handle_close_request(command):
+    global last_close_started
+    # Demandes déjà couvertes par une fermeture en cours ou terminée (double clic, fichier + Telegram)
+    if command.requested_at < last_close_started:
+        return
+    last_close_started = time.time()
+    try:
+        close_position()
+    except Exception as e:
+        send_telegram(f"❌ Erreur lors de la fermeture manuelle : {e}")
+        logging.error(f"❌ Erreur lors de la fermeture manuelle : {e}")
+    finally:
         if manual_close_requested():
-            try:
-                close_position()
-            except Exception as e:
-                send_telegram(f"❌ Erreur lors de la fermeture manuelle : {e}")
-                logging.error(f"❌ Erreur lors de la fermeture manuelle : {e}")
             reset_manual_close()
-        gc.collect()
-        time.sleep(0.1)
 
-def monitor_position(stop_event):
-    global last_bot_tp, last_bot_sl
-    last_position_amt = None
-    last_detected_tp = None
-    last_detected_sl = None
-
-    while not stop_event.is_set():
-        try:
-            positions = client.futures_position_information(symbol=symbol)
-            detected = False
-            for pos in positions:
-                if float(pos['positionAmt']) != 0:
-                    detected = True
-                    with position_lock:
-                        if not state.position_open:
-                            send_telegram("⚠ Une position a été détectée ouverte manuellement sur Binance.")
-                        state.position_open = True
-                        state.current_entry_price = float(pos['entryPrice'])
-                        state.current_direction = "bullish" if float(pos['positionAmt']) > 0 else "bearish"
-                        state.current_quantity = abs(float(pos['positionAmt']))
-                    logging.info(f"[monitor_position] Position détectée : {pos['positionAmt']} @ {pos['entryPrice']}")
-                    orders = client.futures_get_open_orders(symbol=symbol)
-                    tp = None
-                    sl = None
-                    for order in orders:
-                        if order['type'] == "TAKE_PROFIT_MARKET":
-                            tp = float(order['stopPrice'])
-                        if order['type'] == "STOP_MARKET":
-                            sl = float(order['stopPrice'])
-                    last_position_amt = float(pos['positionAmt'])
-                    break
-            if not detected:
-                with position_lock:
-                    if state.position_open:
-                        logging.info("[monitor_position] Reset de la position (aucune position détectée)")
-                        state.reset_all()
-                        last_detected_tp = None
-                        last_detected_sl = None
-                        last_position_amt = None
-            gc.collect()
-            time.sleep(1)
-        except Exception as e:
-            logging.error(f"Erreur dans monitor_position : {e}")
-            traceback.print_exc()
-            gc.collect()
-            time.sleep(10)
+def handle_shutdown(command):
+    if command.source == "fichier":
+        send_telegram("🛑 Fichier stop.txt détecté, arrêt du bot.")
+        update_status("ARRÊT - Fichier stop.txt détecté")
+    else:
+        update_status(f"ARRÊT - Demandé via {command.source}")
+    stop_event.set()
+    if command.exit_process:
+        stop_bot()
+        flush_telegram()  # os._exit ne passe pas par atexit
+        os._exit(0)
+
+def on_runtime_flag(name, value):
+    # Déclencheurs externes : fichiers posés à la main ou par un autre outil
+    if name == "manual_close" and value:
+        command_bus.post(CloseRequest("fichier"))
+    elif name == "stop_requested" and value:
+        command_bus.post(Shutdown("fichier"))
+
+command_bus.register(CloseRequest, handle_close_request)
+command_bus.register(Shutdown, handle_shutdown)
+runtime_config.subscribe(on_runtime_flag)
+
+def start_command_bus():
+    command_bus.start()
+    # Fichiers déjà présents au démarrage
+    if manual_close_requested():
+        command_bus.post(CloseRequest("fichier"))
+    if should_stop():
+        command_bus.post(Shutdown("fichier"))
+
+def monitor_position():
+    """
+    Tâche planifiée (1 s) : aligne l'état local sur la position Binance.
+    État local tenu par le flux user-data ; sinon instantané REST partagé avec les autres tâches.
+    """
+    positions = account_snapshot(symbol, max_age=MONITOR_INTERVAL).positions
+    for pos in positions:
+        if float(pos['positionAmt']) != 0:
+            with position_lock:
+                if not state.position_open:
+                    send_telegram("⚠ Une position a été détectée ouverte manuellement sur Binance.")
+                state.position_open = True
+                state.current_entry_price = float(pos['entryPrice'])
+                state.current_direction = "bullish" if float(pos['positionAmt']) > 0 else "bearish"
+                state.current_quantity = abs(float(pos['positionAmt']))
+            logging.info(f"[monitor_position] Position détectée : {pos['positionAmt']} @ {pos['entryPrice']}")
+            return
+    with position_lock:
+        if state.position_open:
+            logging.info("[monitor_position] Reset de la position (aucune position détectée)")
+            state.reset_all()
+
+def start_supervised_jobs():
+    """
+    Enregistre les tâches de fond du bot dans le planificateur : relance avec attente croissante
+    après erreur, décalage aléatoire des lectures REST, statistiques par tâche (/jobs).
+    """
+    scheduler.every(MONITOR_INTERVAL, monitor_position, name="monitor_position", max_failures=10)
+    scheduler.every(10, sltp_watchdog_step, name="sltp_watchdog", jitter=2, priority=REQUEST_LOW)
+    scheduler.every(60, check_and_update_leverage, name="leverage_watchdog", jitter=10, priority=REQUEST_LOW)
+    scheduler.every(15, log_system_usage, name="system_usage", jitter=1, priority=REQUEST_LOW)
 
 def is_another_bot_running(lock_file):
     current_pid = os.getpid()
@@ -308,8 +245,8 @@ def run_bot():
         send_telegram("🤖 Bot est bien lancé monsieur ...")
         update_status("ACTIF - En cours d'exécution ...")
 
-        logging.info("🔁 Lancement des threads de surveillance...")
-        resilient_thread(monitor_position, stop_event)
+        logging.info("🔁 Lancement des tâches de surveillance...")
+        start_supervised_jobs()
 
         levier = get_leverage_from_file()
         if change_leverage(symbol, levier):
@@ -319,38 +256,11 @@ def run_bot():
             logging.warning(f"⚠️ Levier non mis à jour : x{levier}")
             send_telegram(f"⚠️ Levier non mis à jour : x{levier}")
 
-        backoff_time = 5
-        max_backoff = 60
         logging.info("🔄 Démarrage du bot de trading...")
 
-        while not stop_event.is_set():
-            try:
-                if should_stop():
-                    stop_event.set()
-                    send_telegram("🛑 Fichier stop.txt détecté, arrêt du bot.")
-                    update_status("ARRÊT - Fichier stop.txt détecté")
-                    break
-
-                time.sleep(5)
-
-                if manual_close_requested() and state.position_open:
-                    close_position()
-                    reset_manual_close()
-                    time.sleep(2)
-
-                log_system_usage()
-                gc.collect()
-                time.sleep(10)
-                backoff_time = 5
-
-            except Exception as e:
-                send_telegram(f"❌ Erreur principale : {e}")
-                update_status(f"ERREUR - {str(e)}")
-                logging.error(f"⏳ Erreur rencontrée, nouvelle tentative dans {backoff_time}s... {e}")
-                traceback.print_exc()
-                gc.collect()
-                time.sleep(backoff_time)
-                backoff_time = min(max_backoff, backoff_time * 2)
+        # Arrêt et fermeture manuelle passent par le bus de commandes (réaction immédiate),
+        # surveillance et relevés système par le planificateur
+        stop_event.wait()
 
         update_status("ARRÊT - Terminé proprement")
 
@@ -360,83 +270,31 @@ def run_bot():
             os.remove(lock_file)
 
 def launch_bot():
-    global trailing_thread, tp_thread, threads
-
     try:
         if not change_leverage(symbol, default_leverage):
             send_telegram(f"❌ Bot arrêté : changement de levier échoué sur {symbol}")
             return
 
         run_bot()
-
-
-        t = threading.Thread(target=monitor_position, args=(stop_event,))
-        t.start()
-        threads.append(t)
-
-        trailing_thread = resilient_thread(auto_set_sl_tp, stop_event)
-        tp_thread = resilient_thread(manual_close_watcher, stop_event)
-
-        logging.info("🔄 Lancement du bot de trading...")
     except Exception as e:
         send_telegram(f"❌ Erreur critique lors du lancement du bot : {e}")
         logging.error(f"❌ Erreur critique lors du lancement du bot : {e}")
         traceback.print_exc()
 
 def get_dynamic_leverage():
-    try:
-        lev_path = os.path.join(BASE_DIR, "leverage.txt")
-        with open(lev_path, "r") as f:
-            lev = int(f.read().strip())
-            return lev
-    except Exception:
-        return default_leverage
+    return runtime_config.leverage
 
 def get_dynamic_quantity():
-    try:
-        qty_path = os.path.join(BASE_DIR, "quantity.txt")
-        with open(qty_path, "r") as f:
-            qty = float(f.read().strip())
-            return qty
-    except Exception:
-        return default_quantity_usdt
-
-def retry_order(order_fn, max_retries=3, delay=2):
-    for attempt in range(max_retries):
-        try:
-            return order_fn()
-        except Exception as e:
-            if attempt < max_retries - 1:
-                time.sleep(delay)
-            else:
-                send_telegram(f"❌ Erreur lors de la pose d'un ordre (SL/TP) : {e}")
-                logging.error(f"❌ Erreur lors de la pose d'un ordre (SL/TP) : {e}")
-
-def resilient_thread(target_fn, *args):
-    def wrapper():
-        retries = 0
-        while True:
-            try:
-                target_fn(*args)
-                break
-            except Exception as e:
-                logging.error(f"Thread {target_fn.__name__} crashé : {e}, relance dans 5s")
-                retries += 1
-                if retries > 10:
-                    send_telegram(f"❌ Trop d'erreurs sur {target_fn.__name__}, thread arrêté.")
-                    break
-                time.sleep(5)
-    t = threading.Thread(target=wrapper, daemon=True)
-    t.start()
-    return t
+    return runtime_config.quantity
 
 def stop_bot():
     logging.warning("🔴 Arrêt du bot demandé...")
     stop_event.set()
-    for t in threads:
-        if t.is_alive():
-            t.join(timeout=5)
-    logging.warning("🟢 Tous les threads arrêtés.")
+    # Tâches de fond retirées du planificateur ; celles en cours d'exécution sont attendues
+    for name in BOT_JOBS:
+        if not scheduler.cancel(name, timeout=5):
+            logging.warning(f"⚠️ Tâche {name} toujours en cours après 5s")
+    logging.warning("🟢 Toutes les tâches de fond arrêtées.")
 
     if trailing_thread and trailing_thread.is_alive():
         trailing_thread.join()
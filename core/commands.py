@@ -0,0 +1,101 @@
+"""
+Module : commands.py
+But : Bus de commandes interne (file + consommateur dédié).
+      Les handlers Telegram y déposent CloseRequest / Shutdown, le consommateur
+      les exécute immédiatement, sans scrutation de fichier.
+      Les fichiers manual_close_request.txt et stop.txt restent utilisables
+      comme déclencheurs externes (détectés par runtime_config).
+"""
+
+import time
+import queue
+import threading
+import logging
+import traceback
+from collections import namedtuple
+
+logging.basicConfig(
+    filename='bot.log',
+    level=logging.WARNING,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+
+class CloseRequest(namedtuple("CloseRequest", ["source", "requested_at"])):
+    """
+    Demande de fermeture de la position ouverte.
+    """
+    __slots__ = ()
+
+    def __new__(cls, source: str = "telegram", requested_at: float = None):
+        return super().__new__(cls, source, requested_at or time.time())
+
+
+class Shutdown(namedtuple("Shutdown", ["source", "exit_process", "requested_at"])):
+    """
+    Arrêt du bot de trading ; exit_process=True termine aussi le programme.
+    """
+    __slots__ = ()
+
+    def __new__(cls, source: str = "telegram", exit_process: bool = False, requested_at: float = None):
+        return super().__new__(cls, source, exit_process, requested_at or time.time())
+
+
+class CommandBus:
+    """
+    File de commandes consommée par un thread unique : les commandes
+    s'exécutent dans l'ordre et jamais en parallèle.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._handlers = {}
+        self._thread = None
+        self.shutdown_event = threading.Event()
+        self.processed = 0
+        self.errors = 0
+
+    def register(self, command_type, handler):
+        self._handlers[command_type] = handler
+
+    def post(self, command):
+        if isinstance(command, Shutdown):
+            self.shutdown_event.set()
+        self._queue.put(command)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return self._thread
+        self._thread = threading.Thread(target=self._consume, name="command-bus", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self):
+        self._queue.put(None)
+
+    def _consume(self):
+        while True:
+            command = self._queue.get()  # Bloquant : aucun réveil périodique au repos
+            if command is None:
+                break
+            handler = self._handlers.get(type(command))
+            if handler is None:
+                logging.warning(f"⚠️ Commande sans handler : {command}")
+                continue
+            try:
+                handler(command)
+                self.processed += 1
+            except Exception as e:
+                self.errors += 1
+                logging.error(f"❌ Erreur commande {type(command).__name__} ({command.source}) : {e}")
+                traceback.print_exc()
+
+
+# ✅ Instance globale unique
+command_bus = CommandBus()
+
+def request_close(source: str = "telegram"):
+    command_bus.post(CloseRequest(source))
+
+def request_shutdown(source: str = "telegram", exit_process: bool = False):
+    command_bus.post(Shutdown(source, exit_process))
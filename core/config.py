@@ -16,6 +16,12 @@ take_profit_pct = float(os.getenv("TAKE_PROFIT_PCT", 0.015))  # % Take Profit
 # 🕒 Paramètres de temps
 strategy_interval = int(os.getenv("STRATEGY_INTERVAL", 10))   # Intervalle d'exécution de la stratégie (secondes)
 trailing_check_interval = int(os.getenv("TRAILING_INTERVAL", 5))  # Intervalle de vérification du trailing (secondes)
+trailing_debounce = float(os.getenv("TRAILING_DEBOUNCE", 1.0))  # Délai min entre deux remplacements d'un ordre du trailing (secondes)
+trailing_min_step = float(os.getenv("TRAILING_MIN_STEP", 0.001))  # Écart min entre deux niveaux SL/TP (fraction du prix d'entrée)
+kline_refresh_interval = float(os.getenv("KLINE_REFRESH_INTERVAL", 4))  # Durée de validité du cache de bougies (secondes)
+intra_bar_tick = float(os.getenv("INTRA_BAR_TICK", 1))  # Cadence des vérifications intrabougie (secondes)
+candle_close_delay = float(os.getenv("CANDLE_CLOSE_DELAY", 0.5))  # Délai après la clôture avant évaluation (secondes)
+symbol_info_ttl = float(os.getenv("SYMBOL_INFO_TTL", 3600))  # Durée de validité des filtres de symboles (secondes)
 
 # 📁 Chemins de fichiers
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -25,6 +31,7 @@ LEVERAGE_FILE = os.path.join(BASE_DIR, "leverage.txt")
 QUANTITY_FILE = os.path.join(BASE_DIR, "quantity.txt")
 GAIN_ALERT_FILE = os.path.join(BASE_DIR, "gain_alert.txt")
 MANUAL_CLOSE_FILE = os.path.join(BASE_DIR, "manual_close_request.txt")
+STOP_FILE = os.path.join(BASE_DIR, "stop.txt")
 CONTEXT_FILE = os.path.join(BASE_DIR, "context.json")
 STATUS_FILE = os.path.join(BASE_DIR, "status.txt")
 TRADE_STATUS_FILE = os.path.join(BASE_DIR, "trade_status.txt")
@@ -36,8 +43,18 @@ if admin_chat_id_env is None:
 admin_chat_id = int(admin_chat_id_env)
 
 # 🛠️ Divers
+batch_entry = os.getenv("BATCH_ENTRY", "1") == "1"  # Entrée MARKET + SL/TP envoyés ensemble (batchOrders)
 max_retry_order = int(os.getenv("MAX_RETRY_ORDER", 3))  # Nombre max de retry pour un ordre
 retry_delay = int(os.getenv("RETRY_DELAY", 2))          # Délai entre les retry (secondes)
+metrics_port = int(os.getenv("METRICS_PORT", 9108))     # Point d'accès Prometheus local (0 = désactivé)
+gateway_workers = int(os.getenv("GATEWAY_WORKERS", 8))  # Appels REST simultanés de la passerelle asyncio
+
+# 🧪 Exchange simulé (core/mock_exchange.py) : "1" = bougies synthétiques, sinon chemin des bougies à rejouer
+binance_mock = os.getenv("BINANCE_MOCK", "0") not in ("", "0")
+
+# 📡 Flux WebSocket (bougies + mark price), inutiles avec l'exchange simulé
+use_websocket = os.getenv("USE_WEBSOCKET", "1") == "1" and not binance_mock
+stream_intervals = [i.strip() for i in os.getenv("STREAM_INTERVALS", "5m").split(",") if i.strip()]
 
 # === Paramètres EMA Cross centralisés ===
 ema_interval = os.getenv("EMA_INTERVAL", "5m")
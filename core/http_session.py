@@ -0,0 +1,128 @@
+"""
+Module : http_session.py
+But : Session HTTP unique partagée par tous les clients Binance REST.
+      - Pool de connexions dimensionné sur le nombre de threads qui appellent l'API
+        (exécuteur d'ouverture, scheduler, trailing, watchdogs, Telegram).
+      - Keep-alive TCP et TCP_NODELAY : les connexions TLS restent chaudes et les petites
+        requêtes signées partent sans attendre l'algorithme de Nagle.
+      - Timeouts (connexion, lecture) explicites au lieu du timeout unique de python-binance.
+      - Pas de HTTP/2 : python-binance repose sur requests (HTTP/1.1 uniquement) ;
+        le parallélisme vient du pool de connexions.
+"""
+
+import os
+import socket
+import logging
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from binance.client import Client
+
+from core.rate_limiter import ThreadResponse
+
+# Configuration du logging
+logging.basicConfig(
+    filename='bot.log',
+    level=logging.WARNING,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+# === Paramètres (surchargeables via .env) ===
+POOL_SIZE = int(os.getenv("BINANCE_HTTP_POOL_SIZE", 12))          # Connexions gardées par hôte
+POOL_HOSTS = int(os.getenv("BINANCE_HTTP_POOL_HOSTS", 4))         # fapi, api, ... : un pool par hôte
+CONNECT_TIMEOUT = float(os.getenv("BINANCE_HTTP_CONNECT_TIMEOUT", 3.05))
+READ_TIMEOUT = float(os.getenv("BINANCE_HTTP_READ_TIMEOUT", 10))
+KEEPALIVE_IDLE = int(os.getenv("BINANCE_HTTP_KEEPALIVE_IDLE", 30))  # Secondes avant la 1re sonde keep-alive
+KEEPALIVE_INTERVAL = 10
+KEEPALIVE_COUNT = 3
+
+
+def socket_options() -> list:
+    """
+    Options des sockets du pool : celles d'urllib3 (TCP_NODELAY) + keep-alive TCP.
+    Les réglages fins (TCP_KEEPIDLE...) ne sont appliqués que si le système les expose.
+    """
+    options = list(HTTPConnection.default_socket_options)
+    if (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1) not in options:
+        options.append((socket.IPPROTO_TCP, socket.TCP_NODELAY, 1))
+    options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+    for name, value in (("TCP_KEEPIDLE", KEEPALIVE_IDLE),
+                        ("TCP_KEEPINTVL", KEEPALIVE_INTERVAL),
+                        ("TCP_KEEPCNT", KEEPALIVE_COUNT)):
+        if hasattr(socket, name):
+            options.append((socket.IPPROTO_TCP, getattr(socket, name), value))
+    return options
+
+
+class TunedHTTPAdapter(HTTPAdapter):
+    """
+    Adaptateur requests dont les pools appliquent socket_options().
+    pool_block=False : un pic de threads ouvre des connexions en plus au lieu d'attendre.
+    """
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        pool_kwargs["socket_options"] = socket_options()
+        super().init_poolmanager(connections, maxsize, block=block, **pool_kwargs)
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        proxy_kwargs["socket_options"] = socket_options()
+        return super().proxy_manager_for(proxy, **proxy_kwargs)
+
+
+def build_session() -> requests.Session:
+    """
+    Session requests configurée ; pas de retry automatique (les retries sont gérés par le bot,
+    un ordre ne doit jamais être renvoyé en silence).
+    """
+    session = requests.Session()
+    adapter = TunedHTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=POOL_SIZE, max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# === Session partagée ===
+_session = None
+_session_lock = threading.Lock()
+
+def get_session() -> requests.Session:
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = build_session()
+            logging.info(f"🌐 Session HTTP Binance : pool {POOL_SIZE} connexions/hôte, keep-alive, TCP_NODELAY")
+        return _session
+
+
+class PooledClient(Client):
+    """
+    Client python-binance branché sur la session partagée : toutes les instances réutilisent
+    les mêmes connexions TLS au lieu d'ouvrir chacune leur propre pool.
+    `response` (dernière réponse HTTP) est propre à chaque thread.
+    """
+
+    response = ThreadResponse()
+
+    def __init__(self, api_key=None, api_secret=None, requests_params=None, **kwargs):
+        params = {"timeout": (CONNECT_TIMEOUT, READ_TIMEOUT)}
+        params.update(requests_params or {})
+        super().__init__(api_key, api_secret, requests_params=params, **kwargs)
+
+    def _init_session(self) -> requests.Session:
+        session = get_session()
+        # En-têtes (clé API) identiques pour toutes les instances : mêmes clés .env
+        session.headers.update(self._get_headers())
+        return session
+
+
+def close_session() -> None:
+    """
+    Ferme les connexions du pool (arrêt du bot).
+    """
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
@@ -0,0 +1,112 @@
+"""
+Module : indicators.py
+But : EMA incrémentales pour remplacer le recalcul pandas ewm(span, adjust=False)
+      sur toute la fenêtre à chaque tick.
+      - Mêmes valeurs que pandas sur la même fenêtre (52 bougies par défaut) : l'état est
+        recalculé sur la fenêtre une seule fois par nouvelle bougie clôturée.
+      - Entre deux clôtures, chaque tick ne coûte qu'une valeur provisoire (O(1)) pour la
+        bougie en cours, sans modifier l'état.
+"""
+
+import threading
+
+
+class IncrementalEMA:
+    """
+    EMA identique à pandas Series.ewm(span=span, adjust=False).mean() :
+    y0 = x0, puis y_t = (1 - alpha) * y_(t-1) + alpha * x_t avec alpha = 2 / (span + 1).
+    """
+    __slots__ = ("span", "alpha", "value", "count")
+
+    def __init__(self, span: int):
+        self.span = span
+        self.alpha = 2.0 / (span + 1.0)
+        self.value = None
+        self.count = 0
+
+    def seed(self, closes):
+        self.value = None
+        self.count = 0
+        for close in closes:
+            self.update(close)
+        return self.value
+
+    def update(self, close: float) -> float:
+        # Bougie clôturée : l'état avance définitivement
+        close = float(close)
+        if self.value is None:
+            self.value = close
+        else:
+            self.value = (1.0 - self.alpha) * self.value + self.alpha * close
+        self.count += 1
+        return self.value
+
+    def peek(self, price: float) -> float:
+        # Valeur provisoire si la bougie en cours clôturait à ce prix
+        price = float(price)
+        if self.value is None:
+            return price
+        return (1.0 - self.alpha) * self.value + self.alpha * price
+
+
+class EMAPair:
+    """
+    Couple EMA rapide/lente (20/50 par défaut) synchronisé sur les instantanés
+    de core/market_data.py, calculé sur les `window` dernières bougies comme
+    pd.Series(closes[-window:]).ewm(span, adjust=False).mean().
+    """
+
+    def __init__(self, fast: int = 20, slow: int = 50, window: int = 52):
+        self.fast = IncrementalEMA(fast)
+        self.slow = IncrementalEMA(slow)
+        self.window = window
+        self._window_key = None
+        self._last_snapshot = None
+        self._last_values = None
+        self._lock = threading.Lock()
+
+    def seed(self, closes):
+        closes = [float(c) for c in closes]
+        self.fast.seed(closes)
+        self.slow.seed(closes)
+
+    def update(self, close: float):
+        return self.fast.update(close), self.slow.update(close)
+
+    def peek(self, price: float):
+        return self.fast.peek(price), self.slow.peek(price)
+
+    def sync(self, snapshot):
+        """
+        Retourne ((fast_prev, fast_now), (slow_prev, slow_now)) sur la fenêtre de l'instantané :
+        prev = dernière bougie clôturée, now = valeur provisoire sur la bougie en cours (dernière ligne).
+        """
+        with self._lock:
+            if snapshot is self._last_snapshot:
+                return self._last_values
+
+            klines = snapshot.klines[-self.window:]
+            closed = klines[:-1]
+            window_key = (closed[0][0], closed[-1][0]) if closed else None
+            if window_key != self._window_key:
+                # Nouvelle bougie clôturée : EMA recalculées sur la fenêtre glissante, comme pandas
+                self.seed(float(k[4]) for k in closed)
+                self._window_key = window_key
+
+            fast_now, slow_now = self.peek(klines[-1][4])
+            self._last_values = ((self.fast.value, fast_now), (self.slow.value, slow_now))
+            self._last_snapshot = snapshot
+            return self._last_values
+
+
+# === Registre partagé : une paire par (symbole, intervalle, spans) ===
+_pairs = {}
+_pairs_lock = threading.Lock()
+
+def get_ema_pair(symbol: str, interval: str, fast: int = 20, slow: int = 50, window: int = 52) -> EMAPair:
+    key = (symbol, interval, fast, slow, window)
+    with _pairs_lock:
+        pair = _pairs.get(key)
+        if pair is None:
+            pair = _pairs[key] = EMAPair(fast, slow, window)
+        return pair
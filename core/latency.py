@@ -0,0 +1,105 @@
+"""
+Module : latency.py
+But : Mesure de latence par étape d'un chemin critique (ex : signal → ordre exécuté).
+      Chaque mesure est journalisée et conservée dans un historique court
+      pour en suivre l'évolution (moyenne, pire cas).
+"""
+
+import time
+import threading
+import logging
+from collections import deque
+from contextlib import contextmanager
+
+from core.metrics import metrics
+
+logging.basicConfig(
+    filename='bot.log',
+    level=logging.WARNING,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+
+class LatencyTimer:
+    """
+    Chronomètre d'un chemin découpé en étapes :
+        timer = LatencyTimer("open_trade")
+        with timer.step("ordre"):
+            ...
+        timer.finish()
+    Les étapes lancées en parallèle peuvent se chevaucher : le total reste le temps réel écoulé.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = time.perf_counter()
+        self.steps = []
+        self.total_ms = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def step(self, label: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(label, (time.perf_counter() - start) * 1000)
+
+    def record(self, label: str, elapsed_ms: float):
+        with self._lock:
+            self.steps.append((label, elapsed_ms))
+
+    @property
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def summary(self) -> str:
+        total = self.total_ms if self.total_ms is not None else self.elapsed_ms
+        details = " | ".join(f"{label} {ms:.0f}ms" for label, ms in self.steps)
+        return f"{self.name} {total:.0f}ms ({details})"
+
+    def finish(self) -> float:
+        self.total_ms = self.elapsed_ms
+        latency_history.add(self)
+        metrics.observe("path_ms", self.total_ms, path=self.name)
+        for label, elapsed_ms in self.steps:
+            metrics.observe("path_step_ms", elapsed_ms, path=self.name, step=label)
+        logging.warning(f"⏱ {self.summary()}")
+        return self.total_ms
+
+
+class LatencyHistory:
+    """
+    Dernières mesures par chemin (nom du chronomètre).
+    """
+
+    def __init__(self, maxlen: int = 50):
+        self._maxlen = maxlen
+        self._timers = {}
+        self._lock = threading.Lock()
+
+    def add(self, timer: LatencyTimer):
+        with self._lock:
+            self._timers.setdefault(timer.name, deque(maxlen=self._maxlen)).append(timer)
+
+    def last(self, name: str):
+        with self._lock:
+            timers = self._timers.get(name)
+            return timers[-1] if timers else None
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = {}
+            for name, timers in self._timers.items():
+                totals = [t.total_ms for t in timers]
+                stats[name] = {
+                    "count": len(totals),
+                    "last_ms": round(totals[-1], 1),
+                    "avg_ms": round(sum(totals) / len(totals), 1),
+                    "max_ms": round(max(totals), 1),
+                }
+            return stats
+
+
+# ✅ Instance globale unique
+latency_history = LatencyHistory()
@@ -0,0 +1,256 @@
+"""
+Module : market_data.py
+But : Cache partagé des bougies (klines) Binance, indexé par (symbole, intervalle).
+      Une seule requête REST par fenêtre de rafraîchissement : tous les threads
+      (stratégies 5m, 3m, live, tracker) reçoivent le même instantané immuable.
+      Quand les flux WebSocket (core/streams.py) sont actifs, ils alimentent ce
+      même cache en continu et le REST ne sert plus qu'au rattrapage.
+"""
+
+import time
+import threading
+import logging
+from collections import namedtuple
+
+from core.binance_client import client
+from core.config import kline_refresh_interval
+
+logging.basicConfig(
+    filename='bot.log',
+    level=logging.WARNING,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+DEFAULT_KLINE_LIMIT = 52
+
+# Durée des intervalles Binance en secondes
+INTERVAL_SECONDS = {
+    "1m": 60, "3m": 180, "5m": 300, "15m": 900, "30m": 1800,
+    "1h": 3600, "2h": 7200, "4h": 14400, "6h": 21600, "8h": 28800,
+    "12h": 43200, "1d": 86400,
+}
+
+def interval_seconds(interval: str) -> int:
+    return INTERVAL_SECONDS[interval]
+
+
+class CandleSnapshot(namedtuple("CandleSnapshot", ["symbol", "interval", "klines", "closes", "fetched_at"])):
+    """
+    Instantané immuable des bougies : klines et closes sont des tuples,
+    partagés tels quels entre tous les lecteurs.
+    """
+    __slots__ = ()
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+    @property
+    def last_closed_time(self) -> int:
+        # Heure de clôture (en secondes) de la bougie N-1, la dernière bougie clôturée
+        return int(self.klines[-2][6] // 1000)
+
+
+class _Entry:
+    __slots__ = ("snapshot", "limit", "lock")
+
+    def __init__(self):
+        self.snapshot = None
+        self.limit = 0
+        self.lock = threading.Lock()
+
+
+class KlineCache:
+    """
+    Stocke un instantané par (symbole, intervalle) et ne le retélécharge
+    qu'une fois la fenêtre de rafraîchissement écoulée.
+    Un seul thread télécharge à la fois par clé, les autres attendent puis
+    reçoivent le même instantané.
+    """
+
+    def __init__(self, fetcher=None, refresh_interval: float = kline_refresh_interval):
+        self._fetcher = fetcher or client.get_klines
+        self.refresh_interval = refresh_interval
+        self._entries = {}
+        self._entries_lock = threading.Lock()
+        self._updated = threading.Condition()
+        self._stats_lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._stale = 0
+        self._errors = 0
+
+    def _entry(self, key):
+        with self._entries_lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _Entry()
+            return entry
+
+    def _count(self, field):
+        with self._stats_lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def _is_fresh(self, entry, limit):
+        snap = entry.snapshot
+        return snap is not None and entry.limit >= limit and snap.age < self.refresh_interval
+
+    def _publish(self, entry, symbol, interval, klines):
+        entry.snapshot = CandleSnapshot(
+            symbol=symbol,
+            interval=interval,
+            klines=klines,
+            closes=tuple(float(k[4]) for k in klines),
+            fetched_at=time.time(),
+        )
+        with self._updated:
+            self._updated.notify_all()
+        return entry.snapshot
+
+    def _fetch(self, entry, symbol, interval, limit):
+        # Appelé avec entry.lock tenu
+        self._count("_misses")
+        fetch_limit = max(limit, entry.limit)
+        try:
+            klines = self._fetcher(symbol=symbol, interval=interval, limit=fetch_limit)
+        except Exception as e:
+            self._count("_errors")
+            if entry.snapshot is None:
+                raise
+            self._count("_stale")
+            logging.warning(
+                f"⚠️ Klines {symbol} {interval} non rafraîchies ({e}), "
+                f"instantané de {entry.snapshot.age:.1f}s servi"
+            )
+            return entry.snapshot
+        entry.limit = fetch_limit
+        return self._publish(entry, symbol, interval, tuple(tuple(k) for k in klines))
+
+    # === Lecture d'un instantané (téléchargé si périmé) ===
+    def get(self, symbol: str, interval: str, limit: int = DEFAULT_KLINE_LIMIT) -> CandleSnapshot:
+        entry = self._entry((symbol, interval))
+        if self._is_fresh(entry, limit):
+            self._count("_hits")
+            return entry.snapshot
+
+        with entry.lock:
+            # Un autre thread a peut-être rafraîchi pendant qu'on attendait le verrou
+            if self._is_fresh(entry, limit):
+                self._count("_hits")
+                return entry.snapshot
+            return self._fetch(entry, symbol, interval, limit)
+
+    def get_closed(self, symbol: str, interval: str, close_time: float, limit: int = DEFAULT_KLINE_LIMIT) -> CandleSnapshot:
+        """
+        Instantané où la bougie clôturée à close_time (secondes serveur) est bien
+        l'avant-dernière : rechargé une fois par REST si le cache est en retard.
+        """
+        snapshot = self.get(symbol, interval, limit)
+        if snapshot.klines[-1][0] < int(close_time * 1000):
+            snapshot = self.refresh(symbol, interval, limit)
+        return snapshot
+
+    def get_closes(self, symbol: str, interval: str, limit: int = DEFAULT_KLINE_LIMIT) -> tuple:
+        return self.get(symbol, interval, limit).closes[-limit:]
+
+    # === Rechargement forcé par REST (démarrage ou rattrapage après coupure du flux) ===
+    def refresh(self, symbol: str, interval: str, limit: int = DEFAULT_KLINE_LIMIT) -> CandleSnapshot:
+        entry = self._entry((symbol, interval))
+        with entry.lock:
+            return self._fetch(entry, symbol, interval, limit)
+
+    # === Mise à jour incrémentale depuis le flux WebSocket ===
+    def apply_kline(self, symbol: str, interval: str, kline) -> bool:
+        """
+        Applique une bougie reçue du flux (format identique au REST).
+        Met à jour la bougie en cours ou fait glisser la fenêtre d'une bougie.
+        Retourne False si un trou est détecté : l'appelant doit alors rattraper via refresh().
+        """
+        entry = self._entry((symbol, interval))
+        kline = tuple(kline)
+        with entry.lock:
+            snap = entry.snapshot
+            if snap is None or not snap.klines:
+                return False
+            last_open = snap.klines[-1][0]
+            if kline[0] == last_open:
+                klines = snap.klines[:-1] + (kline,)
+            elif kline[0] == last_open + interval_seconds(interval) * 1000:
+                klines = snap.klines[1:] + (kline,)
+            elif kline[0] < last_open:
+                return True  # Message en retard, déjà couvert
+            else:
+                return False
+            self._publish(entry, symbol, interval, klines)
+            return True
+
+    # === Attente d'un nouvel instantané (remplace les time.sleep des boucles) ===
+    def wait_for_update(self, symbol: str, interval: str, timeout: float) -> bool:
+        entry = self._entry((symbol, interval))
+        current = entry.snapshot
+        with self._updated:
+            return self._updated.wait_for(lambda: entry.snapshot is not current, timeout=timeout)
+
+    def invalidate(self, symbol: str = None, interval: str = None):
+        with self._entries_lock:
+            for (s, i), entry in self._entries.items():
+                if (symbol is None or s == symbol) and (interval is None or i == interval):
+                    entry.snapshot = None
+
+    # === Compteurs exposés pour le suivi (hit/miss/périmé) ===
+    def stats(self) -> dict:
+        with self._stats_lock:
+            stats = {
+                "hits": self._hits,
+                "misses": self._misses,
+                "stale": self._stale,
+                "errors": self._errors,
+            }
+        with self._entries_lock:
+            stats["ages"] = {
+                f"{s}:{i}": round(e.snapshot.age, 2)
+                for (s, i), e in self._entries.items() if e.snapshot is not None
+            }
+        return stats
+
+
+class PriceBook:
+    """
+    Dernier mark price connu par symbole, alimenté par le flux markPrice.
+    """
+
+    def __init__(self):
+        self._prices = {}
+        self._updated = threading.Condition()
+
+    def update(self, symbol: str, price: float):
+        with self._updated:
+            self._prices[symbol] = (price, time.time())
+            self._updated.notify_all()
+
+    def get(self, symbol: str, max_age: float = 5.0):
+        with self._updated:
+            entry = self._prices.get(symbol)
+        if entry is None or time.time() - entry[1] > max_age:
+            return None
+        return entry[0]
+
+    def wait_for_update(self, symbol: str, timeout: float) -> bool:
+        with self._updated:
+            current = self._prices.get(symbol)
+            return self._updated.wait_for(lambda: self._prices.get(symbol) is not current, timeout=timeout)
+
+
+# ✅ Instances globales partagées par toutes les stratégies et le trailing
+market_data = KlineCache()
+price_book = PriceBook()
+
+def get_mark_price(symbol: str, max_age: float = 5.0) -> float:
+    """
+    Mark price depuis le flux si récent, sinon via REST (et mémorisé).
+    """
+    price = price_book.get(symbol, max_age=max_age)
+    if price is None:
+        price = float(client.futures_mark_price(symbol=symbol)["markPrice"])
+        price_book.update(symbol, price)
+    return price
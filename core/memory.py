@@ -0,0 +1,195 @@
+"""
+Module : memory.py
+But : Observabilité mémoire, à la place des gc.collect() forcés dans les boucles.
+      - Instantanés tracemalloc à la demande (commande Telegram /memory) :
+        top des lignes qui allouent et évolution depuis l'instantané précédent.
+      - Regroupement des allocations par thread (fonction d'entrée du thread).
+      - Évolution du nombre d'objets par type entre deux rapports.
+      - Statistiques du ramasse-miettes par génération et RSS du processus.
+      tracemalloc a un coût : il n'est démarré qu'avec MEMORY_PROFILING=1 ou /memory start.
+"""
+
+import os
+import gc
+import sys
+import dis
+import threading
+import tracemalloc
+import logging
+from collections import Counter
+
+import psutil
+
+logging.basicConfig(
+    filename='bot.log',
+    level=logging.WARNING,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+MEMORY_TRACE_FRAMES = int(os.getenv("MEMORY_TRACE_FRAMES", 30))
+
+# Frames de l'infrastructure des threads, ignorées pour trouver la fonction d'entrée
+_THREADING_FILES = ("threading.py", os.path.join("concurrent", "futures"))
+
+_TRACE_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+
+def _is_threading_frame(filename: str) -> bool:
+    return any(part in filename for part in _THREADING_FILES)
+
+def _format_size(size: int) -> str:
+    for unit in ("o", "Ko", "Mo"):
+        if abs(size) < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} Go"
+
+def _short(filename: str) -> str:
+    return os.path.relpath(filename) if not filename.startswith("<") else filename
+
+
+class MemoryProfiler:
+    """
+    Rapports mémoire comparés au rapport précédent (instantané tracemalloc
+    et décompte des objets par type).
+    """
+
+    def __init__(self, nframes: int = MEMORY_TRACE_FRAMES):
+        self.nframes = nframes
+        self._last_snapshot = None
+        self._last_counts = None
+        self._lock = threading.Lock()
+
+    # === tracemalloc ===
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.nframes)
+            logging.warning(f"🧠 tracemalloc démarré ({self.nframes} frames)")
+
+    def stop(self):
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self._last_snapshot = None
+
+    def _thread_entries(self):
+        """
+        (fichier, première ligne, dernière ligne) de la fonction d'entrée de chaque thread vivant → nom du thread.
+        """
+        names = {t.ident: t.name for t in threading.enumerate()}
+        entries = {}
+        for ident, frame in sys._current_frames().items():
+            stack = []
+            while frame is not None:
+                stack.append(frame)
+                frame = frame.f_back
+            for f in reversed(stack):
+                if not _is_threading_frame(f.f_code.co_filename):
+                    code = f.f_code
+                    last_line = max((line for _, line in dis.findlinestarts(code) if line), default=code.co_firstlineno)
+                    entries[(code.co_filename, code.co_firstlineno, last_line)] = names.get(ident, str(ident))
+                    break
+        return entries
+
+    def _thread_of(self, traceback, entries) -> str:
+        # Frames de la plus ancienne à la plus récente : la première hors threading est l'entrée du thread
+        for frame in traceback:
+            if _is_threading_frame(frame.filename):
+                continue
+            for (filename, first, last), name in entries.items():
+                if frame.filename == filename and first <= frame.lineno <= last:
+                    return name
+            return f"{_short(frame.filename)}:{frame.lineno}"
+        return "inconnu"
+
+    def snapshot_report(self, top: int = 10) -> str:
+        if not tracemalloc.is_tracing():
+            return "tracemalloc inactif (/memory start pour l'activer)"
+        snapshot = tracemalloc.take_snapshot().filter_traces(_TRACE_FILTERS)
+        lines = []
+
+        stats = snapshot.statistics("lineno")
+        total = sum(s.size for s in stats)
+        lines.append(f"🔎 Tracé : {_format_size(total)} ({len(stats)} lignes)")
+        for stat in stats[:top]:
+            frame = stat.traceback[0]
+            lines.append(f"  {_format_size(stat.size)} x{stat.count} {_short(frame.filename)}:{frame.lineno}")
+
+        with self._lock:
+            previous, self._last_snapshot = self._last_snapshot, snapshot
+        if previous is not None:
+            lines.append("📈 Croissance depuis le dernier rapport :")
+            for diff in snapshot.compare_to(previous, "lineno")[:top]:
+                if diff.size_diff <= 0:
+                    continue
+                frame = diff.traceback[0]
+                lines.append(f"  +{_format_size(diff.size_diff)} {_short(frame.filename)}:{frame.lineno}")
+
+        entries = self._thread_entries()
+        per_thread = Counter()
+        for stat in snapshot.statistics("traceback"):
+            per_thread[self._thread_of(stat.traceback, entries)] += stat.size
+        lines.append("🧵 Par thread :")
+        for name, size in per_thread.most_common(top):
+            lines.append(f"  {_format_size(size)} {name}")
+        return "\n".join(lines)
+
+    # === Objets Python ===
+    def object_counts_report(self, top: int = 10) -> str:
+        counts = Counter(type(o).__name__ for o in gc.get_objects())
+        with self._lock:
+            previous, self._last_counts = self._last_counts, counts
+        lines = [f"📦 Objets suivis par le GC : {sum(counts.values())}"]
+        if previous is None:
+            for name, count in counts.most_common(top):
+                lines.append(f"  {count} {name}")
+        else:
+            deltas = Counter({name: counts[name] - previous.get(name, 0) for name in counts})
+            for name, delta in deltas.most_common(top):
+                if delta <= 0:
+                    break
+                lines.append(f"  +{delta} {name} ({counts[name]})")
+        return "\n".join(lines)
+
+    # === Ramasse-miettes et processus ===
+    def gc_report(self) -> str:
+        stats = gc.get_stats()
+        generations = " | ".join(
+            f"G{i}: {s['collections']} passes, {s['collected']} libérés" for i, s in enumerate(stats)
+        )
+        return (
+            f"♻️ GC seuils {gc.get_threshold()} compteurs {gc.get_count()}\n"
+            f"  {generations}\n"
+            f"  Non collectables : {len(gc.garbage)}"
+        )
+
+    def process_report(self) -> str:
+        process = psutil.Process()
+        rss = process.memory_info().rss
+        return (
+            f"💾 RSS processus : {_format_size(rss)} | RAM système : {psutil.virtual_memory().percent}% "
+            f"| Threads : {threading.active_count()}"
+        )
+
+    def report(self, top: int = 10) -> str:
+        return "\n\n".join([
+            self.process_report(),
+            self.gc_report(),
+            self.object_counts_report(top),
+            self.snapshot_report(top),
+        ])
+
+
+# ✅ Instance globale unique
+memory_profiler = MemoryProfiler()
+
+if os.getenv("MEMORY_PROFILING", "0") == "1":
+    memory_profiler.start()
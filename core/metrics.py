@@ -0,0 +1,280 @@
+"""
+Module : metrics.py
+But : Mesures de latence et compteurs du bot, sans dépendance externe.
+      - Histogrammes à la HDR (seaux log-linéaires, ~1% de précision de 1µs à plusieurs heures) :
+        mémoire fixe par série, p50/p99 exacts à la précision près, enregistrement en O(1).
+      - Compteurs (erreurs, appels...) par nom + étiquettes.
+      - Consultation : commande Telegram /metrics et texte Prometheus (http://127.0.0.1:METRICS_PORT/metrics).
+
+Séries alimentées par le bot :
+      binance_request_ms{endpoint}      chaque appel client.* (core/rate_limiter.ThrottledClient)
+      binance_errors_total{endpoint,code}
+      telegram_send_ms                  envoi réel d'un message (core/notifier)
+      ema_values_ms                     get_ema_values (strategies/ema_cross.py)
+      path_ms{path} / path_step_ms{path,step}   chronomètres core/latency.LatencyTimer (open_trade...)
+      signal_to_fill_ms                 signal → ordre exécuté
+      trailing_iteration_ms             un tick traité par le moteur de trailing (core/trailing_engine.py)
+      gateway_gather_ms{calls}          appels parallèles de la passerelle (core/async_gateway.py)
+      job_ms{job}                       une exécution de tâche planifiée (core/scheduler.py)
+"""
+
+import math
+import time
+import threading
+import logging
+from functools import wraps
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logging.basicConfig(
+    filename='bot.log',
+    level=logging.WARNING,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+METRICS_PREFIX = "titanium_"
+QUANTILES = (0.5, 0.9, 0.99)
+
+# === Seaux log-linéaires (valeurs entières en microsecondes) ===
+SUB_BUCKET_BITS = 7                      # 128 sous-seaux : erreur relative ≤ 1/64
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+SUB_BUCKET_HALF = SUB_BUCKET_COUNT >> 1
+
+
+def _bucket_index(value_us: int) -> int:
+    # Valeurs < 128µs : un seau par µs ; au-delà, 64 seaux par puissance de 2
+    if value_us < SUB_BUCKET_COUNT:
+        return value_us
+    shift = value_us.bit_length() - SUB_BUCKET_BITS
+    return shift * SUB_BUCKET_HALF + (value_us >> shift)
+
+def _bucket_value(index: int) -> float:
+    # Milieu du seau (µs)
+    if index < SUB_BUCKET_COUNT:
+        return float(index)
+    shift = index // SUB_BUCKET_HALF - 1
+    lower = (index - shift * SUB_BUCKET_HALF) << shift
+    return lower + ((1 << shift) - 1) / 2
+
+
+class LatencyHistogram:
+    """
+    Histogramme de durées (ms en entrée et en sortie, stockage en µs).
+    """
+
+    def __init__(self):
+        self._counts = {}
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total_ms = 0.0
+        self.min_ms = math.inf
+        self.max_ms = 0.0
+
+    def record(self, elapsed_ms: float):
+        index = _bucket_index(max(int(elapsed_ms * 1000), 0))
+        with self._lock:
+            self._counts[index] = self._counts.get(index, 0) + 1
+            self.count += 1
+            self.total_ms += elapsed_ms
+            self.min_ms = min(self.min_ms, elapsed_ms)
+            self.max_ms = max(self.max_ms, elapsed_ms)
+
+    def percentiles(self, quantiles=QUANTILES) -> dict:
+        with self._lock:
+            if not self.count:
+                return {q: 0.0 for q in quantiles}
+            items = sorted(self._counts.items())
+            count, min_ms, max_ms = self.count, self.min_ms, self.max_ms
+        result = {}
+        for q in quantiles:
+            rank = max(math.ceil(q * count), 1)
+            seen = 0
+            for index, n in items:
+                seen += n
+                if seen >= rank:
+                    # Borné par les extrêmes exacts (le seau n'a qu'~1% de précision)
+                    result[q] = min(max(_bucket_value(index) / 1000, min_ms), max_ms)
+                    break
+        return result
+
+    def stats(self) -> dict:
+        p = self.percentiles()
+        with self._lock:
+            return {
+                "count": self.count,
+                "avg_ms": round(self.total_ms / self.count, 2) if self.count else 0.0,
+                "p50_ms": round(p[0.5], 2),
+                "p90_ms": round(p[0.9], 2),
+                "p99_ms": round(p[0.99], 2),
+                "max_ms": round(self.max_ms, 2),
+            }
+
+
+class MetricsRegistry:
+    """
+    Séries nommées (nom + étiquettes) créées au premier enregistrement.
+    """
+
+    def __init__(self):
+        self._histograms = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+        self.started = time.time()
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def histogram(self, name: str, **labels) -> LatencyHistogram:
+        key = self._key(name, labels)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, LatencyHistogram())
+        return histogram
+
+    def observe(self, name: str, elapsed_ms: float, **labels):
+        self.histogram(name, **labels).record(elapsed_ms)
+
+    def inc(self, name: str, value: int = 1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, (time.perf_counter() - start) * 1000, **labels)
+
+    def timed(self, name: str, **labels):
+        """
+        Décorateur : durée de chaque appel de la fonction.
+        """
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(name, **labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    # === Consultation ===
+    def snapshot(self) -> dict:
+        with self._lock:
+            histograms = list(self._histograms.items())
+            counters = dict(self._counters)
+        return {
+            "histograms": {_series_name(name, labels): h.stats() for (name, labels), h in sorted(histograms)},
+            "counters": {_series_name(name, labels): v for (name, labels), v in sorted(counters.items())},
+        }
+
+    def report(self, prefix: str = None) -> str:
+        """
+        Résumé texte (Telegram) : une ligne par série, filtrable par préfixe de nom.
+        """
+        snap = self.snapshot()
+        lines = []
+        for series, s in snap["histograms"].items():
+            if prefix and not series.startswith(prefix):
+                continue
+            lines.append(f"{series} : n={s['count']} p50={s['p50_ms']:.1f} p99={s['p99_ms']:.1f} max={s['max_ms']:.1f} ms")
+        for series, value in snap["counters"].items():
+            if prefix and not series.startswith(prefix):
+                continue
+            lines.append(f"{series} : {value}")
+        return "\n".join(lines) if lines else "Aucune mesure pour l'instant."
+
+    def prometheus(self) -> str:
+        """
+        Format texte Prometheus : histogrammes exposés en summary (quantiles, _sum, _count).
+        """
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+        out = []
+        declared = set()
+        for (name, labels), h in histograms:
+            metric = METRICS_PREFIX + name
+            if metric not in declared:
+                out.append(f"# TYPE {metric} summary")
+                declared.add(metric)
+            for q, value in h.percentiles().items():
+                out.append(f"{metric}{_labels(labels, quantile=q)} {value:.3f}")
+            out.append(f"{metric}_sum{_labels(labels)} {h.total_ms:.3f}")
+            out.append(f"{metric}_count{_labels(labels)} {h.count}")
+        for (name, labels), value in counters:
+            metric = METRICS_PREFIX + name
+            if metric not in declared:
+                out.append(f"# TYPE {metric} counter")
+                declared.add(metric)
+            out.append(f"{metric}{_labels(labels)} {value}")
+        out.append(f"# TYPE {METRICS_PREFIX}uptime_seconds gauge")
+        out.append(f"{METRICS_PREFIX}uptime_seconds {time.time() - self.started:.0f}")
+        return "\n".join(out) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+
+def _series_name(name, labels) -> str:
+    return name + ("{" + ",".join(f"{k}={v}" for k, v in labels) + "}" if labels else "")
+
+def _labels(labels, **extra) -> str:
+    pairs = list(labels) + [(k, str(v)) for k, v in extra.items()]
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"') for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+# ✅ Instance globale unique
+metrics = MetricsRegistry()
+
+
+# === Point d'accès Prometheus local ===
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = metrics.prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Pas de ligne par requête dans la console
+
+
+_server = None
+
+def start_metrics_server(port: int, host: str = "127.0.0.1"):
+    """
+    Démarre le serveur HTTP /metrics dans un thread daemon (port 0 ou négatif : désactivé).
+    """
+    global _server
+    if port <= 0 or _server is not None:
+        return _server
+    try:
+        _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        _server.daemon_threads = True
+    except OSError as e:
+        logging.error(f"❌ Serveur de métriques indisponible sur {host}:{port} : {e}")
+        return None
+    threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+    logging.info(f"📈 Métriques Prometheus sur http://{host}:{port}/metrics")
+    return _server
+
+def stop_metrics_server():
+    global _server
+    if _server is not None:
+        _server.shutdown()
+        _server.server_close()
+        _server = None
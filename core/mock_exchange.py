@@ -0,0 +1,522 @@
+"""
+Module : mock_exchange.py
+But : Faux Binance Futures en mémoire, sans réseau ni clés API, pour les essais
+      de charge et de latence (CI, machine de dev).
+      - Mêmes méthodes et mêmes formats de réponse que binance.client.Client
+        pour tout ce que le bot utilise (klines, mark price, ordres, positions, solde, levier).
+      - Rejoue des bougies enregistrées (backtest/data.py) ou synthétiques ; les horodatages
+        sont recalés pour que la bougie courante soit toujours celle de l'heure actuelle.
+      - Ordres MARKET exécutés immédiatement, STOP_MARKET / TAKE_PROFIT_MARKET déclenchés
+        quand le prix les atteint (advance() / set_price()).
+      - Filtres LOT_SIZE / PRICE_FILTER / MIN_NOTIONAL appliqués avec les codes d'erreur Binance.
+      - Poids des requêtes comptés par minute (en-tête X-MBX-USED-WEIGHT-1M), erreur -1003 au-delà de la limite.
+
+Activation : BINANCE_MOCK=1 (bougies synthétiques) ou BINANCE_MOCK=chemin/vers/bougies (CSV/ZIP/NPZ),
+avant le premier import de core.binance_client. Les flux WebSocket sont alors désactivés :
+toutes les lectures passent par ce client, dans le même processus.
+"""
+
+import os
+import json
+import time
+import itertools
+import threading
+import logging
+from types import SimpleNamespace
+
+from binance.exceptions import BinanceAPIException
+
+from core.rate_limiter import REQUEST_WEIGHTS, request_weight, ThreadResponse
+
+logging.basicConfig(
+    filename='bot.log',
+    level=logging.WARNING,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+MOCK_TAKER_FEE = 0.0004
+MOCK_WEIGHT_LIMIT = int(os.getenv("BINANCE_MOCK_WEIGHT_LIMIT", 2400))
+MOCK_LATENCY = float(os.getenv("BINANCE_MOCK_LATENCY", 0))  # Latence simulée par appel (secondes)
+
+INTERVAL_MS = {
+    "1m": 60_000, "3m": 180_000, "5m": 300_000, "15m": 900_000,
+    "30m": 1_800_000, "1h": 3_600_000, "4h": 14_400_000, "1d": 86_400_000,
+}
+
+# Paramètres des symboles simulés (proches de ceux de Binance)
+DEFAULT_SYMBOLS = {
+    "ALGOUSDT": {"tick_size": "0.0001", "step_size": "0.1", "min_qty": "0.1", "max_qty": "10000000", "min_notional": "5"},
+    "BTCUSDT": {"tick_size": "0.10", "step_size": "0.001", "min_qty": "0.001", "max_qty": "1000", "min_notional": "100"},
+}
+
+
+class MockAPIError(BinanceAPIException):
+    """
+    Erreur au format de python-binance : str(e) == "APIError(code=-2011): ...", e.code, e.status_code.
+    """
+
+    def __init__(self, code: int, message: str, status_code: int = 400):
+        super().__init__(None, status_code, json.dumps({"code": code, "msg": message}))
+
+
+def _on_step(value: float, step: float) -> bool:
+    ratio = value / step
+    return abs(ratio - round(ratio)) < 1e-6
+
+
+class MockClient:
+    """
+    Client Binance Futures simulé (mode de position unique, une seule position par symbole).
+    """
+    is_mock = True
+    response = ThreadResponse()  # Dernière réponse simulée, propre à chaque thread
+
+    def __init__(self, klines, symbol: str = "ALGOUSDT", interval: str = "5m", start_index: int = 100,
+                 balance: float = 1000.0, leverage: int = 10, latency: float = MOCK_LATENCY,
+                 weight_limit: int = MOCK_WEIGHT_LIMIT, symbols: dict = None):
+        self.klines = klines
+        self.symbol = symbol
+        self.interval = interval
+        self.interval_ms = INTERVAL_MS[interval]
+        self.cursor = min(start_index, len(klines) - 1)
+        self.latency = latency
+        self.weight_limit = weight_limit
+        self.symbols = symbols or DEFAULT_SYMBOLS
+        self.wallet = float(balance)
+        self.leverage = {name: leverage for name in self.symbols}
+        self.positions = {name: {"amt": 0.0, "entry": 0.0} for name in self.symbols}
+        self.orders = {}  # orderId -> ordre ouvert (format REST)
+        self.fills = []
+        self.calls = {}
+        self.response = SimpleNamespace(status_code=200, headers={})
+        self._price_override = None
+        self._order_ids = itertools.count(1)
+        self._weight_minute = None
+        self._weight_used = {"futures": 0, "spot": 0}
+        self._lock = threading.RLock()
+        self._replay_thread = None
+        self._replay_stop = threading.Event()
+
+    # === Horloge et prix ===
+    def _shift(self) -> int:
+        # Décalage qui place la bougie courante à l'heure actuelle
+        now_ms = int(time.time() * 1000)
+        return now_ms // self.interval_ms * self.interval_ms - int(self.klines.open_time[self.cursor])
+
+    def price(self, symbol: str = None) -> float:
+        # Prix rejoué arrondi au tickSize, comme un prix d'exécution Binance
+        price = self._price_override if self._price_override is not None else float(self.klines.close[self.cursor])
+        tick = float(self.symbols.get(symbol or self.symbol, self.symbols[self.symbol])["tick_size"])
+        return round(round(price / tick) * tick, 10)
+
+    def set_price(self, price: float):
+        """
+        Fixe le prix courant (jusqu'au prochain advance) et déclenche les ordres SL/TP concernés.
+        """
+        with self._lock:
+            self._price_override = float(price)
+            self._trigger_orders(price, price, price)
+
+    def advance(self, candles: int = 1) -> float:
+        """
+        Avance le rejeu d'une ou plusieurs bougies ; chaque bougie traversée (haut/bas) peut déclencher SL/TP.
+        Retourne le nouveau prix.
+        """
+        with self._lock:
+            self._price_override = None
+            for _ in range(candles):
+                if self.cursor >= len(self.klines) - 1:
+                    break
+                self.cursor += 1
+                k = self.klines
+                i = self.cursor
+                self._trigger_orders(float(k.open[i]), float(k.high[i]), float(k.low[i]))
+            return self.price()
+
+    def start_replay(self, seconds_per_candle: float):
+        """
+        Rejeu automatique en arrière-plan (essais de charge sur la durée).
+        """
+        if self._replay_thread and self._replay_thread.is_alive():
+            return self._replay_thread
+        self._replay_stop.clear()
+
+        def loop():
+            while not self._replay_stop.wait(seconds_per_candle) and self.cursor < len(self.klines) - 1:
+                self.advance()
+
+        self._replay_thread = threading.Thread(target=loop, name="mock-replay", daemon=True)
+        self._replay_thread.start()
+        return self._replay_thread
+
+    def stop_replay(self):
+        self._replay_stop.set()
+
+    # === Comptage des appels, poids et latence ===
+    def _request(self, name: str, weight: int = None):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+            minute = int(time.time() // 60)
+            if minute != self._weight_minute:
+                self._weight_minute = minute
+                self._weight_used = {"futures": 0, "spot": 0}
+            api = "futures" if name.startswith("futures_") else "spot"  # Budgets séparés, comme Binance
+            self._weight_used[api] += REQUEST_WEIGHTS.get(name, 1) if weight is None else weight
+            self.response = SimpleNamespace(
+                status_code=200, headers={"X-MBX-USED-WEIGHT-1M": str(self._weight_used[api])}
+            )
+            if self.weight_limit and self._weight_used[api] > self.weight_limit:
+                self.response.status_code = 429
+                raise MockAPIError(-1003, "Too many requests; current limit is %d request weight per 1 MINUTE." % self.weight_limit, 429)
+
+    @property
+    def used_weight(self) -> int:
+        return self._weight_used["futures"]
+
+    # === Données de marché ===
+    def _kline_row(self, i: int, shift: int) -> list:
+        k = self.klines
+        open_time = int(k.open_time[i]) + shift
+        close = self.price() if i == self.cursor else float(k.close[i])
+        high = max(float(k.high[i]), close) if i == self.cursor else float(k.high[i])
+        low = min(float(k.low[i]), close) if i == self.cursor else float(k.low[i])
+        volume = float(k.volume[i])
+        return [
+            open_time, str(float(k.open[i])), str(high), str(low), str(close), str(volume),
+            open_time + self.interval_ms - 1, str(volume * close), 0, "0", "0", "0",
+        ]
+
+    def get_klines(self, symbol: str = None, interval: str = None, limit: int = 500, **kwargs):
+        self._request("get_klines", request_weight("get_klines", {"limit": limit}))
+        if interval is not None and interval != self.interval:
+            raise MockAPIError(-1120, f"Intervalle non simulé : {interval} (rejeu en {self.interval})")
+        with self._lock:
+            shift = self._shift()
+            start = max(0, self.cursor - limit + 1)
+            return [self._kline_row(i, shift) for i in range(start, self.cursor + 1)]
+
+    futures_klines = get_klines
+
+    def futures_mark_price(self, symbol: str = None, **kwargs):
+        self._request("futures_mark_price")
+        return {"symbol": symbol or self.symbol, "markPrice": str(self.price()), "time": int(time.time() * 1000)}
+
+    def get_symbol_ticker(self, symbol: str = None, **kwargs):
+        self._request("get_symbol_ticker")
+        return {"symbol": symbol or self.symbol, "price": str(self.price())}
+
+    futures_symbol_ticker = get_symbol_ticker
+
+    def get_server_time(self):
+        self._request("get_server_time")
+        return {"serverTime": int(time.time() * 1000)}
+
+    def futures_exchange_info(self):
+        self._request("futures_exchange_info")
+        symbols = []
+        for name, f in self.symbols.items():
+            symbols.append({
+                "symbol": name,
+                "status": "TRADING",
+                "filters": [
+                    {"filterType": "PRICE_FILTER", "tickSize": f["tick_size"], "minPrice": f["tick_size"], "maxPrice": "1000000"},
+                    {"filterType": "LOT_SIZE", "stepSize": f["step_size"], "minQty": f["min_qty"], "maxQty": f["max_qty"]},
+                    {"filterType": "MARKET_LOT_SIZE", "stepSize": f["step_size"], "minQty": f["min_qty"], "maxQty": f["max_qty"]},
+                    {"filterType": "MIN_NOTIONAL", "notional": f["min_notional"]},
+                ],
+            })
+        return {"timezone": "UTC", "serverTime": int(time.time() * 1000), "symbols": symbols}
+
+    # === Compte ===
+    def _position_row(self, symbol: str) -> dict:
+        pos = self.positions[symbol]
+        mark = self.price(symbol)
+        unrealized = pos["amt"] * (mark - pos["entry"])
+        return {
+            "symbol": symbol,
+            "positionAmt": str(pos["amt"]),
+            "entryPrice": str(pos["entry"]),
+            "markPrice": str(mark),
+            "unRealizedProfit": str(unrealized),
+            "leverage": str(self.leverage[symbol]),
+            "positionSide": "BOTH",
+            "updateTime": int(time.time() * 1000),
+        }
+
+    def _margin_used(self) -> float:
+        return sum(abs(p["amt"]) * p["entry"] / self.leverage[s] for s, p in self.positions.items())
+
+    def _unrealized(self) -> float:
+        return sum(p["amt"] * (self.price(s) - p["entry"]) for s, p in self.positions.items())
+
+    def _available(self) -> float:
+        return self.wallet - self._margin_used() + min(0.0, self._unrealized())
+
+    def futures_position_information(self, symbol: str = None, **kwargs):
+        self._request("futures_position_information")
+        with self._lock:
+            names = [symbol] if symbol else list(self.positions)
+            return [self._position_row(name) for name in names]
+
+    def futures_account_balance(self, **kwargs):
+        self._request("futures_account_balance")
+        with self._lock:
+            return [{
+                "asset": "USDT",
+                "balance": str(self.wallet),
+                "crossWalletBalance": str(self.wallet),
+                "crossUnPnl": str(self._unrealized()),
+                "availableBalance": str(self._available()),
+            }]
+
+    def futures_account(self, **kwargs):
+        self._request("futures_account")
+        with self._lock:
+            return {
+                "canTrade": True,
+                "totalWalletBalance": str(self.wallet),
+                "totalUnrealizedProfit": str(self._unrealized()),
+                "availableBalance": str(self._available()),
+                "assets": [{"asset": "USDT", "walletBalance": str(self.wallet), "availableBalance": str(self._available())}],
+                "positions": [
+                    {**self._position_row(name), "initialLeverage": str(self.leverage[name])}
+                    for name in self.positions
+                ],
+            }
+
+    def futures_change_leverage(self, symbol: str, leverage: int, **kwargs):
+        self._request("futures_change_leverage")
+        leverage = int(leverage)
+        if not 1 <= leverage <= 125:
+            raise MockAPIError(-4028, "Leverage is not valid")
+        with self._lock:
+            self._check_symbol(symbol)
+            self.leverage[symbol] = leverage
+        return {"symbol": symbol, "leverage": leverage, "maxNotionalValue": "1000000"}
+
+    def futures_leverage_bracket(self, symbol: str = None, **kwargs):
+        self._request("futures_leverage_bracket")
+        names = [symbol] if symbol else list(self.symbols)
+        return [{"symbol": name, "brackets": [{"bracket": 1, "initialLeverage": 125, "notionalCap": 1000000,
+                                               "notionalFloor": 0, "maintMarginRatio": 0.005}]} for name in names]
+
+    def futures_stream_get_listen_key(self):
+        self._request("futures_stream_get_listen_key")
+        return "mock-listen-key"
+
+    def futures_stream_keepalive(self, listenKey: str = None):
+        self._request("futures_stream_keepalive")
+        return {}
+
+    # === Ordres ===
+    def _check_symbol(self, symbol):
+        if symbol not in self.symbols:
+            raise MockAPIError(-1121, "Invalid symbol.")
+
+    def _validate(self, symbol, order_type, quantity, stop_price, close_position):
+        f = self.symbols[symbol]
+        if order_type == "MARKET":
+            qty = float(quantity)
+            if not _on_step(qty, float(f["step_size"])):
+                raise MockAPIError(-1111, "Precision is over the maximum defined for this asset.")
+            if qty < float(f["min_qty"]) or qty > float(f["max_qty"]):
+                raise MockAPIError(-4005 if qty > float(f["max_qty"]) else -4003, "Quantity out of bounds.")
+            if qty * self.price(symbol) < float(f["min_notional"]):
+                raise MockAPIError(-4164, f"Order's notional must be no smaller than {f['min_notional']} (unless you choose reduce only).")
+        elif order_type in ("STOP_MARKET", "TAKE_PROFIT_MARKET"):
+            if stop_price is None:
+                raise MockAPIError(-1102, "Mandatory parameter 'stopPrice' was not sent, was empty/null, or malformed.")
+            if not _on_step(float(stop_price), float(f["tick_size"])):
+                raise MockAPIError(-1111, "Precision is over the maximum defined for this asset.")
+            if not close_position and quantity is None:
+                raise MockAPIError(-1102, "Mandatory parameter 'quantity' was not sent, was empty/null, or malformed.")
+        else:
+            raise MockAPIError(-1116, "Invalid orderType.")
+
+    def _would_trigger(self, side, order_type, stop_price, price) -> bool:
+        # SELL STOP sous le prix / SELL TP au-dessus (l'inverse pour BUY)
+        if order_type == "STOP_MARKET":
+            return price <= stop_price if side == "SELL" else price >= stop_price
+        return price >= stop_price if side == "SELL" else price <= stop_price
+
+    def _fill(self, symbol, side, qty, price, order_id, reduce_only=False):
+        # Exécution au prix donné : mise à jour position, PnL réalisé et frais
+        pos = self.positions[symbol]
+        signed = qty if side == "BUY" else -qty
+        reducing = pos["amt"] * signed < 0
+        if reduce_only:
+            # reduceOnly / closePosition : jamais au-delà de la position existante
+            signed = (min(qty, abs(pos["amt"])) if reducing else 0.0) * (1 if side == "BUY" else -1)
+        closing = min(abs(signed), abs(pos["amt"])) if reducing else 0.0
+        realized = 0.0
+        if closing:
+            direction = 1.0 if pos["amt"] > 0 else -1.0
+            realized = closing * (price - pos["entry"]) * direction
+        new_amt = round(pos["amt"] + signed, 12)
+        if new_amt == 0:
+            pos["entry"] = 0.0
+        elif pos["amt"] == 0 or pos["amt"] * new_amt < 0:
+            pos["entry"] = price  # Ouverture ou retournement
+        elif abs(new_amt) > abs(pos["amt"]):
+            pos["entry"] = (pos["entry"] * abs(pos["amt"]) + price * abs(signed)) / abs(new_amt)
+        pos["amt"] = new_amt
+        fee = abs(signed) * price * MOCK_TAKER_FEE
+        self.wallet += realized - fee
+        self.fills.append({
+            "symbol": symbol, "orderId": order_id, "side": side, "qty": abs(signed), "price": price,
+            "realizedPnl": realized, "commission": fee, "time": int(time.time() * 1000),
+        })
+        if pos["amt"] == 0:
+            self._expire_close_orders(symbol)
+        return abs(signed)
+
+    def _expire_close_orders(self, symbol):
+        # Position fermée : les ordres closePosition / reduceOnly restants n'ont plus d'objet
+        for order_id in [oid for oid, o in self.orders.items()
+                         if o["symbol"] == symbol and (o["closePosition"] or o["reduceOnly"])]:
+            self.orders.pop(order_id)["status"] = "EXPIRED"
+
+    def _trigger_orders(self, open_price, high, low):
+        # Ordres SL/TP atteints pendant la bougie : exécutés au prix de déclenchement (ou à l'ouverture si gap)
+        for order_id, order in sorted(self.orders.items()):
+            if order_id not in self.orders:
+                continue
+            stop = float(order["stopPrice"])
+            side = order["side"]
+            extreme = low if (order["type"] == "STOP_MARKET") == (side == "SELL") else high
+            if not self._would_trigger(side, order["type"], stop, extreme):
+                continue
+            fill_price = open_price if self._would_trigger(side, order["type"], stop, open_price) else stop
+            pos = self.positions[order["symbol"]]
+            qty = abs(pos["amt"]) if order["closePosition"] else float(order["origQty"])
+            del self.orders[order_id]
+            if qty > 0:
+                self._fill(order["symbol"], side, qty, fill_price, order_id,
+                           reduce_only=order["closePosition"] or order["reduceOnly"])
+                order["status"] = "FILLED"
+            else:
+                order["status"] = "EXPIRED"
+            logging.warning(f"🧪 [MOCK] {order['type']} {order_id} {order['status']} à {fill_price}")
+
+    def _place(self, symbol, side, type, quantity=None, stopPrice=None, closePosition=False,
+               reduceOnly=False, newOrderRespType=None, **kwargs):
+        self._check_symbol(symbol)
+        close_position = str(closePosition).lower() == "true"
+        reduce_only = str(reduceOnly).lower() == "true"
+        self._validate(symbol, type, quantity, stopPrice, close_position)
+        order_id = next(self._order_ids)
+        now_ms = int(time.time() * 1000)
+        order = {
+            "orderId": order_id,
+            "symbol": symbol,
+            "status": "NEW",
+            "clientOrderId": kwargs.get("newClientOrderId", f"mock_{order_id}"),
+            "price": "0",
+            "avgPrice": "0",
+            "origQty": str(quantity or 0),
+            "executedQty": "0",
+            "type": type,
+            "side": side,
+            "stopPrice": str(stopPrice or 0),
+            "closePosition": close_position,
+            "reduceOnly": reduce_only,
+            "timeInForce": kwargs.get("timeInForce", "GTC"),
+            "workingType": kwargs.get("workingType", "CONTRACT_PRICE"),
+            "updateTime": now_ms,
+        }
+        if type == "MARKET":
+            price = self.price(symbol)
+            executed = self._fill(symbol, side, float(quantity), price, order_id, reduce_only)
+            order.update(status="FILLED", avgPrice=str(price), executedQty=str(executed))
+            return order
+        if self._would_trigger(side, type, float(stopPrice), self.price(symbol)):
+            raise MockAPIError(-2021, "Order would immediately trigger.")
+        if close_position and any(o["symbol"] == symbol and o["side"] == side and o["type"] == type and o["closePosition"]
+                                  for o in self.orders.values()):
+            raise MockAPIError(-4130, "An open stop or take profit order with GTE and closePosition in the direction is existing.")
+        self.orders[order_id] = order
+        return dict(order)
+
+    def futures_create_order(self, **params):
+        self._request("futures_create_order")
+        with self._lock:
+            return self._place(**params)
+
+    def futures_place_batch_order(self, batchOrders: list, **kwargs):
+        self._request("futures_place_batch_order")
+        if len(batchOrders) > 5:
+            raise MockAPIError(-4033, "Maximum 5 orders per batch.")
+        results = []
+        with self._lock:
+            for params in batchOrders:
+                try:
+                    results.append(self._place(**params))
+                except BinanceAPIException as e:
+                    results.append({"code": e.code, "msg": e.message})
+        return results
+
+    def futures_cancel_order(self, symbol: str, orderId=None, **kwargs):
+        self._request("futures_cancel_order")
+        with self._lock:
+            order = self.orders.pop(int(orderId), None) if orderId is not None else None
+            if order is None:
+                raise MockAPIError(-2011, "Unknown order sent.")
+            order["status"] = "CANCELED"
+            return dict(order)
+
+    def futures_cancel_all_open_orders(self, symbol: str, **kwargs):
+        self._request("futures_cancel_order")
+        with self._lock:
+            for order_id in [oid for oid, o in self.orders.items() if o["symbol"] == symbol]:
+                self.orders.pop(order_id)["status"] = "CANCELED"
+        return {"code": 200, "msg": "The operation of cancel all open order is done."}
+
+    def futures_get_open_orders(self, symbol: str = None, **kwargs):
+        self._request("futures_get_open_orders", 1 if symbol else 40)
+        with self._lock:
+            return [dict(o) for o in self.orders.values() if symbol is None or o["symbol"] == symbol]
+
+    def futures_get_order(self, symbol: str, orderId=None, **kwargs):
+        self._request("futures_get_open_orders")
+        with self._lock:
+            order = self.orders.get(int(orderId))
+        if order is None:
+            raise MockAPIError(-2013, "Order does not exist.")
+        return dict(order)
+
+    # === Statistiques ===
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "calls": dict(self.calls),
+                "used_weight_1m": dict(self._weight_used),
+                "fills": len(self.fills),
+                "open_orders": len(self.orders),
+                "wallet": round(self.wallet, 6),
+                "cursor": self.cursor,
+            }
+
+
+def mock_client_from_env(source: str = None, symbol: str = None) -> MockClient:
+    """
+    MockClient configuré par les variables d'environnement :
+    BINANCE_MOCK=1 → bougies synthétiques, BINANCE_MOCK=<chemin> → bougies enregistrées.
+    BINANCE_MOCK_INTERVAL, BINANCE_MOCK_BALANCE, BINANCE_MOCK_SPEED (secondes par bougie, rejeu auto).
+    """
+    from backtest.data import load_klines, synthetic_klines  # Import local : pandas/numpy seulement en mode simulé
+    source = source or os.getenv("BINANCE_MOCK", "1")
+    symbol = symbol or os.getenv("SYMBOL", "ALGOUSDT")
+    interval = os.getenv("BINANCE_MOCK_INTERVAL", os.getenv("EMA_INTERVAL", "5m"))
+    if source in ("1", "true", "synthetic"):
+        klines = synthetic_klines(int(os.getenv("BINANCE_MOCK_CANDLES", 100_000)), interval=interval)
+    else:
+        klines = load_klines(source)
+    client = MockClient(klines, symbol=symbol, interval=interval,
+                        balance=float(os.getenv("BINANCE_MOCK_BALANCE", 1000)))
+    speed = float(os.getenv("BINANCE_MOCK_SPEED", 0))
+    if speed > 0:
+        client.start_replay(speed)
+    logging.warning(f"🧪 Client Binance simulé ({symbol} {interval}, {len(klines)} bougies)")
+    return client
@@ -1,14 +1,29 @@
 from telebot import TeleBot
 import os
+import time
+import atexit
+import itertools
+import threading
+from collections import deque
 from dotenv import load_dotenv
 import logging
 
+from core.metrics import metrics
+
+try:
+    from telebot.apihelper import ApiTelegramException
+except ImportError:
+    ApiTelegramException = Exception
+
 load_dotenv()
 
 TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
 CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
+# Messages écrits dans bot.log au lieu d'être envoyés (essais hors ligne, exchange simulé)
+TELEGRAM_DRY_RUN = os.getenv("TELEGRAM_DRY_RUN", "0") == "1"
+DRY_RUN_TOKEN = "0:dry-run"  # Jeton factice accepté par TeleBot, jamais utilisé pour un appel
 
-bot = TeleBot(TELEGRAM_TOKEN)
+bot = TeleBot(TELEGRAM_TOKEN or (DRY_RUN_TOKEN if TELEGRAM_DRY_RUN else None))
 
 logging.basicConfig(
     filename='bot.log',
@@ -16,14 +31,193 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
-def send_telegram(message):
+# === Priorités des notifications (plus petit = plus urgent) ===
+PRIORITY_TRADE = 0   # Ouverture/fermeture de position, SL/TP, erreurs d'ordre
+PRIORITY_NORMAL = 1  # Signaux, alertes diverses
+PRIORITY_LOW = 2     # Statistiques système, messages informatifs
+
+TELEGRAM_MAX_LENGTH = 4096
+NOTIFY_QUEUE_SIZE = int(os.getenv("NOTIFY_QUEUE_SIZE", 500))
+
+
+class _Pending:
+    __slots__ = ("priority", "seq", "text", "count")
+
+    def __init__(self, priority, seq, text):
+        self.priority = priority
+        self.seq = seq
+        self.text = text
+        self.count = 1
+
+
+class NotificationDispatcher:
+    """
+    File d'envoi Telegram traitée par un thread dédié : submit() ne fait aucun appel réseau.
+    - File bornée : une fois pleine, le message le moins prioritaire est abandonné.
+    - Un message identique déjà en attente n'est pas dupliqué (compteur "(xN)").
+    - Les messages en attente pour un même chat sont regroupés en un seul envoi.
+    - Limites Telegram respectées : 1 message/s par chat, 30 messages/s au total.
+    """
+
+    def __init__(self, sender, max_queue: int = NOTIFY_QUEUE_SIZE, per_chat_interval: float = 1.0, global_rate: int = 30):
+        self._sender = sender
+        self.max_queue = max_queue
+        self.per_chat_interval = per_chat_interval
+        self.global_rate = global_rate
+        self._pending = {}  # chat_id -> {texte: _Pending}
+        self._size = 0
+        self._inflight = 0
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._ready_at = {}  # chat_id -> heure à partir de laquelle un envoi est permis
+        self._recent = deque()  # heures des derniers envois (fenêtre d'une seconde)
+        self._thread = None
+        self.sent = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.errors = 0
+
+    # === Dépôt d'un message (retour immédiat) ===
+    def submit(self, chat_id, text: str, priority: int = PRIORITY_NORMAL) -> bool:
+        with self._cond:
+            chat = self._pending.setdefault(chat_id, {})
+            item = chat.get(text)
+            if item is not None:
+                item.count += 1
+                item.priority = min(item.priority, priority)
+                self.coalesced += 1
+                return True
+            if self._size >= self.max_queue and not self._evict(priority):
+                self.dropped += 1
+                return False
+            chat[text] = _Pending(priority, next(self._seq), text)
+            self._size += 1
+            self._cond.notify_all()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="telegram-dispatcher", daemon=True)
+                self._thread.start()
+        return True
+
+    def _evict(self, priority) -> bool:
+        # Retire le message le moins prioritaire (le plus récent à priorité égale),
+        # seulement s'il est moins urgent que le nouveau
+        worst_chat, worst = None, None
+        for chat_id, items in self._pending.items():
+            for item in items.values():
+                if worst is None or (item.priority, item.seq) > (worst.priority, worst.seq):
+                    worst_chat, worst = chat_id, item
+        if worst is None or worst.priority <= priority:
+            return False
+        del self._pending[worst_chat][worst.text]
+        self._size -= 1
+        self.dropped += 1
+        return True
+
+    # === Boucle d'envoi ===
+    def _next_chat(self, now):
+        while self._recent and now - self._recent[0] >= 1.0:
+            self._recent.popleft()
+        global_ready = self._recent[0] + 1.0 if len(self._recent) >= self.global_rate else now
+        best = None
+        for chat_id, items in self._pending.items():
+            if not items:
+                continue
+            ready = max(self._ready_at.get(chat_id, 0.0), global_ready)
+            urgency = min(item.priority for item in items.values())
+            key = (ready, urgency)
+            if best is None or key < best[0]:
+                best = (key, chat_id)
+        return best[1], best[0][0] - now
+
+    def _take_batch(self, chat_id) -> str:
+        items = sorted(self._pending[chat_id].values(), key=lambda i: (i.priority, i.seq))
+        parts, length = [], 0
+        for item in items:
+            text = item.text if item.count == 1 else f"{item.text} (x{item.count})"
+            if parts and length + len(text) + 2 > TELEGRAM_MAX_LENGTH:
+                break
+            parts.append(text[:TELEGRAM_MAX_LENGTH])
+            length += len(text) + 2
+            del self._pending[chat_id][item.text]
+            self._size -= 1
+        return "\n\n".join(parts), items[0].priority
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._size == 0:
+                    self._cond.wait()
+                chat_id, wait = self._next_chat(time.time())
+                if wait > 0:
+                    self._cond.wait(wait)
+                    continue
+                text, priority = self._take_batch(chat_id)
+                self._inflight += 1
+                now = time.time()
+                self._ready_at[chat_id] = now + self.per_chat_interval
+                self._recent.append(now)
+            try:
+                with metrics.timer("telegram_send_ms"):
+                    self._sender(chat_id, text)
+                self.sent += 1
+            except ApiTelegramException as e:
+                self.errors += 1
+                metrics.inc("telegram_errors_total", code=getattr(e, "error_code", None))
+                retry_after = (getattr(e, "result_json", None) or {}).get("parameters", {}).get("retry_after")
+                if getattr(e, "error_code", None) == 429 and retry_after:
+                    # Trop de requêtes : on remet le message en file et on respecte le délai imposé
+                    with self._cond:
+                        self._ready_at[chat_id] = time.time() + float(retry_after)
+                    self.submit(chat_id, text, priority)
+                else:
+                    logging.error(f"Erreur Telegram : {e}")
+            except Exception as e:
+                self.errors += 1
+                metrics.inc("telegram_errors_total", code="network")
+                logging.error(f"Erreur Telegram : {e}")
+            finally:
+                with self._cond:
+                    self._inflight -= 1
+                    self._cond.notify_all()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        Attend que la file soit vide (utile avant l'arrêt du programme).
+        """
+        with self._cond:
+            return self._cond.wait_for(lambda: self._size == 0 and self._inflight == 0, timeout=timeout)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "queued": self._size,
+                "sent": self.sent,
+                "coalesced": self.coalesced,
+                "dropped": self.dropped,
+                "errors": self.errors,
+            }
+
+
+def _send(chat_id, text):
+    if TELEGRAM_DRY_RUN:
+        logging.warning(f"📨 [DRY-RUN] {chat_id} : {text}")
+        return
+    bot.send_message(chat_id, text)
+
+# ✅ Instance globale unique
+dispatcher = NotificationDispatcher(_send)
+
+def send_telegram(message, priority: int = PRIORITY_NORMAL):
     """
-    Envoie un message Telegram à ton chat configuré
+    Envoie un message Telegram à ton chat configuré (mis en file, retour immédiat)
     """
-    if TELEGRAM_TOKEN and CHAT_ID:
-        try:
-            bot.send_message(CHAT_ID, message)
-        except Exception as e:
-            logging.error(f"Erreur Telegram : {e}")
+    if (TELEGRAM_TOKEN or TELEGRAM_DRY_RUN) and CHAT_ID:
+        dispatcher.submit(CHAT_ID, str(message), priority)
     else:
         logging.warning("⚠️ Token ou Chat ID manquant dans le fichier .env")
+
+def flush_telegram(timeout: float = 5.0) -> bool:
+    return dispatcher.flush(timeout)
+
+# Les derniers messages (ex : arrêt du bot) partent avant la sortie du programme
+atexit.register(flush_telegram)
@@ -0,0 +1,178 @@
+"""
+Module : order_manager.py
+But : Ordres de protection (SL/TP) du bot suivis en mémoire et remplacés sans aller-retour inutile.
+      - Chaque ordre posé par le bot est enregistré par rôle (SL initial, SL du trailing, TP) :
+        plus besoin de lister les ordres ouverts pour retrouver celui à remplacer.
+      - Remplacement : pose du nouvel ordre et annulation de l'ancien envoyées en parallèle
+        (un seul aller-retour), avec retour arrière si l'un des deux échoue.
+      - Les ordres de remplacement sont reduceOnly avec quantité : Binance refuse un second
+        ordre closePosition dans le même sens (-4130) tant que l'ancien n'est pas annulé.
+        Sans quantité connue : annulation puis création closePosition, l'une après l'autre.
+"""
+
+import threading
+import logging
+from collections import namedtuple
+
+from core.binance_client import client
+from core.rate_limiter import request_priority, REQUEST_ORDER
+from core.symbol_info import get_quantizer
+from core.user_stream import get_open_orders
+from core.async_gateway import gateway
+
+logging.basicConfig(
+    filename='bot.log',
+    level=logging.WARNING,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+# === Rôles des ordres suivis ===
+ROLE_SL = "sl"                    # SL initial : plancher, jamais remplacé par le trailing
+ROLE_TRAILING_SL = "trailing_sl"  # SL remonté par le trailing
+ROLE_TP = "tp"                    # TP initial, puis TP déplacé par le trailing
+
+ROLE_TYPES = {ROLE_SL: "STOP_MARKET", ROLE_TRAILING_SL: "STOP_MARKET", ROLE_TP: "TAKE_PROFIT_MARKET"}
+
+TrackedOrder = namedtuple("TrackedOrder", ["order_id", "symbol", "role", "side", "type", "stop_price", "quantity"])
+
+
+def _is_unknown_order(error) -> bool:
+    # -2011 : ordre déjà exécuté, annulé ou expiré
+    return getattr(error, "code", None) == -2011 or "code=-2011" in str(error)
+
+
+class OrderManager:
+    """
+    Registre (symbole, rôle) → ordre ouvert posé par le bot.
+    """
+
+    def __init__(self):
+        self._orders = {}
+        self._lock = threading.Lock()
+        self.replaced = 0
+        self.rollbacks = 0
+
+    # === Registre ===
+    def track(self, trade_symbol: str, role: str, order: dict) -> TrackedOrder:
+        """
+        Enregistre un ordre à partir de la réponse Binance (ou d'une ligne d'ordres ouverts).
+        """
+        quantity = None if order.get("closePosition") in (True, "true") else float(order.get("origQty") or 0) or None
+        tracked = TrackedOrder(int(order["orderId"]), trade_symbol, role, order["side"], order["type"],
+                               float(order["stopPrice"]), quantity)
+        with self._lock:
+            self._orders[(trade_symbol, role)] = tracked
+        return tracked
+
+    def get(self, trade_symbol: str, role: str):
+        with self._lock:
+            return self._orders.get((trade_symbol, role))
+
+    def forget(self, trade_symbol: str, role: str):
+        with self._lock:
+            return self._orders.pop((trade_symbol, role), None)
+
+    def reset(self, trade_symbol: str):
+        """
+        Nouvelle position : les ordres de la précédente ne sont plus suivis.
+        """
+        with self._lock:
+            for key in [k for k in self._orders if k[0] == trade_symbol]:
+                del self._orders[key]
+
+    def adopt(self, trade_symbol: str, role: str, side: str):
+        """
+        Dernier recours (redémarrage, ordre posé à la main) : reprend l'ordre ouvert du bon type et du bon sens.
+        """
+        order_type = ROLE_TYPES[role]
+        for o in get_open_orders(trade_symbol):
+            if o["type"] == order_type and o["side"] == side:
+                return self.track(trade_symbol, role, o)
+        return None
+
+    # === Remplacement ===
+    def _create(self, trade_symbol, side, order_type, stop_price, quantity):
+        params = {"symbol": trade_symbol, "side": side, "type": order_type, "stopPrice": stop_price,
+                  "timeInForce": "GTC"}
+        if quantity:
+            params.update(quantity=get_quantizer(trade_symbol).format(quantity), reduceOnly="true")
+        else:
+            params["closePosition"] = True
+        with request_priority(REQUEST_ORDER):
+            return client.futures_create_order(**params)
+
+    def _cancel(self, tracked: TrackedOrder):
+        with request_priority(REQUEST_ORDER):
+            return client.futures_cancel_order(symbol=tracked.symbol, orderId=tracked.order_id)
+
+    def replace(self, trade_symbol: str, role: str, side: str, stop_price: float, quantity: float = None) -> TrackedOrder:
+        """
+        Remplace l'ordre du rôle par un nouveau stopPrice et retourne le nouvel ordre suivi.
+        Lève l'erreur Binance si le remplacement échoue ; l'ancien ordre est alors rétabli.
+        """
+        order_type = ROLE_TYPES[role]
+        old = self.get(trade_symbol, role)
+        if old is None and role == ROLE_TP:
+            # Un TP plus proche laissé en place serait exécuté avant le nouveau
+            old = self.adopt(trade_symbol, role, side)
+
+        if old is None:
+            return self.track(trade_symbol, role, self._create(trade_symbol, side, order_type, stop_price, quantity))
+
+        if not quantity:
+            # closePosition : l'ancien doit disparaître avant que Binance accepte le nouveau (-4130)
+            try:
+                self._cancel(old)
+            except Exception as e:
+                if not _is_unknown_order(e):
+                    raise
+            self.forget(trade_symbol, role)
+            return self.track(trade_symbol, role, self._create(trade_symbol, side, order_type, stop_price, None))
+
+        # Pose et annulation en parallèle : un seul aller-retour réseau
+        create_future = gateway.submit(self._create, trade_symbol, side, order_type, stop_price, quantity)
+        cancel_future = gateway.submit(self._cancel, old)
+        create_error = cancel_error = None
+        try:
+            created = create_future.result()
+        except Exception as e:
+            create_error = e
+        try:
+            cancel_future.result()
+        except Exception as e:
+            if not _is_unknown_order(e):
+                cancel_error = e
+
+        if create_error is None and cancel_error is None:
+            self.replaced += 1
+            return self.track(trade_symbol, role, created)
+
+        self.rollbacks += 1
+        if create_error is None:
+            # Ancien ordre toujours actif : on retire le nouveau pour ne pas doubler la protection
+            try:
+                self._cancel(TrackedOrder(int(created["orderId"]), trade_symbol, role, side, order_type, stop_price, quantity))
+            except Exception as e:
+                logging.error(f"❌ Retour arrière : annulation du nouvel ordre {created['orderId']} échouée : {e}")
+            raise cancel_error
+
+        if cancel_future.exception() is None:
+            # Ancien ordre annulé mais nouveau refusé : l'ancien est reposé à l'identique
+            try:
+                self.track(trade_symbol, role, self._create(trade_symbol, old.side, old.type, old.stop_price, old.quantity))
+                logging.warning(f"↩️ Ordre {role} rétabli à {old.stop_price}$ après refus du remplacement")
+            except Exception as e:
+                self.forget(trade_symbol, role)
+                logging.error(f"❌ Retour arrière : ordre {role} à {old.stop_price}$ non rétabli : {e}")
+        elif _is_unknown_order(cancel_future.exception()):
+            self.forget(trade_symbol, role)  # L'ancien n'existait déjà plus
+        raise create_error
+
+    def stats(self) -> dict:
+        with self._lock:
+            tracked = {f"{s}:{r}": o.order_id for (s, r), o in self._orders.items()}
+        return {"tracked": tracked, "replaced": self.replaced, "rollbacks": self.rollbacks}
+
+
+# ✅ Instance globale unique
+order_manager = OrderManager()
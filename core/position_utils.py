@@ -22,15 +22,16 @@ logging.basicConfig(
 # Lock pour éviter les conflits d'accès concurrentiels
 position_lock = Lock()
 
-def sync_position():
+def sync_position(fresh: bool = False):
     """
     Synchronise l'état local avec la position réelle sur Binance.
     Met à jour state.position_open en fonction de l'info Binance.
+    fresh=True : lecture REST même si le flux user-data est connecté.
     Gère les erreurs réseau/API.
     """
     try:
         with position_lock:
-            pos_open = check_position_open(symbol=symbol)
+            pos_open = check_position_open(symbol=symbol, fresh=fresh)
             state.position_open = pos_open
     except Exception as e:
         logging.error(f"Erreur : {e}", exc_info=True)
@@ -0,0 +1,365 @@
+"""
+Module : rate_limiter.py
+But : Budget de poids des requêtes REST Binance, partagé par toutes les boucles.
+      - Poids compté localement à chaque appel et recalé sur les en-têtes
+        X-MBX-USED-WEIGHT-1M / X-MBX-ORDER-COUNT-* renvoyés par Binance.
+      - Priorités : les ordres disposent de tout le budget (et des limites d'ordres
+        Binance) ; les lectures courantes attendent la minute suivante au-delà de
+        90% du budget, la télémétrie dès 70%.
+      - 429 / 418 : toutes les requêtes sont suspendues jusqu'à la fin du délai imposé.
+      - Budgets séparés spot (get_klines, get_symbol_ticker) et futures (futures_*).
+      Le client renvoyé par get_client() est enveloppé par ThrottledClient.
+"""
+
+import os
+import re
+import time
+import threading
+import logging
+from contextlib import contextmanager
+
+from binance.exceptions import BinanceAPIException
+
+from core.metrics import metrics
+
+logging.basicConfig(
+    filename='bot.log',
+    level=logging.WARNING,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+# === Priorités des requêtes (plus petit = plus urgent) ===
+REQUEST_ORDER = 0   # Ordres et lectures faites pendant un trade
+REQUEST_NORMAL = 1  # Prix, bougies, position, ordres ouverts
+REQUEST_LOW = 2     # Télémétrie : compte, solde, paliers de levier, heure serveur
+
+FUTURES_WEIGHT_LIMIT = int(os.getenv("BINANCE_WEIGHT_LIMIT", 2400))
+SPOT_WEIGHT_LIMIT = int(os.getenv("BINANCE_SPOT_WEIGHT_LIMIT", 6000))
+ORDER_LIMIT_10S = int(os.getenv("BINANCE_ORDER_LIMIT_10S", 300))
+ORDER_LIMIT_1M = int(os.getenv("BINANCE_ORDER_LIMIT_1M", 1200))
+
+# Part du budget au-delà de laquelle une requête de cette priorité est différée
+PRIORITY_THRESHOLDS = {REQUEST_ORDER: 1.0, REQUEST_NORMAL: 0.9, REQUEST_LOW: 0.7}
+
+# Poids des requêtes (documentation Binance)
+REQUEST_WEIGHTS = {
+    "futures_exchange_info": 1,
+    "futures_mark_price": 1,
+    "get_symbol_ticker": 2,
+    "get_server_time": 1,
+    "futures_position_information": 5,
+    "futures_get_open_orders": 1,
+    "futures_get_order": 1,
+    "futures_account": 5,
+    "futures_account_balance": 5,
+    "futures_create_order": 1,
+    "futures_place_batch_order": 5,
+    "futures_cancel_order": 1,
+    "futures_cancel_all_open_orders": 1,
+    "futures_change_leverage": 1,
+    "futures_leverage_bracket": 1,
+    "futures_stream_get_listen_key": 1,
+    "futures_stream_keepalive": 1,
+}
+
+ORDER_METHODS = {
+    "futures_create_order",
+    "futures_place_batch_order",
+    "futures_cancel_order",
+    "futures_cancel_all_open_orders",
+}
+
+DEFAULT_PRIORITIES = {
+    **{name: REQUEST_ORDER for name in ORDER_METHODS},
+    "futures_change_leverage": REQUEST_ORDER,
+    "futures_account": REQUEST_LOW,
+    "futures_account_balance": REQUEST_LOW,
+    "futures_leverage_bracket": REQUEST_LOW,
+    "futures_exchange_info": REQUEST_LOW,
+    "futures_stream_keepalive": REQUEST_LOW,
+    "get_server_time": REQUEST_LOW,
+}
+
+def klines_weight(limit: int) -> int:
+    if limit < 100:
+        return 1
+    if limit < 500:
+        return 2
+    if limit <= 1000:
+        return 5
+    return 10
+
+def request_weight(name: str, kwargs: dict) -> int:
+    if name in ("get_klines", "futures_klines"):
+        return klines_weight(int(kwargs.get("limit", 500)))
+    if name == "futures_get_open_orders" and not kwargs.get("symbol"):
+        return 40
+    if name == "get_symbol_ticker" and not kwargs.get("symbol"):
+        return 4
+    return REQUEST_WEIGHTS.get(name, 1)
+
+
+class RateLimited(Exception):
+    """
+    Requête non envoyée : bannissement en cours ou budget épuisé au-delà du délai d'attente accepté.
+    """
+
+
+class ThreadResponse:
+    """
+    Attribut `response` d'un client (python-binance, MockClient) gardé par thread.
+    Le client est partagé : sans cela, les en-têtes relus après un appel pouvaient être ceux
+    de la requête d'un autre thread. Chaque thread relit ainsi la réponse de son propre appel.
+    """
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        return getattr(self._local(instance), "response", None)
+
+    def __set__(self, instance, value):
+        self._local(instance).response = value
+
+    @staticmethod
+    def _local(instance):
+        local = instance.__dict__.get("_thread_response")
+        if local is None:
+            local = instance.__dict__.setdefault("_thread_response", threading.local())
+        return local
+
+
+# === Priorité courante (par thread) ===
+_context = threading.local()
+
+@contextmanager
+def request_priority(priority: int):
+    """
+    Priorité des lectures faites dans le bloc (les ordres restent toujours prioritaires) :
+        with request_priority(REQUEST_ORDER):
+            ... lectures de position/prix pendant l'ouverture d'un trade
+        with request_priority(REQUEST_LOW):
+            ... surveillance de fond
+    Blocs imbriqués : le plus urgent l'emporte.
+    """
+    previous = getattr(_context, "priority", None)
+    _context.priority = priority if previous is None else min(previous, priority)
+    try:
+        yield
+    finally:
+        _context.priority = previous
+
+def current_priority(default: int) -> int:
+    priority = getattr(_context, "priority", None)
+    if priority is None or default == REQUEST_ORDER:
+        return default
+    return priority
+
+
+class WeightBudget:
+    """
+    Poids consommé dans la minute en cours (fenêtre calée sur l'horloge, comme Binance).
+    """
+
+    def __init__(self, name: str, limit: int):
+        self.name = name
+        self.limit = limit
+        self.used = 0
+        self._minute = int(time.time() // 60)
+
+    def roll(self, now: float):
+        minute = int(now // 60)
+        if minute != self._minute:
+            self._minute = minute
+            self.used = 0
+
+    def next_window(self, now: float) -> float:
+        return (int(now // 60) + 1) * 60 - now
+
+    @property
+    def ratio(self) -> float:
+        return self.used / self.limit if self.limit else 0.0
+
+
+class RateLimiter:
+    """
+    Point de passage unique des requêtes REST : attend, diffère ou laisse passer
+    selon le budget restant et la priorité.
+    """
+
+    def __init__(self, futures_limit: int = FUTURES_WEIGHT_LIMIT, spot_limit: int = SPOT_WEIGHT_LIMIT,
+                 order_limit_10s: int = ORDER_LIMIT_10S, order_limit_1m: int = ORDER_LIMIT_1M):
+        self.budgets = {"futures": WeightBudget("futures", futures_limit), "spot": WeightBudget("spot", spot_limit)}
+        self.order_limit_10s = order_limit_10s
+        self.order_limit_1m = order_limit_1m
+        self._orders = []  # heures des derniers ordres (fenêtre d'une minute)
+        self._order_count_1m = (0, 0)  # (minute, dernier en-tête X-MBX-ORDER-COUNT-1M)
+        self.banned_until = 0.0
+        self.ban_status = None
+        self.calls = {REQUEST_ORDER: 0, REQUEST_NORMAL: 0, REQUEST_LOW: 0}
+        self.deferred = 0
+        self.rejected = 0
+        self.rate_limited = 0
+        self._cond = threading.Condition()
+
+    @staticmethod
+    def api_of(name: str) -> str:
+        return "futures" if name.startswith("futures_") else "spot"
+
+    # === Avant la requête ===
+    def _orders_in(self, now, window):
+        return sum(1 for t in self._orders if now - t < window)
+
+    def _orders_count_1m(self, now):
+        minute, count = self._order_count_1m
+        return max(self._orders_in(now, 60), count if minute == int(now // 60) else 0)
+
+    def acquire(self, name: str, weight: int, priority: int, max_wait: float = 60.0):
+        """
+        Bloque jusqu'à ce que la requête puisse partir ; lève RateLimited si l'attente dépasserait max_wait.
+        """
+        budget = self.budgets[self.api_of(name)]
+        is_order = name in ORDER_METHODS
+        deadline = time.time() + max_wait
+        counted = False
+        with self._cond:
+            while True:
+                now = time.time()
+                budget.roll(now)
+                if self.banned_until > now:
+                    wait = self.banned_until - now
+                elif is_order and self._orders_in(now, 10) >= self.order_limit_10s:
+                    wait = 10.0 - (now - self._orders[-self.order_limit_10s])
+                elif is_order and self._orders_count_1m(now) >= self.order_limit_1m:
+                    wait = budget.next_window(now)
+                elif budget.used + weight <= budget.limit * PRIORITY_THRESHOLDS[priority]:
+                    break
+                else:
+                    wait = budget.next_window(now)
+                if now + wait > deadline:
+                    self.rejected += 1
+                    raise RateLimited(
+                        f"{name} non envoyée : {'bannissement ' + str(self.ban_status) if self.banned_until > now else 'budget'} "
+                        f"{budget.name} {budget.used}/{budget.limit}, attente {wait:.1f}s"
+                    )
+                if not counted:
+                    self.deferred += 1
+                    counted = True
+                self._cond.wait(max(wait, 0.01))
+            budget.used += weight
+            self.calls[priority] += 1
+            if is_order:
+                self._orders.append(now)
+                self._orders = [t for t in self._orders if now - t < 60]
+
+    # === Après la réponse ===
+    def update_from_headers(self, name: str, headers):
+        if not headers:
+            return
+        budget = self.budgets[self.api_of(name)]
+        with self._cond:
+            budget.roll(time.time())
+            used = headers.get("X-MBX-USED-WEIGHT-1M") or headers.get("x-mbx-used-weight-1m")
+            if used is not None:
+                # Valeur Binance = toute l'IP (autres scripts compris) : elle fait foi si plus haute
+                budget.used = max(budget.used, int(used))
+            orders = headers.get("X-MBX-ORDER-COUNT-1M") or headers.get("x-mbx-order-count-1m")
+            if orders is not None:
+                self._order_count_1m = (int(time.time() // 60), int(orders))
+
+    def on_rate_limited(self, status: int, retry_after: float = None, message: str = ""):
+        """
+        429 : trop de requêtes ; 418 : IP bannie. Suspend tout jusqu'à la fin du délai.
+        """
+        now = time.time()
+        if retry_after is None and status == 418:
+            banned = re.search(r"banned until (\d{13})", message or "")
+            if banned:
+                retry_after = int(banned.group(1)) / 1000 - now
+        if retry_after is None:
+            retry_after = self.budgets["futures"].next_window(now)
+        with self._cond:
+            self.rate_limited += 1
+            self.banned_until = max(self.banned_until, now + max(float(retry_after), 1.0))
+            self.ban_status = status
+            for budget in self.budgets.values():
+                budget.used = max(budget.used, budget.limit)
+        logging.error(f"⛔ Binance HTTP {status} : requêtes suspendues {retry_after:.0f}s")
+
+    # === Budget en direct ===
+    def snapshot(self) -> dict:
+        with self._cond:
+            now = time.time()
+            for budget in self.budgets.values():
+                budget.roll(now)
+            return {
+                **{f"{b.name}_weight": f"{b.used}/{b.limit}" for b in self.budgets.values()},
+                **{f"{b.name}_pct": round(b.ratio * 100, 1) for b in self.budgets.values()},
+                "orders_10s": self._orders_in(now, 10),
+                "orders_1m": self._orders_count_1m(now),
+                "banned_for_s": round(max(self.banned_until - now, 0.0), 1),
+                "calls_order": self.calls[REQUEST_ORDER],
+                "calls_normal": self.calls[REQUEST_NORMAL],
+                "calls_low": self.calls[REQUEST_LOW],
+                "deferred": self.deferred,
+                "rejected": self.rejected,
+                "rate_limited": self.rate_limited,
+            }
+
+
+class ThrottledClient:
+    """
+    Enveloppe d'un client Binance (python-binance ou MockClient) : chaque méthode passe par le RateLimiter.
+    Les autres attributs sont ceux du client d'origine.
+    """
+
+    def __init__(self, client, limiter: "RateLimiter"):
+        self._client = client
+        self._limiter = limiter
+        self._methods = {}
+
+    @property
+    def wrapped(self):
+        return self._client
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if not callable(attr) or name.startswith("_") or not (name.startswith("futures_") or name.startswith("get_")):
+            return attr
+        method = self._methods.get(name)
+        if method is None:
+            method = self._methods[name] = self._wrap(name, attr)
+        return method
+
+    def _wrap(self, name, func):
+        limiter = self._limiter
+        default_priority = DEFAULT_PRIORITIES.get(name, REQUEST_NORMAL)
+
+        def call(*args, **kwargs):
+            limiter.acquire(name, request_weight(name, kwargs), current_priority(default_priority))
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except BinanceAPIException as e:
+                metrics.inc("binance_errors_total", endpoint=name, code=e.code)
+                if e.status_code in (429, 418) or e.code == -1003:
+                    response = getattr(e, "response", None)
+                    retry_after = getattr(response, "headers", {}).get("Retry-After") if response is not None else None
+                    limiter.on_rate_limited(e.status_code, float(retry_after) if retry_after else None, str(e))
+                raise
+            except Exception:
+                metrics.inc("binance_errors_total", endpoint=name, code="network")
+                raise
+            finally:
+                # Durée de l'appel seul (attente du budget exclue)
+                metrics.observe("binance_request_ms", (time.perf_counter() - start) * 1000, endpoint=name)
+            # Réponse de cet appel : `response` est propre au thread (ThreadResponse)
+            response = getattr(self._client, "response", None)
+            limiter.update_from_headers(name, getattr(response, "headers", None))
+            return result
+
+        call.__name__ = name
+        return call
+
+
+# ✅ Instance globale unique
+rate_limiter = RateLimiter()
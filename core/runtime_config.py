@@ -0,0 +1,267 @@
+"""
+Module : runtime_config.py
+But : Paramètres modifiables à chaud (mode, levier, quantité, alertes de gains,
+      demandes d'arrêt et de fermeture manuelle) gardés en mémoire.
+      - Lecture = simple accès attribut, sans ouvrir de fichier.
+      - Écriture atomique (fichier temporaire + os.replace) depuis les handlers Telegram.
+      - Les modifications externes des fichiers sont détectées par watchdog (inotify)
+        si le paquet est installé, sinon par comparaison des mtime toutes les secondes.
+"""
+
+import os
+import threading
+import logging
+
+from core.config import (
+    default_leverage,
+    default_quantity_usdt,
+    BASE_DIR,
+    MODE_FILE,
+    LEVERAGE_FILE,
+    QUANTITY_FILE,
+    GAIN_ALERT_FILE,
+    MANUAL_CLOSE_FILE,
+    STOP_FILE,
+)
+from core.notifier import send_telegram
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+
+logging.basicConfig(
+    filename='bot.log',
+    level=logging.WARNING,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+POLL_INTERVAL = 1.0
+
+
+# === Conversion texte ↔ valeur (lève ValueError si invalide) ===
+def _parse_mode(text):
+    mode = text.strip().lower()
+    if mode not in ["auto", "alert"]:
+        raise ValueError(f"mode inconnu '{mode}'")
+    return mode
+
+def _parse_leverage(text):
+    lev = int(text.strip())
+    if lev < 1 or lev > 125:
+        raise ValueError("Levier hors limites (1-125)")
+    return lev
+
+def _parse_quantity(text):
+    qty = float(text.strip().replace(',', '.'))
+    if qty <= 0:
+        raise ValueError("Quantité invalide (<=0)")
+    return qty
+
+def _parse_switch(text):
+    return text.strip().lower() == "on"
+
+def _format_switch(value):
+    return "on" if value else "off"
+
+
+class _Field:
+    __slots__ = ("name", "path", "parse", "fmt", "default", "flag")
+
+    def __init__(self, name, path, parse=None, fmt=str, default=None, flag=False):
+        self.name = name
+        self.path = path
+        self.parse = parse
+        self.fmt = fmt
+        self.default = default
+        self.flag = flag  # Drapeau : seule la présence du fichier compte
+
+
+class RuntimeConfig:
+    """
+    Valeurs en mémoire, synchronisées avec leurs fichiers texte.
+    runtime_config.mode, .leverage, .quantity, .gain_alert, .stop_requested, .manual_close
+    """
+
+    def __init__(self, fields):
+        self._fields = {f.name: f for f in fields}
+        self._by_path = {os.path.normcase(f.path): f for f in fields}
+        self._values = {}
+        self._mtimes = {}
+        self._listeners = []
+        self._changed = threading.Condition()
+        self._observer = None
+        self._poll_thread = None
+        self._stop_event = threading.Event()
+        for field in fields:
+            self._load(field, notify=False)
+
+    # === Accès attribut ===
+    def __getattr__(self, name):
+        fields = self.__dict__.get("_fields", {})
+        if name in fields:
+            return self._values[name]
+        raise AttributeError(name)
+
+    def get(self, name):
+        return self._values[name]
+
+    # === Lecture d'un fichier ===
+    def _mtime(self, path):
+        try:
+            return os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _load(self, field, notify=True):
+        mtime = self._mtime(field.path)
+        self._mtimes[field.name] = mtime
+        if field.flag:
+            value = mtime is not None
+        elif mtime is None:
+            value = field.default
+            if field.name == "mode":
+                # Même comportement qu'avant : mode.txt recréé en AUTO
+                self._write(field, value)
+                send_telegram("⚠️ mode.txt créé automatiquement en mode AUTO")
+        else:
+            try:
+                with open(field.path, "r") as f:
+                    value = field.parse(f.read())
+            except Exception as e:
+                logging.error(f"❌ Valeur invalide dans {os.path.basename(field.path)} : {e}")
+                send_telegram(f"⚠️ {os.path.basename(field.path)} invalide ({e}), valeur par défaut : {field.default}")
+                value = field.default
+        if field.name == "leverage" and value > 50:
+            send_telegram(f"⚠️ Attention : levier élevé détecté ({value})")
+        self._store(field.name, value, notify)
+
+    def _store(self, name, value, notify=True):
+        with self._changed:
+            previous = self._values.get(name)
+            self._values[name] = value
+            self._changed.notify_all()
+        if notify and previous != value:
+            for listener in list(self._listeners):
+                try:
+                    listener(name, value)
+                except Exception as e:
+                    logging.error(f"❌ Erreur listener config {name} : {e}")
+
+    def reload(self, name=None):
+        for field in ([self._fields[name]] if name else self._fields.values()):
+            self._load(field)
+
+    # === Écriture atomique ===
+    def _write(self, field, value):
+        tmp_path = f"{field.path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(field.fmt(value))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, field.path)
+        self._mtimes[field.name] = self._mtime(field.path)
+
+    def set(self, name, value):
+        """
+        Valide, écrit le fichier de façon atomique et met à jour la valeur en mémoire.
+        Lève ValueError si la valeur est invalide.
+        """
+        field = self._fields[name]
+        if field.flag:
+            return self.request(name) if value else self.clear(name)
+        value = field.parse(field.fmt(value))
+        self._write(field, value)
+        self._store(name, value)
+        return value
+
+    def request(self, name):
+        # Pose un drapeau (ex : fermeture manuelle) : fichier créé pour les outils externes
+        field = self._fields[name]
+        self._write(field, "close" if name == "manual_close" else "stop")
+        self._store(name, True)
+        return True
+
+    def clear(self, name):
+        field = self._fields[name]
+        try:
+            os.remove(field.path)
+        except FileNotFoundError:
+            pass
+        self._mtimes[name] = None
+        self._store(name, False)
+        return False
+
+    # === Notifications de changement ===
+    def subscribe(self, callback):
+        # callback(name, value) appelé à chaque changement de valeur
+        self._listeners.append(callback)
+
+    def wait_for(self, name, timeout: float):
+        """
+        Attend que la valeur devienne vraie (ex : manual_close) ; retourne la valeur courante.
+        """
+        with self._changed:
+            self._changed.wait_for(lambda: self._values[name], timeout=timeout)
+            return self._values[name]
+
+    # === Surveillance des modifications externes ===
+    def _on_path_changed(self, path):
+        field = self._by_path.get(os.path.normcase(os.path.abspath(path)))
+        if field is not None and self._mtime(field.path) != self._mtimes.get(field.name):
+            self._load(field)
+
+    def _poll(self):
+        while not self._stop_event.wait(POLL_INTERVAL):
+            for field in self._fields.values():
+                if self._mtime(field.path) != self._mtimes.get(field.name):
+                    self._load(field)
+
+    def start_watching(self):
+        if self._observer is not None or (self._poll_thread and self._poll_thread.is_alive()):
+            return
+        self._stop_event.clear()
+        if Observer is not None:
+            try:
+                observer = Observer()
+                observer.schedule(_ConfigEventHandler(self), BASE_DIR, recursive=False)
+                observer.daemon = True
+                observer.start()
+                self._observer = observer
+                return
+            except Exception as e:
+                logging.error(f"❌ watchdog indisponible ({e}), surveillance par mtime")
+        self._poll_thread = threading.Thread(target=self._poll, name="runtime-config-poll", daemon=True)
+        self._poll_thread.start()
+
+    def stop_watching(self):
+        self._stop_event.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer = None
+
+
+class _ConfigEventHandler(FileSystemEventHandler):
+    def __init__(self, config):
+        self.config = config
+
+    def on_any_event(self, event):
+        if event.is_directory:
+            return
+        # os.replace produit un déplacement : on regarde aussi la destination
+        for path in (event.src_path, getattr(event, "dest_path", None)):
+            if path:
+                self.config._on_path_changed(path)
+
+
+# ✅ Instance globale unique
+runtime_config = RuntimeConfig([
+    _Field("mode", MODE_FILE, _parse_mode, default="auto"),
+    _Field("leverage", LEVERAGE_FILE, _parse_leverage, default=default_leverage),
+    _Field("quantity", QUANTITY_FILE, _parse_quantity, default=default_quantity_usdt),
+    _Field("gain_alert", GAIN_ALERT_FILE, _parse_switch, fmt=_format_switch, default=True),
+    _Field("manual_close", MANUAL_CLOSE_FILE, flag=True, default=False),
+    _Field("stop_requested", STOP_FILE, flag=True, default=False),
+])
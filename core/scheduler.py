@@ -0,0 +1,272 @@
+"""
+Module : scheduler.py
+But : Planificateur central aligné sur l'heure serveur Binance.
+      - Déclenche les callbacks exactement à la clôture des bougies (1m, 3m, 5m...).
+      - Déclenche des ticks intrabougie à cadence configurable, alignés eux aussi.
+      - Un seul thread de dispatch remplace les boucles time.sleep(5) de chaque stratégie ;
+        les callbacks s'exécutent dans un petit pool et un callback encore en cours
+        n'est jamais relancé en parallèle (le tick est compté comme sauté).
+      - Supervise aussi les tâches de fond du bot (surveillance SL/TP, levier, position...) :
+        décalage aléatoire (jitter), priorité de requête, relance après erreur avec
+        attente croissante, abandon après N échecs consécutifs, durées par tâche (job_ms{job})
+        et annulation propre (cancel / stop).
+"""
+
+import heapq
+import itertools
+import math
+import random
+import time
+import threading
+import logging
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from core.binance_client import server_time, sync_time
+from core.config import candle_close_delay
+from core.market_data import interval_seconds
+from core.rate_limiter import request_priority, REQUEST_NORMAL
+from core.metrics import metrics
+
+logging.basicConfig(
+    filename='bot.log',
+    level=logging.WARNING,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+TIME_RESYNC_SECONDS = 3600
+MAX_BACKOFF = 300  # Attente maximale avant relance d'une tâche en erreur (secondes)
+
+
+class _Job:
+    __slots__ = ("name", "callback", "period", "offset", "on_close", "jitter", "priority", "max_failures",
+                 "running", "idle", "cancelled", "runs", "skipped", "errors", "failures", "retry_at",
+                 "last_ms", "next_boundary", "next_fire")
+
+    def __init__(self, name, callback, period, offset, on_close, jitter=0.0, priority=None, max_failures=None):
+        self.name = name
+        self.callback = callback
+        self.period = period
+        self.offset = offset
+        self.on_close = on_close
+        self.jitter = jitter
+        self.priority = priority          # Priorité de requête (core/rate_limiter) appliquée au callback
+        self.max_failures = max_failures  # Échecs consécutifs avant abandon (None : relance toujours)
+        self.running = False
+        self.idle = threading.Event()
+        self.idle.set()
+        self.cancelled = False
+        self.runs = 0
+        self.skipped = 0
+        self.errors = 0
+        self.failures = 0                 # Échecs consécutifs
+        self.retry_at = 0.0               # Heure (monotonic) avant laquelle la tâche en erreur attend
+        self.last_ms = None
+        self.next_boundary = None
+        self.next_fire = None
+
+    def schedule(self, boundary):
+        # Frontière exacte (passée au callback) + décalage aléatoire (réveil réel)
+        self.next_boundary = boundary
+        self.next_fire = boundary + (random.uniform(0, self.jitter) if self.jitter else 0.0)
+        heap_priority = REQUEST_NORMAL if self.priority is None else self.priority
+        return self.next_fire, heap_priority
+
+
+class CandleScheduler:
+    """
+    Planifie des callbacks sur les frontières de bougies (heure serveur).
+    on_candle_close(interval, cb) : cb(close_time) à chaque clôture, close_time en secondes serveur.
+    every(seconds, cb) : cb() toutes les `seconds`, aligné sur les frontières.
+    cancel(name) : retire une tâche (et attend la fin de son exécution en cours).
+    """
+
+    def __init__(self, clock=server_time, max_workers: int = 4):
+        self._clock = clock
+        self._max_workers = max_workers
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._stop_event = threading.Event()
+        self._executor = None
+        self._thread = None
+        self.jobs = {}
+
+    @staticmethod
+    def next_boundary(period: float, offset: float, now: float) -> float:
+        return (math.floor((now - offset) / period) + 1) * period + offset
+
+    def _add(self, job):
+        fire_at, heap_priority = job.schedule(self.next_boundary(job.period, job.offset, self._clock()))
+        with self._cond:
+            previous = self.jobs.get(job.name)
+            if previous is not None:
+                previous.cancelled = True  # Tâche du même nom remplacée
+            self.jobs[job.name] = job
+            heapq.heappush(self._heap, (fire_at, heap_priority, next(self._seq), job))
+            self._cond.notify()
+        return job
+
+    def on_candle_close(self, interval: str, callback, delay: float = candle_close_delay, name: str = None):
+        return self._add(_Job(name or callback.__name__, callback, interval_seconds(interval), delay, on_close=True))
+
+    def every(self, seconds: float, callback, name: str = None, jitter: float = 0.0,
+              priority: int = None, max_failures: int = None):
+        """
+        jitter : décalage aléatoire (0..jitter s) de chaque exécution, pour ne pas aligner les appels REST
+                 des tâches de fond sur ceux des stratégies.
+        priority : priorité de requête (REQUEST_ORDER/NORMAL/LOW) des appels faits par le callback ;
+                   départage aussi les tâches dues au même instant.
+        max_failures : échecs consécutifs avant abandon (None : relance toujours, avec attente croissante).
+        """
+        return self._add(_Job(name or callback.__name__, callback, seconds, 0.0, on_close=False,
+                              jitter=min(jitter, seconds), priority=priority, max_failures=max_failures))
+
+    def cancel(self, name: str, timeout: float = 5.0) -> bool:
+        """
+        Retire la tâche ; attend au plus `timeout` s la fin de son exécution en cours.
+        Retourne False si cette exécution n'est pas terminée dans le délai.
+        """
+        with self._cond:
+            job = self.jobs.pop(name, None)
+            if job is None:
+                return True
+            job.cancelled = True
+            self._cond.notify()
+        return job.idle.wait(timeout)
+
+    # === Démarrage / arrêt ===
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return self._thread
+        sync_time()
+        if "sync_time" not in self.jobs:
+            self.every(TIME_RESYNC_SECONDS, sync_time, name="sync_time")
+        self._stop_event.clear()
+        self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="scheduler")
+        self._thread = threading.Thread(target=self._run, name="candle-scheduler", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self, timeout: float = 5.0):
+        """
+        Arrête le dispatch et attend au plus `timeout` s les tâches en cours d'exécution.
+        """
+        self._stop_event.set()
+        with self._cond:
+            self._cond.notify_all()
+            jobs = list(self.jobs.values())
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        deadline = time.monotonic() + timeout
+        for job in jobs:
+            job.idle.wait(max(deadline - time.monotonic(), 0))
+
+    # === Boucle de dispatch ===
+    def _run(self):
+        while not self._stop_event.is_set():
+            with self._cond:
+                if not self._heap:
+                    self._cond.wait(1.0)
+                    continue
+                fire_at, _, _, job = self._heap[0]
+                if job.cancelled:
+                    heapq.heappop(self._heap)
+                    continue
+                wait = fire_at - self._clock()
+                if wait > 0:
+                    # Réveil au plus tard chaque seconde : l'heure serveur peut être resynchronisée
+                    self._cond.wait(min(wait, 1.0))
+                    continue
+                heapq.heappop(self._heap)
+                boundary = job.next_boundary
+                next_boundary = boundary + job.period
+                now = self._clock()
+                if next_boundary <= now:
+                    # Retard (veille, surcharge) : on saute directement à la prochaine frontière
+                    next_boundary = self.next_boundary(job.period, job.offset, now)
+                next_fire, heap_priority = job.schedule(next_boundary)
+                heapq.heappush(self._heap, (next_fire, heap_priority, next(self._seq), job))
+            self._dispatch(job, boundary)
+
+    def _dispatch(self, job, boundary):
+        if job.running:
+            job.skipped += 1
+            return
+        if job.failures and time.monotonic() < job.retry_at:
+            return  # Attente après erreur : frontière ignorée
+        job.running = True
+        job.idle.clear()
+        try:
+            self._executor.submit(self._execute, job, boundary - job.offset)
+        except RuntimeError:
+            # Pool arrêté pendant stop()
+            job.running = False
+            job.idle.set()
+
+    def _execute(self, job, boundary):
+        started = time.perf_counter()
+        try:
+            if job.priority is None:
+                self._call(job, boundary)
+            else:
+                with request_priority(job.priority):
+                    self._call(job, boundary)
+            job.runs += 1
+            job.failures = 0
+        except Exception as e:
+            job.errors += 1
+            job.failures += 1
+            logging.error(f"❌ Erreur tâche planifiée {job.name} ({job.failures} échec(s) consécutif(s)) : {e}")
+            traceback.print_exc()
+            self._on_failure(job)
+        finally:
+            job.last_ms = (time.perf_counter() - started) * 1000
+            metrics.observe("job_ms", job.last_ms, job=job.name)
+            job.running = False
+            job.idle.set()
+
+    @staticmethod
+    def _call(job, boundary):
+        if job.on_close:
+            job.callback(boundary)
+        else:
+            job.callback()
+
+    def _on_failure(self, job):
+        if job.max_failures is not None and job.failures >= job.max_failures:
+            with self._cond:
+                if self.jobs.get(job.name) is job:
+                    del self.jobs[job.name]
+                job.cancelled = True
+            from core.notifier import send_telegram  # Import local : notifier inutile aux stratégies
+            send_telegram(f"❌ Trop d'erreurs sur {job.name} ({job.failures} de suite), tâche arrêtée.")
+            return
+        # Attente croissante : 1, 2, 4... périodes, plafonnée
+        job.retry_at = time.monotonic() + min(job.period * 2 ** (job.failures - 1), MAX_BACKOFF)
+
+    def stats(self) -> dict:
+        now = self._clock()
+        with self._cond:
+            jobs = list(self.jobs.items())
+        result = {}
+        for name, job in jobs:
+            timings = metrics.histogram("job_ms", job=name).stats()
+            result[name] = {
+                "runs": job.runs,
+                "skipped": job.skipped,
+                "errors": job.errors,
+                "failures": job.failures,
+                "running": job.running,
+                "last_ms": None if job.last_ms is None else round(job.last_ms, 2),
+                "p50_ms": timings["p50_ms"],
+                "max_ms": timings["max_ms"],
+                "next_in": round(job.next_fire - now, 2),
+            }
+        return result
+
+
+# ✅ Instance globale unique (démarrée depuis main.py)
+scheduler = CandleScheduler()
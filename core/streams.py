@@ -0,0 +1,193 @@
+"""
+Module : streams.py
+But : Flux WebSocket Binance (bougies spot + mark price futures) qui alimentent
+      le cache local de core/market_data.py.
+      - Reconnexion automatique avec backoff exponentiel.
+      - Rattrapage REST à chaque (re)connexion et en cas de trou dans les bougies.
+      - Si le flux tombe, le cache redevient périmé et les lectures repassent par REST.
+"""
+
+import json
+import time
+import threading
+import logging
+
+import websocket
+
+from core.config import symbol, use_websocket, stream_intervals
+from core.market_data import market_data, price_book, DEFAULT_KLINE_LIMIT
+
+logging.basicConfig(
+    filename='bot.log',
+    level=logging.WARNING,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+SPOT_STREAM_URL = "wss://stream.binance.com:9443/stream?streams="
+FUTURES_STREAM_URL = "wss://fstream.binance.com/stream?streams="
+
+
+class ReconnectingWebSocket:
+    """
+    Connexion WebSocket dans un thread daemon, relancée automatiquement.
+    Les sous-classes implémentent handle(data) et éventuellement
+    before_connect() (URL dynamique), on_connect() et on_disconnect().
+    """
+
+    def __init__(self, url: str, name: str, max_backoff: float = 60):
+        self.url = url
+        self.name = name
+        self.max_backoff = max_backoff
+        self.connected = False
+        self.last_message_at = 0.0
+        self.reconnects = 0
+        self._ws = None
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self):
+        self._stop_event.set()
+        if self._ws is not None:
+            try:
+                self._ws.close()
+            except Exception:
+                pass
+
+    @property
+    def is_live(self) -> bool:
+        return self.connected and time.time() - self.last_message_at < 10
+
+    def _run(self):
+        backoff = 1
+        while not self._stop_event.is_set():
+            started = time.time()
+            try:
+                self.before_connect()
+                self._ws = websocket.WebSocketApp(
+                    self.url,
+                    on_open=self._on_open,
+                    on_message=self._on_message,
+                    on_error=self._on_error,
+                    on_close=self._on_close,
+                )
+                self._ws.run_forever(ping_interval=20, ping_timeout=10)
+            except Exception as e:
+                logging.error(f"❌ Flux {self.name} interrompu : {e}")
+            if self.connected:
+                self._on_close(self._ws, None, None)
+            if self._stop_event.is_set():
+                break
+            # Une connexion restée saine longtemps repart avec un backoff minimal
+            if time.time() - started > 60:
+                backoff = 1
+            logging.warning(f"🔌 Flux {self.name} déconnecté, reconnexion dans {backoff}s")
+            self._stop_event.wait(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+
+    def _on_open(self, ws):
+        self.connected = True
+        self.reconnects += 1
+        logging.warning(f"📡 Flux {self.name} connecté")
+        try:
+            self.on_connect()
+        except Exception as e:
+            logging.error(f"❌ Erreur rattrapage flux {self.name} : {e}")
+
+    def _on_message(self, ws, message):
+        self.last_message_at = time.time()
+        try:
+            payload = json.loads(message)
+            self.handle(payload.get("data", payload))
+        except Exception as e:
+            logging.error(f"❌ Message {self.name} non traité : {e}")
+
+    def _on_error(self, ws, error):
+        logging.error(f"❌ Erreur flux {self.name} : {error}")
+
+    def _on_close(self, ws, status_code, msg):
+        if not self.connected:
+            return
+        self.connected = False
+        try:
+            self.on_disconnect()
+        except Exception as e:
+            logging.error(f"❌ Erreur déconnexion flux {self.name} : {e}")
+
+    def before_connect(self):
+        pass
+
+    def on_connect(self):
+        pass
+
+    def on_disconnect(self):
+        pass
+
+    def handle(self, data):
+        raise NotImplementedError
+
+
+class KlineStream(ReconnectingWebSocket):
+    """
+    Bougies spot (même source que client.get_klines) pour un symbole et plusieurs intervalles.
+    """
+
+    def __init__(self, symbol: str, intervals):
+        self.symbol = symbol
+        self.intervals = list(intervals)
+        streams = "/".join(f"{symbol.lower()}@kline_{i}" for i in self.intervals)
+        super().__init__(SPOT_STREAM_URL + streams, name=f"klines-{symbol}")
+
+    def on_connect(self):
+        # Rattrapage REST : les bougies manquées pendant la coupure sont rechargées
+        for interval in self.intervals:
+            market_data.refresh(self.symbol, interval, limit=DEFAULT_KLINE_LIMIT)
+
+    def handle(self, data):
+        if data.get("e") != "kline":
+            return
+        k = data["k"]
+        kline = (k["t"], k["o"], k["h"], k["l"], k["c"], k["v"], k["T"], k["q"], k["n"], k["V"], k["Q"], k["B"])
+        if not market_data.apply_kline(self.symbol, k["i"], kline):
+            logging.warning(f"⚠️ Trou détecté dans les bougies {self.symbol} {k['i']}, rattrapage REST")
+            market_data.refresh(self.symbol, k["i"], limit=DEFAULT_KLINE_LIMIT)
+
+
+class MarkPriceStream(ReconnectingWebSocket):
+    """
+    Mark price futures poussé chaque seconde.
+    """
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        super().__init__(FUTURES_STREAM_URL + f"{symbol.lower()}@markPrice@1s", name=f"markprice-{symbol}")
+
+    def handle(self, data):
+        if data.get("e") != "markPriceUpdate":
+            return
+        price_book.update(data["s"], float(data["p"]))
+
+
+# === Démarrage / arrêt global des flux ===
+streams = []
+
+def start_market_streams():
+    if not use_websocket:
+        logging.warning("📡 Flux WebSocket désactivés (USE_WEBSOCKET=0), lecture REST uniquement")
+        return []
+    if streams:
+        return streams
+    streams.append(KlineStream(symbol, stream_intervals))
+    streams.append(MarkPriceStream(symbol))
+    for stream in streams:
+        stream.start()
+    return streams
+
+def stop_market_streams():
+    for stream in streams:
+        stream.stop()
+    streams.clear()
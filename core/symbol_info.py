@@ -0,0 +1,239 @@
+"""
+Module : symbol_info.py
+But : Cache des filtres de symboles Binance Futures (LOT_SIZE, MIN_NOTIONAL, PRICE_FILTER).
+      futures_exchange_info() est chargé une fois au démarrage puis rafraîchi en arrière-plan :
+      - par la tâche planifiée "symbol_info" (toutes les SYMBOL_INFO_TTL secondes, main.py),
+      - à défaut, dès qu'une lecture trouve le cache expiré,
+      - ou immédiatement quand Binance rejette un ordre pour une question de filtre.
+      Les lectures sont de simples accès dictionnaire, sans appel réseau : pendant un
+      rechargement (un seul à la fois), elles servent les filtres précédents.
+      Quantizer : arrondi exact (Decimal) des quantités au stepSize et des prix au tickSize,
+      précalculé par symbole et partagé par tous les chemins d'ordre.
+"""
+
+import math
+import time
+from decimal import Decimal, ROUND_DOWN, ROUND_UP, ROUND_HALF_UP
+import threading
+import logging
+from collections import namedtuple
+
+from core.binance_client import client
+from core.config import symbol_info_ttl
+
+logging.basicConfig(
+    filename='bot.log',
+    level=logging.WARNING,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+# Codes d'erreur Binance liés aux filtres : les règles du symbole ont peut-être changé
+FILTER_ERROR_CODES = {
+    -1013,  # Filter failure
+    -1111,  # Precision is over the maximum defined for this asset
+    -4003,  # Quantity less than zero
+    -4005,  # Quantity greater than max quantity
+    -4014,  # Price not increased by tick size
+    -4023,  # Quantity not increased by step size
+    -4164,  # Order's notional must be no smaller than MIN_NOTIONAL
+}
+
+
+SymbolFilters = namedtuple("SymbolFilters", [
+    "symbol",
+    "step_size",
+    "min_qty",
+    "max_qty",
+    "tick_size",
+    "min_notional",
+    "quantity_precision",
+    "price_precision",
+])
+
+
+def _precision(step: float) -> int:
+    return max(0, int(round(-math.log10(step)))) if step > 0 else 0
+
+class Quantizer:
+    """
+    Arrondi exact au pas de quantité (stepSize) et au pas de prix (tickSize) d'un symbole.
+    Les calculs passent par Decimal pour éviter les 0.30000000000000004 refusés par Binance.
+    """
+    __slots__ = ("symbol", "step", "tick", "min_qty", "min_notional")
+
+    def __init__(self, symbol: str, step_size, tick_size, min_qty=0, min_notional=0):
+        self.symbol = symbol
+        self.step = Decimal(str(step_size))
+        self.tick = Decimal(str(tick_size))
+        self.min_qty = Decimal(str(min_qty))
+        self.min_notional = Decimal(str(min_notional))
+
+    @staticmethod
+    def _round(value, step: Decimal, rounding) -> float:
+        value = Decimal(str(value))
+        if step <= 0:
+            return float(value)
+        return float((value / step).quantize(Decimal(1), rounding=rounding) * step)
+
+    def quantity(self, qty) -> float:
+        # Arrondi inférieur : on ne dépasse jamais la marge demandée
+        return self._round(qty, self.step, ROUND_DOWN)
+
+    def quantity_up(self, qty) -> float:
+        return self._round(qty, self.step, ROUND_UP)
+
+    def price(self, price) -> float:
+        return self._round(price, self.tick, ROUND_HALF_UP)
+
+    @staticmethod
+    def format(value) -> str:
+        # Chaîne décimale sans notation scientifique (ex : 1e-05 → "0.00001"), pour batchOrders
+        return format(Decimal(str(value)).normalize(), "f")
+
+    def order_quantity(self, notional: float, price: float) -> float:
+        """
+        Quantité pour une valeur de position donnée, relevée au minimum (minQty, minNotional)
+        exigé par Binance.
+        """
+        qty = Decimal(str(self.quantity(notional / price)))
+        qty = max(qty, self.min_qty)
+        if self.min_notional > 0 and qty * Decimal(str(price)) < self.min_notional:
+            qty = Decimal(str(self.quantity_up(self.min_notional / Decimal(str(price)))))
+        return float(qty)
+
+
+def _parse_symbol(info: dict) -> SymbolFilters:
+    filters = {f["filterType"]: f for f in info["filters"]}
+    lot = filters.get("LOT_SIZE", {})
+    price = filters.get("PRICE_FILTER", {})
+    notional = filters.get("MIN_NOTIONAL", {})
+    step_size = float(lot.get("stepSize", 0))
+    tick_size = float(price.get("tickSize", 0))
+    return SymbolFilters(
+        symbol=info["symbol"],
+        step_size=step_size,
+        min_qty=float(lot.get("minQty", 0)),
+        max_qty=float(lot.get("maxQty", 0)),
+        tick_size=tick_size,
+        min_notional=float(notional.get("notional", 0)),
+        quantity_precision=_precision(step_size),
+        price_precision=_precision(tick_size),
+    )
+
+
+class SymbolInfoCache:
+    """
+    Filtres de tous les symboles futures, indexés par nom de symbole.
+    """
+
+    def __init__(self, fetcher=None, ttl: float = symbol_info_ttl):
+        self._fetcher = fetcher or client.futures_exchange_info
+        self.ttl = ttl
+        self._symbols = {}
+        self._quantizers = {}
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()          # Un seul téléchargement à la fois
+        self._pending_lock = threading.Lock()
+        self._refresh_pending = False
+
+    @property
+    def expired(self) -> bool:
+        return time.time() - self._loaded_at > self.ttl
+
+    def load(self) -> int:
+        """
+        Télécharge futures_exchange_info et reconstruit le cache. Retourne le nombre de symboles.
+        """
+        with self._lock:
+            return self._load()
+
+    def _load(self) -> int:
+        info = self._fetcher()
+        symbols = {s["symbol"]: _parse_symbol(s) for s in info["symbols"]}
+        quantizers = {
+            name: Quantizer(name, f.step_size, f.tick_size, f.min_qty, f.min_notional)
+            for name, f in symbols.items()
+        }
+        # Remplacement en bloc : un lecteur voit l'ancien cache ou le nouveau, jamais un mélange
+        self._symbols, self._quantizers = symbols, quantizers
+        self._loaded_at = time.time()
+        logging.warning(f"📚 Filtres de {len(symbols)} symboles chargés depuis Binance")
+        return len(symbols)
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Recharge les filtres s'ils ont expiré (ou toujours si force) ; tâche planifiée "symbol_info".
+        Sans effet si un rechargement est déjà en cours. En cas d'échec, le cache est conservé.
+        """
+        if not self._lock.acquire(blocking=False):
+            return False
+        try:
+            if self._symbols and not (force or self.expired):
+                return False
+            self._load()
+            return True
+        except Exception as e:
+            logging.error(f"❌ Rafraîchissement des filtres symboles échoué, cache conservé : {e}")
+            return False
+        finally:
+            self._lock.release()
+
+    def refresh_in_background(self):
+        with self._pending_lock:
+            if self._refresh_pending:
+                return
+            self._refresh_pending = True
+        threading.Thread(target=self._background_refresh, name="symbol-info-refresh", daemon=True).start()
+
+    def _background_refresh(self):
+        try:
+            self.refresh()
+        finally:
+            with self._pending_lock:
+                self._refresh_pending = False
+
+    def _ensure_loaded(self):
+        if not self._symbols:
+            # Premier chargement : rien à servir, les appelants attendent le même téléchargement
+            with self._lock:
+                if not self._symbols:
+                    self._load()
+        elif self.expired:
+            # Hors du chemin d'ordre : filtres actuels servis pendant le rechargement
+            self.refresh_in_background()
+
+    def get(self, symbol: str) -> SymbolFilters:
+        self._ensure_loaded()
+        return self._symbols.get(symbol)
+
+    def quantizer(self, symbol: str) -> Quantizer:
+        self._ensure_loaded()
+        return self._quantizers.get(symbol)
+
+    def is_valid(self, symbol: str) -> bool:
+        return self.get(symbol) is not None
+
+    def invalidate(self):
+        self._loaded_at = 0.0
+
+    def handle_order_error(self, error) -> bool:
+        """
+        À appeler sur un rejet d'ordre : lance un rechargement en arrière-plan
+        si l'erreur vient d'un filtre. Retourne True dans ce cas.
+        """
+        if getattr(error, "code", None) in FILTER_ERROR_CODES:
+            logging.warning(f"⚠️ Ordre rejeté par un filtre ({error}), rechargement des filtres symboles")
+            self.invalidate()
+            self.refresh_in_background()  # Prêt avant la nouvelle tentative (retry_order attend entre deux essais)
+            return True
+        return False
+
+
+# ✅ Instance globale unique
+symbol_info = SymbolInfoCache()
+
+def get_quantizer(symbol: str) -> Quantizer:
+    quantizer = symbol_info.quantizer(symbol)
+    if quantizer is None:
+        raise ValueError(f"Symbole inconnu sur Binance Futures : {symbol}")
+    return quantizer
@@ -57,8 +57,14 @@ from core.state import state
 from telebot.types import InlineKeyboardMarkup, InlineKeyboardButton, ReplyKeyboardMarkup, KeyboardButton
 from types import SimpleNamespace
 from core.utils import safe_round
-from core.notifier import send_telegram
-from binance.client import Client
+from core.notifier import send_telegram, TELEGRAM_DRY_RUN, DRY_RUN_TOKEN
+from core.runtime_config import runtime_config
+from core.commands import request_close, request_shutdown
+from core.symbol_info import get_quantizer
+from core.binance_client import get_client
+from core.rate_limiter import rate_limiter
+from core.async_gateway import gateway
+from core.metrics import metrics
 
 # === Chargement des variables d’environnement (.env) ===
 load_dotenv()
@@ -71,9 +77,6 @@ logging.basicConfig(
 )
 
 # === Chargement des variables de config à partir de .env ===
-API_KEY = os.getenv("BINANCE_API_KEY")
-API_SECRET = os.getenv("BINANCE_API_SECRET")
-
 TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
 if TELEGRAM_CHAT_ID:
@@ -92,17 +95,14 @@ DEFAULT_LEVERAGE = int(os.getenv("DEFAULT_LEVERAGE", 10))
 DEFAULT_QUANTITY = float(os.getenv("DEFAULT_QUANTITY", 1.0))
 
 # === Vérification des variables critiques ===
-if not API_KEY or not API_SECRET:
-    raise Exception("❌ BINANCE_API_KEY ou BINANCE_API_SECRET manquant dans .env")
-
-if not TELEGRAM_TOKEN or not TELEGRAM_CHAT_ID:
+if not TELEGRAM_DRY_RUN and (not TELEGRAM_TOKEN or not TELEGRAM_CHAT_ID):
     raise Exception("❌ TELEGRAM_TOKEN ou TELEGRAM_CHAT_ID manquant dans .env")
 
-# === Initialisation du client Binance (API) ===
-client = Client(API_KEY, API_SECRET)
+# === Client Binance partagé (clés vérifiées par get_client, ou exchange simulé) ===
+client = get_client()
 
 # === Initialisation du bot Telegram ===
-bot = telebot.TeleBot(TELEGRAM_TOKEN)
+bot = telebot.TeleBot(TELEGRAM_TOKEN or DRY_RUN_TOKEN)
 
 # === Contexte utilisateur en mémoire ===
 user_trade_context = {}
@@ -161,15 +161,10 @@ user_trade_context = load_user_trade_context()
 
 # === ALERTES DE GAINS ===
 def read_gain_alert():
-    try:
-        with open("gain_alert.txt", "r") as f:
-            return f.read().strip() == "on"
-    except FileNotFoundError:
-        return True  # par défaut activé
+    return runtime_config.gain_alert  # activé par défaut
 
 def write_gain_alert(value):
-    with open("gain_alert.txt", "w") as f:
-        f.write("on" if value else "off")
+    runtime_config.set("gain_alert", bool(value))
 
 @bot.message_handler(commands=['gain_alert'])
 def toggle_gain_alert(message):
@@ -190,13 +185,7 @@ def status(message):
         bot.send_message(message.chat.id, "⛔ Accès refusé.")
         return
     log_info(f"[STATUS] Commande reçue de {message.chat.id} : {message.text}")
-    try:
-        with open("mode.txt", "r") as f:
-            mode_value = f.read().strip().lower()
-            if mode_value not in ["auto", "alert"]:
-                mode_value = "auto"  # Valeur par défaut si contenu inattendu
-    except Exception:
-        mode_value = "auto"  # Valeur par défaut si fichier absent ou erreur
+    mode_value = runtime_config.mode
     mode_label = "AUTO" if mode_value == "auto" else "ALERTE"
     bot.reply_to(message, f"✅ SKY_TRADER est bien actif et en mode {mode_label}.")
 # === FERMETURE MANUELLE ===
@@ -207,8 +196,7 @@ def close(message):
         return
     
     log_info(f"[CLOSE] Commande reçue de {message.chat.id} : {message.text}")
-    with open("manual_close_request.txt", "w") as f:
-        f.write("close")
+    request_close("telegram")
     bot.send_message(message.chat.id, "🔴 Fermeture de la position en cours ...")
 
 # === SHUTDOWN ===
@@ -222,11 +210,89 @@ def shutdown(message):
     if message.chat.id == TELEGRAM_CHAT_ID:
         bot.send_message(message.chat.id, "🛑 Bot arrêté.")
         log_info(f"Bot arrêté manuellement par {message.chat.id}")
-        os._exit(0)
+        request_shutdown("telegram", exit_process=True)
     else:
         bot.send_message(message.chat.id, "❌ Permission refusée.")
         log_info(f"Tentative d'arrêt non autorisée par {message.chat.id}")
 
+# === MÉMOIRE ===
+# /memory : rapport (RSS, GC, objets, tracemalloc) ; /memory start|stop : active/désactive tracemalloc ; /memory 20 : top 20
+@bot.message_handler(commands=['memory'])
+def memory(message):
+    if not is_authorized(message.from_user.id):
+        bot.send_message(message.chat.id, "⛔ Accès refusé.")
+        return
+    log_info(f"[MEMORY] Commande reçue de {message.chat.id} : {message.text}")
+    from core.memory import memory_profiler  # Import local : module chargé seulement si utilisé
+    args = message.text.split()[1:]
+    arg = args[0].lower() if args else ""
+    if arg == "start":
+        memory_profiler.start()
+        bot.reply_to(message, "🧠 tracemalloc activé. Renvoie /memory pour un instantané.")
+        return
+    if arg == "stop":
+        memory_profiler.stop()
+        bot.reply_to(message, "🧠 tracemalloc désactivé.")
+        return
+    top = int(arg) if arg.isdigit() else 10
+    report = memory_profiler.report(top)
+    for i in range(0, len(report), 4000):
+        bot.send_message(message.chat.id, report[i:i + 4000])
+
+# === BUDGET DE POIDS BINANCE ===
+@bot.message_handler(commands=['budget'])
+def budget(message):
+    if not is_authorized(message.from_user.id):
+        bot.send_message(message.chat.id, "⛔ Accès refusé.")
+        return
+    log_info(f"[BUDGET] Commande reçue de {message.chat.id}")
+    b = rate_limiter.snapshot()
+    msg = (
+        f"📶 Budget Binance (minute en cours)\n"
+        f"Futures : {b['futures_weight']} ({b['futures_pct']}%)\n"
+        f"Spot : {b['spot_weight']} ({b['spot_pct']}%)\n"
+        f"Ordres : {b['orders_10s']}/10s, {b['orders_1m']}/min\n"
+        f"Appels : ordres {b['calls_order']} | normaux {b['calls_normal']} | télémétrie {b['calls_low']}\n"
+        f"Différés : {b['deferred']} | Refusés : {b['rejected']} | 429/418 : {b['rate_limited']}"
+    )
+    if b["banned_for_s"]:
+        msg += f"\n⛔ Requêtes suspendues encore {b['banned_for_s']:.0f}s"
+    bot.reply_to(message, msg)
+
+# === LATENCES ET COMPTEURS ===
+@bot.message_handler(commands=['metrics'])
+def show_metrics(message):
+    if not is_authorized(message.from_user.id):
+        bot.send_message(message.chat.id, "⛔ Accès refusé.")
+        return
+    log_info(f"[METRICS] Commande reçue de {message.chat.id}")
+    args = message.text.split()[1:]
+    if args and args[0] == "reset":
+        metrics.reset()
+        bot.reply_to(message, "🧹 Mesures remises à zéro.")
+        return
+    report = metrics.report(prefix=args[0] if args else None)
+    for i in range(0, len(report), 4000):
+        bot.send_message(message.chat.id, report[i:i + 4000])
+
+# === TÂCHES PLANIFIÉES ===
+@bot.message_handler(commands=['jobs'])
+def jobs(message):
+    if not is_authorized(message.from_user.id):
+        bot.send_message(message.chat.id, "⛔ Accès refusé.")
+        return
+    log_info(f"[JOBS] Commande reçue de {message.chat.id}")
+    from core.scheduler import scheduler  # Import local pour éviter l'import circulaire
+    lines = []
+    for name, j in scheduler.stats().items():
+        line = (f"{'⏳' if j['running'] else '✅' if not j['failures'] else '⚠️'} {name} : "
+                f"{j['runs']} exécutions, p50 {j['p50_ms']:.1f} ms, max {j['max_ms']:.1f} ms, "
+                f"prochaine dans {max(j['next_in'], 0):.0f}s")
+        if j["errors"] or j["skipped"]:
+            line += f" | erreurs {j['errors']} ({j['failures']} de suite), sautées {j['skipped']}"
+        lines.append(line)
+    bot.reply_to(message, "\n".join(lines) if lines else "Aucune tâche planifiée.")
+
 # === CHANGEMENT DE MODE ===
 @bot.message_handler(commands=['mode'])
 def mode(message):
@@ -234,8 +300,7 @@ def mode(message):
     try:
         mode_value = message.text.split(" ")[1].lower()
         if mode_value in ["auto", "alert"]:
-            with open("mode.txt", "w") as f:
-                f.write(mode_value)
+            runtime_config.set("mode", mode_value)
             bot.reply_to(message, f"✅ SKY_TRADER passe en {mode_value.upper()}")
         else:
             bot.reply_to(message, "⚠ Mode inconnu. Utilisez /mode auto ou /mode alert.")
@@ -255,6 +320,10 @@ def help(message):
         "/mode auto - Activer le mode automatique\n"
         "/mode alert - Activer le mode alerte\n"
         "/gain_alert - Activer/désactiver les alertes de gains\n"
+        "/memory - Rapport mémoire (/memory start|stop pour tracemalloc)\n"
+        "/budget - Poids des requêtes Binance utilisé cette minute\n"
+        "/metrics - Latences p50/p99 (/metrics binance|telegram|path, /metrics reset)\n"
+        "/jobs - Tâches planifiées : exécutions, durées, erreurs\n"
         "/help - Affiche cette aide"
         "/menu - Afficher le menu principal\n"
         "/start - Démarrer le bot\n"
@@ -298,13 +367,11 @@ def handle_main_keyboard(message):
     elif message.text == "📈 Trader":
         send_position_menu(message)
     elif message.text == "🔄 Mode AUTO":
+        runtime_config.set("mode", "auto")
         bot.send_message(message.chat.id, "Mode AUTO activé.")
-        with open("mode.txt", "w") as f:
-            f.write("auto")
     elif message.text == "🔔 Mode ALERT":
+        runtime_config.set("mode", "alert")
         bot.send_message(message.chat.id, "Mode ALERT activé.")
-        with open("mode.txt", "w") as f:
-            f.write("alert")
     elif message.text == "💰 Alertes de gains":
         toggle_gain_alert(message)
     elif message.text == "❓ Aide":
@@ -349,30 +416,23 @@ def handle_all_callbacks(call):
     try:
         if data == "status":
             log_info(f"[CALLBACK] Bouton 'status' cliqué ")
-            try:
-                with open("mode.txt", "r") as f:
-                    mode_value = f.read().strip()
-            except Exception:
-                mode_value = "inconnu"
+            mode_value = runtime_config.mode
             bot.send_message(chat_id, f"✅ SKY_TRADER actif en mode {mode_value.upper()}")
 
         elif data == "close":
-            with open("manual_close_request.txt", "w") as f:
-                f.write("close")
+            request_close("telegram")
             bot.send_message(chat_id, "🔴 Fermeture de la position en cours ...")
         
         elif data == "mode_auto":
             try:
-                with open("mode.txt", "w") as f:
-                    f.write("auto")
+                runtime_config.set("mode", "auto")
                 bot.send_message(chat_id, "✅ Mode AUTO activé.")
             except Exception as e:
                 bot.send_message(chat_id, f"❌ Erreur écriture mode.txt : {e}")
 
         elif data == "mode_alert":
             try:
-                with open("mode.txt", "w") as f:
-                    f.write("alert")
+                runtime_config.set("mode", "alert")
                 bot.send_message(chat_id, "✅ Mode ALERT activé.")
             except Exception as e:
                 bot.send_message(chat_id, f"❌ Erreur écriture mode.txt : {e}")
@@ -484,7 +544,14 @@ def send_current_position(chat_id):
     from core.binance_client import client
     try:
         pos = None
-        positions = client.futures_position_information(symbol=symbol)
+        # Position et compte (levier) demandés en parallèle
+        positions, account_info = gateway.gather(
+            lambda: client.futures_position_information(symbol=symbol),
+            client.futures_account,
+            return_exceptions=True
+        )
+        if isinstance(positions, Exception):
+            raise positions
         pos = next((p for p in positions if float(p["positionAmt"]) != 0), None)
 
         if pos:
@@ -496,7 +563,6 @@ def send_current_position(chat_id):
             pnl_str = f"{'🟢 Gain' if pnl >= 0 else '🔴 Perte'} : {safe_round(pnl)} $"
             # 🔍 Récupère l’effet de levier réellement appliqué à la position
             try:
-                account_info = client.futures_account()
                 lev = "inconnu"
                 for asset in account_info['positions']:
                     if asset['symbol'] == symbol:
@@ -536,7 +602,10 @@ def send_take_profit(chat_id):
     from core.binance_client import client
     try:
         pos = None
-        positions = client.futures_position_information(symbol=SYMBOL)
+        positions, open_orders = gateway.gather(
+            lambda: client.futures_position_information(symbol=SYMBOL),
+            lambda: client.futures_get_open_orders(symbol=SYMBOL)
+        )
         for p in positions:
             if float(p["positionAmt"]) != 0:
                 pos = p
@@ -545,7 +614,7 @@ def send_take_profit(chat_id):
             msg = "Aucune position ouverte."
         else:
             pnl = float(pos["unRealizedProfit"])
-            tp_orders = [o for o in client.futures_get_open_orders(symbol=SYMBOL) if o["type"] == "TAKE_PROFIT_MARKET"]
+            tp_orders = [o for o in open_orders if o["type"] == "TAKE_PROFIT_MARKET"]
             if tp_orders:
                 tp_price = tp_orders[0]["stopPrice"]
                 msg = (
@@ -563,7 +632,10 @@ def send_stop_loss(chat_id):
     from core.binance_client import client
     from core.utils import safe_float
     try:
-        positions = client.futures_position_information(symbol=SYMBOL)
+        positions, open_orders = gateway.gather(
+            lambda: client.futures_position_information(symbol=SYMBOL),
+            lambda: client.futures_get_open_orders(symbol=SYMBOL)
+        )
         pos = next((p for p in positions if float(p["positionAmt"]) != 0), None)
         if not pos:
             bot.send_message(chat_id, "Aucune position ouverte.")
@@ -574,7 +646,7 @@ def send_stop_loss(chat_id):
         pnl_pct = ((mark - entry) / entry) * 100 * sens
 
         # Chercher le stop loss actif
-        sl_orders = [o for o in client.futures_get_open_orders(symbol=SYMBOL) if o["type"] == "STOP_MARKET"]
+        sl_orders = [o for o in open_orders if o["type"] == "STOP_MARKET"]
         if sl_orders:
             tp_price = sl_orders[0]["stopPrice"]
             msg = (
@@ -657,6 +729,8 @@ def set_new_sl(message, pos):
         else:
             new_sl = entry * (1 + sens * percent / 100)
 
+        new_sl = get_quantizer(SYMBOL).price(new_sl)
+
         # Ajoute un log pour debug
         print(f"Demande SL à {new_sl} ({percent}%)")
 
@@ -665,13 +739,13 @@ def set_new_sl(message, pos):
                 symbol=SYMBOL,
                 side="SELL" if sens == 1 else "BUY",
                 type="STOP_MARKET",
-                stopPrice=round(new_sl, 4),
+                stopPrice=new_sl,
                 closePosition=True,
                 timeInForce="GTC"
             )
             bot.reply_to(
                 message,
-                f"✅ Nouveau Stop Loss placé à {round(new_sl, 4)} ({percent}% {'gain' if percent > 0 else 'perte'})."
+                f"✅ Nouveau Stop Loss placé à {new_sl} ({percent}% {'gain' if percent > 0 else 'perte'})."
             )
         except Exception as e:
             bot.reply_to(message, f"❌ Erreur Binance : {e}")
@@ -690,8 +764,7 @@ def save_leverage(message):
         lev = int(message.text.strip())
         if lev < 1 or lev > 125:
             raise ValueError("Levier hors limites Binance")
-        with open("leverage.txt", "w") as f:
-            f.write(str(lev))
+        runtime_config.set("leverage", lev)
         bot.reply_to(message, f"✅ Levier changé à x{lev}. Il sera utilisé au prochain trade.")
     except Exception as e:
         log_error(f"[save_leverage] Erreur avec entrée '{message.text.strip()}' : {e}\n{traceback.format_exc()}")
@@ -707,8 +780,7 @@ def save_quantity(message):
 
         if qty <= 0:
             raise ValueError("Quantité négative ou nulle")
-        with open("quantity.txt", "w") as f:
-            f.write(str(qty))
+        runtime_config.set("quantity", qty)
         bot.reply_to(message, f"✅ Quantité changée à {qty} USDT. Elle sera utilisée au prochain trade.")
     except Exception as e:
         log_error(f"[save_quantity] Erreur avec entrée '{message.text.strip()}' : {e}\n{traceback.format_exc()}")
@@ -716,19 +788,11 @@ def save_quantity(message):
 
 # Fonction pour lire la quantité
 def read_quantity():
-    try:
-        with open("quantity.txt", "r") as f:
-            return float(f.read().strip())
-    except Exception:
-        return default_quantity_usdt  # valeur par défaut
+    return runtime_config.quantity  # valeur par défaut si fichier absent
 
 # Fonction pour lire le levier
 def read_leverage():
-    try:
-        with open("leverage.txt", "r") as f:
-            return int(f.read().strip())
-    except Exception:
-        return default_leverage  # valeur par défaut
+    return runtime_config.leverage  # valeur par défaut si fichier absent
 
 user_trade_context = {}  # stocke le contexte par chat_id
 
@@ -824,11 +888,16 @@ def receive_leverage(message):
 
 # Pour démarrer le bot
 def start_bot():
+    if TELEGRAM_DRY_RUN:
+        print("🤖 Bot Telegram en mode DRY-RUN : pas de polling, messages écrits dans bot.log")
+        return
     print("🤖 Bot Telegram démarré...")
     bot.remove_webhook()  # <-- Ajoute cette ligne pour supprimer le webhook actif
     bot.infinity_polling(timeout=20, long_polling_timeout=10)
     
 def stop_telegram_bot():
+    if TELEGRAM_DRY_RUN:
+        return
     print("🔴 Arrêt du bot Telegram demandé...")
     bot.stop_polling()
     print("🟢 Bot Telegram arrêté.")
@@ -1,9 +1,12 @@
 import time
 import traceback
 import logging
-from core.binance_client import client, check_position_open, change_leverage
+from core.binance_client import client, check_position_open, change_leverage, set_leverage, applied_leverage
+from core.market_data import price_book, get_mark_price
+from core.symbol_info import symbol_info, get_quantizer
+from core.user_stream import get_position_information, get_open_orders, account_snapshot, snapshots
 from core.state import state
-from core.config import symbol, default_leverage, default_quantity_usdt, stop_loss_pct, take_profit_pct
+from core.config import symbol, default_leverage, default_quantity_usdt, stop_loss_pct, take_profit_pct, batch_entry
 from core.trading_utils import (
     calculate_quantity,
     log_trade,
@@ -12,15 +15,25 @@ from core.trading_utils import (
     retry_order,
 )
 from core.telegram_controller import send_telegram
+from core.notifier import PRIORITY_TRADE
 from core.position_utils import sync_position
 from core.trailing import update_trailing_sl_and_tp
+from core.latency import LatencyTimer
+from core.metrics import metrics
+from core.runtime_config import runtime_config
+from core.rate_limiter import request_priority, REQUEST_ORDER
+from core.order_manager import order_manager, ROLE_SL, ROLE_TP
+from core.async_gateway import gateway
 import threading
+from types import SimpleNamespace
 
 # Initialisation des threads globaux
 trailing_thread = None
 tp_thread = None
 
-position_lock = threading.Lock()
+position_lock = threading.RLock()  # Réentrant : open_trade peut appeler close_position
+last_entry_at = 0.0  # time.monotonic() du dernier ordre d'entrée envoyé
+ENTRY_GRACE_SECONDS = 10  # Le watchdog SL/TP ne touche à rien juste après une entrée
 SIDE_BUY = "BUY"
 SIDE_SELL = "SELL"
 
@@ -52,16 +65,17 @@ def log_error(e):
         pass
 
 def round_quantity(symbol, qty):
-    # Pour ALGOUSDT, 1 décimale
-    if symbol.upper() == "ALGOUSDT":
-        return round(qty, 1)
-    # Ajoute ici d'autres symboles si besoin
-    return qty
+    # Arrondi au stepSize du symbole (filtres en cache)
+    return get_quantizer(symbol).quantity(qty)
 
 def get_price_with_retry(symbol, retries=3, delay=2):
     """
     Récupère le prix du symbole avec plusieurs tentatives en cas d'échec réseau.
+    Utilise le mark price du flux WebSocket s'il est récent (aucun appel réseau).
     """
+    price = price_book.get(symbol, max_age=2.0)
+    if price is not None:
+        return price
     last_exception = None
     for i in range(retries):
         try:
@@ -81,30 +95,27 @@ def retry_order_creation(order_fn, max_retries=3, delay=2):
         try:
             return order_fn()
         except Exception as e:
+            symbol_info.handle_order_error(e)
             last_exception = e
             if i < max_retries - 1:
                 time.sleep(delay)
     raise last_exception
 
 def get_mode():
-    try:
-        with open("mode.txt", "r") as f:
-            mode = f.read().strip().lower()
-            return mode  # "auto", "alert", etc.
-    except Exception:
-        return "auto"  # Valeur par défaut si le fichier n'existe pas
+    return runtime_config.mode  # "auto", "alert"
     
 def start_thread(target, *args):
     t = threading.Thread(target=target, args=args, daemon=True)
     t.start()
     return t
 
-def get_real_leverage(symbol):
+def get_real_leverage(symbol, positions=None):
     """
     Récupère le levier réellement appliqué sur le symbole donné.
+    positions : lignes futures_position_information déjà lues (instantané partagé), sinon relues.
     """
     try:
-        info = client.futures_position_information(symbol=symbol)
+        info = positions if positions is not None else client.futures_position_information(symbol=symbol)
         for pos in info:
             if float(pos["positionAmt"]) != 0:
                 return int(float(pos["leverage"]))
@@ -114,39 +125,179 @@ def get_real_leverage(symbol):
         log_error(e)
         return None
 
+# === CHEMIN RAPIDE D'OUVERTURE ===
+# Appels indépendants (levier, prix, solde) lancés en parallèle via la passerelle (core/async_gateway.py)
+def apply_leverage(symbol, lev):
+    # Aucun appel réseau si ce levier est déjà appliqué (cache tenu par set_leverage)
+    if applied_leverage.get(symbol) == lev:
+        return
+    set_leverage(symbol, lev)
+
+def get_available_balance(asset="USDT"):
+    balance = client.futures_account_balance()
+    return float(next(b for b in balance if b['asset'] == asset)['availableBalance'])
+
+def position_snapshot(fresh: bool = False):
+    """
+    État de position réconcilié une seule fois (flux user-data si connecté, sinon REST).
+    fresh=True après un ordre du bot : REST direct, le flux peut ne pas l'avoir encore reflété.
+    """
+    sync_position(fresh=fresh)
+    return state.position_open
+
+# === ENTRÉE + ORDRES DE PROTECTION ===
+def protective_prices(direction, entry_price):
+    """
+    Prix du SL et du TP initiaux, arrondis au tickSize.
+    """
+    quantizer = get_quantizer(symbol)
+    if direction == "bullish":
+        stop_price = entry_price * (1 - stop_loss_pct)
+        take_profit = entry_price * (1 + take_profit_pct)
+    else:
+        stop_price = entry_price * (1 + stop_loss_pct)
+        take_profit = entry_price * (1 - take_profit_pct)
+    return quantizer.price(stop_price), quantizer.price(take_profit)
+
+def order_fill_price(order, fallback):
+    # avgPrice n'est renseigné qu'avec newOrderRespType=RESULT ("0" sinon)
+    avg_price = float(order.get("avgPrice") or 0)
+    return avg_price if avg_price > 0 else fallback
+
+def order_filled(order):
+    return order.get("status") == "FILLED" or float(order.get("executedQty") or 0) > 0
+
+def place_market_entry(side, qty):
+    return retry_order_creation(lambda: client.futures_create_order(
+        symbol=symbol,
+        side=side,
+        type="MARKET",
+        quantity=qty,
+        newOrderRespType="RESULT"
+    ), max_retries=3, delay=3)
+
+class EntryRejected(Exception):
+    """
+    Entrée refusée explicitement par Binance dans le batch : aucune position n'a été ouverte.
+    """
+
+
+def place_batch_entry(direction, qty, price):
+    """
+    Envoie l'entrée MARKET, le STOP_MARKET et le TAKE_PROFIT_MARKET (closePosition)
+    en une seule requête batchOrders : la position n'est jamais sans protection.
+    Retourne (ordre d'entrée, SL créé ou None, TP créé ou None, stop_price, take_profit).
+    Lève EntryRejected si l'entrée est refusée (les protections créées sont alors annulées) ;
+    toute autre exception signifie que le sort du batch est inconnu (voir recover_batch_entry).
+    """
+    side = "BUY" if direction == "bullish" else "SELL"
+    side_close = "SELL" if direction == "bullish" else "BUY"
+    stop_price, take_profit = protective_prices(direction, price)
+    fmt = get_quantizer(symbol).format
+    batch = [
+        {"symbol": symbol, "side": side, "type": "MARKET", "quantity": fmt(qty), "newOrderRespType": "RESULT"},
+        {"symbol": symbol, "side": side_close, "type": "STOP_MARKET", "stopPrice": fmt(stop_price),
+         "closePosition": "true", "timeInForce": "GTC"},
+        {"symbol": symbol, "side": side_close, "type": "TAKE_PROFIT_MARKET", "stopPrice": fmt(take_profit),
+         "closePosition": "true", "timeInForce": "GTC"},
+    ]
+    results = client.futures_place_batch_order(batchOrders=batch)
+    entry, sl_order, tp_order = [r if "orderId" in r else None for r in results]
+    for role, created in ((ROLE_SL, sl_order), (ROLE_TP, tp_order)):
+        if created is not None:
+            order_manager.track(symbol, role, created)
+
+    if entry is None:
+        # Entrée refusée : on ne laisse pas de SL/TP orphelins
+        for created in (sl_order, tp_order):
+            if created is not None:
+                try:
+                    client.futures_cancel_order(symbol=symbol, orderId=created["orderId"])
+                except Exception as e:
+                    log_error(e)
+        order_manager.reset(symbol)
+        error = results[0]
+        symbol_info.handle_order_error(SimpleNamespace(code=error.get("code")))
+        raise EntryRejected(f"Ordre d'entrée refusé (code={error.get('code')}) : {error.get('msg')}")
+
+    for label, created, result in (("SL", sl_order, results[1]), ("TP", tp_order, results[2])):
+        if created is None:
+            logging.warning(f"⚠️ {label} refusé dans le batch : {result}")
+    return entry, sl_order, tp_order, stop_price, take_profit
+
+def recover_batch_entry(direction, price):
+    """
+    Réponse du batch perdue (timeout, erreur réseau) : l'entrée et ses SL/TP ont pu être exécutés.
+    Position et ordres relus en REST ; l'entrée n'est jamais renvoyée (elle doublerait la position).
+    Retourne (ordre, protection) comme place_batch_entry si la position existe, sinon None.
+    """
+    positions, orders = gateway.gather(
+        lambda: get_position_information(symbol, fresh=True),
+        lambda: get_open_orders(symbol, fresh=True),
+    )
+    pos = next((p for p in positions if float(p["positionAmt"]) != 0), None)
+    if pos is None:
+        return None
+
+    # SL/TP du batch déjà posés : suivis et repris tels quels, seuls les manquants seront posés
+    side_close = "SELL" if direction == "bullish" else "BUY"
+    found = {}
+    for role, order_type in ((ROLE_SL, "STOP_MARKET"), (ROLE_TP, "TAKE_PROFIT_MARKET")):
+        found[role] = next((o for o in orders if o["type"] == order_type and o["side"] == side_close
+                            and o.get("closePosition", False)), None)
+        if found[role] is not None:
+            order_manager.track(symbol, role, found[role])
+
+    stop_price, take_profit = protective_prices(direction, price)
+    if found[ROLE_SL] is not None:
+        stop_price = float(found[ROLE_SL]["stopPrice"])
+    if found[ROLE_TP] is not None:
+        take_profit = float(found[ROLE_TP]["stopPrice"])
+    order = {"status": "FILLED", "avgPrice": pos["entryPrice"]}
+    return order, (found[ROLE_SL], found[ROLE_TP], stop_price, take_profit)
+
 # === OUVERTURE DE POSITION ==
 def open_trade(direction, quantity=None, leverage=None):
     if get_mode() != "auto":
         send_telegram("⚠️ Mode ALERT activé : aucune position ne sera prise.")
         return
 
-    with position_lock:
+    timer = LatencyTimer("open_trade")
+    with position_lock, request_priority(REQUEST_ORDER):
         try:
-            sync_position()
-            if state.position_open or check_position_open(symbol=symbol):
+            with timer.step("position"):
+                position_open = position_snapshot()
+            if position_open:
                 send_telegram("⚠️ Une position est déjà ouverte. Fermeture avant nouvelle ouverture.")
-                close_position()
-                time.sleep(1)
-                sync_position()
-                if state.position_open or check_position_open(symbol=symbol):
-                    send_telegram("❌ Impossible de fermer la position précédente.")
-                    return
+                with timer.step("fermeture"):
+                    close_position()
+                    if position_snapshot(fresh=True):
+                        send_telegram("❌ Impossible de fermer la position précédente.")
+                        return
 
             # ✅ Lecture paramètres dynamiques
             usdt_margin = float(quantity) if quantity is not None else float(get_quantity_from_file())
             lev = int(leverage) if leverage is not None else int(get_leverage_from_file())
 
-            # 🎯 Applique le levier
+            # 🎯 Levier, prix et solde sont indépendants : récupérés en parallèle
+            def timed(label, fn, *args, **kwargs):
+                # Priorité "ordre" aussi dans les threads du pool
+                with timer.step(label), request_priority(REQUEST_ORDER):
+                    return fn(*args, **kwargs)
+
+            leverage_future = gateway.submit(timed, "levier", apply_leverage, symbol, lev)
+            price_future = gateway.submit(timed, "prix", get_price_with_retry, symbol, retries=3, delay=3)
+            balance_future = gateway.submit(timed, "solde", get_available_balance)
+
             try:
-                client.futures_change_leverage(symbol=symbol, leverage=lev)
+                leverage_future.result()
             except Exception as e:
                 send_telegram(f"❌ Erreur levier : {e}")
                 log_error(e)
                 return
 
-            # 📈 Récupère le prix du marché
             try:
-                price = get_price_with_retry(symbol, retries=3, delay=3)
+                price = price_future.result()
             except Exception as e:
                 send_telegram(f"❌ Erreur prix : {e}")
                 log_error(e)
@@ -154,51 +305,64 @@ def open_trade(direction, quantity=None, leverage=None):
 
             # 📊 Calcul de la quantité
             position_value = usdt_margin * lev
-            qty = round_quantity(symbol, position_value / price)
+            quantizer = get_quantizer(symbol)
 
-            # ✅ Vérifie minQty & minNotional
-            exchange_info = client.futures_exchange_info()
-            symbol_info = next(s for s in exchange_info['symbols'] if s['symbol'] == symbol)
-            filters = {f['filterType']: f for f in symbol_info['filters']}
-            min_qty = float(filters['LOT_SIZE']['minQty'])
-            min_notional = float(filters['MIN_NOTIONAL']['notional'])
-            step_size = float(filters['LOT_SIZE']['stepSize'])
-
-            if qty < min_qty:
-                qty = min_qty
-                send_telegram(f"⚠️ Quantité ajustée à {qty} (minQty)")
-
-            if qty * price < min_notional:
-                qty = round((min_notional / price) / step_size) * step_size
-                qty = round_quantity(symbol, qty)
-                send_telegram(f"⚠️ Quantité ajustée pour respecter minNotional : {qty}")
+            # ✅ Arrondi au stepSize, relevé si besoin à minQty & minNotional
+            qty = quantizer.order_quantity(position_value, price)
+            if qty != quantizer.quantity(position_value / price):
+                send_telegram(f"⚠️ Quantité ajustée au minimum Binance (minQty/minNotional) : {qty}")
 
             # 🏦 Vérifie le solde (au moins 1$ dispo)
-            balance = client.futures_account_balance()
-            usdt_balance = float(next(b for b in balance if b['asset'] == 'USDT')['availableBalance'])
+            usdt_balance = balance_future.result()
             if usdt_balance < usdt_margin:
                 send_telegram(f"❌ Solde insuffisant. Requis : {usdt_margin}$, dispo : {usdt_balance:.2f}$")
                 return
 
-            # 📤 Place l’ordre
+            # 📤 Place l’ordre (avec SL/TP dans la même requête si BATCH_ENTRY=1)
+            order_manager.reset(symbol)  # Les ordres suivis de la position précédente n'ont plus d'objet
+            snapshots.invalidate(symbol)
             side = "BUY" if direction == "bullish" else "SELL"
+            protection = None
+            global last_entry_at
             try:
-                order = retry_order_creation(lambda: client.futures_create_order(
-                    symbol=symbol,
-                    side=side,
-                    type="MARKET",
-                    quantity=qty
-                ), max_retries=3, delay=3)
+                with timer.step("ordre"):
+                    if batch_entry:
+                        try:
+                            order, sl_order, tp_order, stop_price, take_profit = place_batch_entry(direction, qty, price)
+                            protection = (sl_order, tp_order, stop_price, take_profit)
+                        except EntryRejected as e:
+                            # Refus explicite : aucune position, l'entrée seule peut être renvoyée
+                            log_error(e)
+                            send_telegram(f"⚠️ Entrée groupée refusée ({e}), envoi de l'ordre seul.")
+                            order = place_market_entry(side, qty)
+                        except Exception as e:
+                            # Sort du batch inconnu : état relu en REST, l'entrée n'est jamais renvoyée
+                            log_error(e)
+                            recovered = recover_batch_entry(direction, price)
+                            if recovered is None:
+                                send_telegram(f"❌ Entrée groupée sans réponse ({e}) et aucune position trouvée : "
+                                              f"ordre non renvoyé.", priority=PRIORITY_TRADE)
+                                return
+                            order, protection = recovered
+                    else:
+                        order = place_market_entry(side, qty)
             except Exception as e:
-                send_telegram(f"❌ Erreur création ordre : {e}")
+                send_telegram(f"❌ Erreur création ordre : {e}", priority=PRIORITY_TRADE)
                 log_error(e)
                 return
-
-            # 🎯 Post-trade
-            entry_price = float(order.get("avgFillPrice", price))
-            if not check_position_open(symbol=symbol):
-                send_telegram("❌ Aucune position détectée après l’ordre.")
-                return
+            finally:
+                last_entry_at = time.monotonic()
+
+            # 🎯 Post-trade : l'exécution est confirmée par la réponse de l'ordre (RESULT)
+            entry_price = order_fill_price(order, price)
+            if not order_filled(order):
+                with timer.step("vérification"):
+                    position_open = check_position_open(symbol=symbol, fresh=True)
+                if not position_open:
+                    send_telegram("❌ Aucune position détectée après l’ordre.", priority=PRIORITY_TRADE)
+                    return
+            signal_to_fill_ms = timer.elapsed_ms
+            metrics.observe("signal_to_fill_ms", signal_to_fill_ms)
 
             # 🧠 State
             state.position_open = True
@@ -208,11 +372,19 @@ def open_trade(direction, quantity=None, leverage=None):
 
             send_telegram(
                 f"✅Position de {'HAUSSE' if direction == 'bullish' else 'BAISSE'} ouverte à {entry_price}$\n"
-                f"💰 Montant : {usdt_margin}$ ... Quantité: {qty} ALGO |\n⚙️ Levier: x{lev}\n"
+                f"💰 Montant : {usdt_margin}$ ... Quantité: {qty} {symbol.replace('USDT', '')} |\n⚙️ Levier: x{lev}\n"
+                f"⏱ Signal → exécution : {signal_to_fill_ms:.0f} ms",
+                priority=PRIORITY_TRADE
             )
 
             # SL/TP et trailing
-            set_initial_sl_tp(direction, entry_price, qty)
+            with timer.step("sl_tp"):
+                if protection is not None:
+                    confirm_batch_protection(direction, entry_price, *protection)
+                else:
+                    set_initial_sl_tp(direction, entry_price, qty)
+            timer.finish()
+            snapshots.invalidate(symbol)  # Les tâches de fond relisent la nouvelle position
 
             global trailing_thread
             try:
@@ -250,15 +422,23 @@ def close_position():
     Ferme la position ouverte s'il y en a une.
     Annule tous les ordres SL/TP restants après la fermeture.
     """
-    with position_lock:
+    with position_lock, request_priority(REQUEST_ORDER):
         try:
             sync_position()
             if not state.position_open and not check_position_open(symbol=symbol):
                 send_telegram("⚠️ Aucune position ouverte à fermer.")
                 return
 
+            # Position et levier lus AVANT la fermeture, en parallèle
+            positions, account_info = gateway.gather(
+                lambda: get_position_information(symbol),
+                client.futures_account,
+                return_exceptions=True
+            )
+            if isinstance(positions, Exception):
+                raise positions
+
             # Détermination du sens de clôture
-            positions = client.futures_position_information(symbol=symbol)
             pos = next((p for p in positions if float(p["positionAmt"]) != 0), None)
             if not pos:
                 send_telegram("⚠️ Aucune position détectée sur Binance.")
@@ -268,7 +448,14 @@ def close_position():
             side = "SELL" if amt > 0 else "BUY"
             qty = abs(amt)
 
-            # Récupère le levier AVANT la fermeture
+            try:
+                lev = "inconnu"
+                for asset in account_info['positions']:
+                    if asset['symbol'] == symbol:
+                        lev = int(asset.get('leverage', 1))
+                        break
+            except Exception:
+                lev = "inconnu"
 
             # Fermeture de la position
             try:
@@ -280,30 +467,20 @@ def close_position():
                     reduceOnly=True
                 )
             except BinanceOrderException as e:
-                send_telegram(f"❌ Erreur d'ordre Binance : {e}")
+                send_telegram(f"❌ Erreur d'ordre Binance : {e}", priority=PRIORITY_TRADE)
                 log_error(e)
                 return
             except BinanceAPIException as e:
-                send_telegram(f"❌ Erreur API Binance : {e}")
+                send_telegram(f"❌ Erreur API Binance : {e}", priority=PRIORITY_TRADE)
                 log_error(e)
                 return
             except Exception as e:
-                send_telegram(f"❌ Erreur inconnue : {e}")
+                send_telegram(f"❌ Erreur inconnue : {e}", priority=PRIORITY_TRADE)
                 log_error(e)
                 return
-            # ...avant send_telegram...
-            try:
-                account_info = client.futures_account()
-                lev = "inconnu"
-                for asset in account_info['positions']:
-                    if asset['symbol'] == symbol:
-                        lev = int(asset.get('leverage', 1))
-                        break
-            except Exception:
-                lev = "inconnu"
             # Utilise le levier récupéré AVANT la fermeture
             entry_price = float(pos['entryPrice'])
-            exit_price = float(pos['markPrice'])
+            exit_price = float(pos.get('markPrice') or get_mark_price(symbol))
             position_value = qty * entry_price
             sens = "HAUSSE" if state.current_direction == "bullish" else "BAISSE"
             gain = (exit_price - entry_price) * qty if sens == "HAUSSE" else (entry_price - exit_price) * qty
@@ -312,108 +489,125 @@ def close_position():
                 f"💵 Quantité: {qty:.2f} | Prix d'Entrée: {entry_price:.4f}$\n"
                 f"⚙️ Levier de : x{lev}"
                 f".... 💰Montant : {position_value:.2f} USDT\n"
-                f"{'🟢 Gain' if gain >= 0 else '🔴 Perte'} : {gain:.2f} USDT ... ✅"
+                f"{'🟢 Gain' if gain >= 0 else '🔴 Perte'} : {gain:.2f} USDT ... ✅",
+                priority=PRIORITY_TRADE
             )
 
-            # Nettoyage des ordres SL/TP restants
-            cancel_all_open_orders_if_no_position()
+            # Nettoyage des ordres SL/TP restants et vérification de clôture effective, en parallèle
+            # Relecture REST : l'ACCOUNT_UPDATE de la clôture peut arriver après la réponse de l'ordre
+            _, still_open = gateway.gather(
+                lambda: cancel_all_open_orders_if_no_position(fresh=True),
+                lambda: check_position_open(symbol=symbol, fresh=True)
+            )
 
             # Mise à jour de l'état local
             state.reset_all()
+            snapshots.invalidate(symbol)
 
-            # Vérification de clôture effective
-            #time.sleep(1)
-            if check_position_open(symbol=symbol):
-                send_telegram("⚠️ La position semble toujours ouverte après la clôture. Vérifie manuellement.")
+            if still_open:
+                send_telegram("⚠️ La position semble toujours ouverte après la clôture. Vérifie manuellement.", priority=PRIORITY_TRADE)
 
         except Exception as e:
-            send_telegram(f"❌ Erreur close_position : {e}")
+            send_telegram(f"❌ Erreur close_position : {e}", priority=PRIORITY_TRADE)
             log_error(e)
 
 # === POSE SL/TP DE SÉCURITÉ SI ABSENT ===
+def place_protective_order(direction, order_type, stop_price):
+    """
+    Pose un STOP_MARKET ou TAKE_PROFIT_MARKET closePosition et notifie.
+    Retourne True si Binance a renvoyé un orderId.
+    """
+    side_close = "SELL" if direction == "bullish" else "BUY"
+    order = retry_order(lambda: client.futures_create_order(
+        symbol=symbol,
+        side=side_close,
+        type=order_type,
+        stopPrice=stop_price,
+        closePosition=True,
+        timeInForce="GTC"
+    ))
+    if "orderId" in order:
+        order_manager.track(symbol, ROLE_SL if order_type == "STOP_MARKET" else ROLE_TP, order)
+    if order_type == "STOP_MARKET":
+        send_telegram(f"🛡 Stop loss automatique à {stop_price}$", priority=PRIORITY_TRADE)
+    else:
+        send_telegram(f"🎯 Take profit automatique à {stop_price}$", priority=PRIORITY_TRADE)
+    return "orderId" in order
+
+def confirm_batch_protection(direction, entry_price, sl_order, tp_order, stop_price, take_profit):
+    """
+    Après une entrée groupée : notifie le SL/TP posé avec l'entrée
+    et pose immédiatement ceux que Binance aurait refusés dans le batch.
+    """
+    try:
+        has_sl = sl_order is not None
+        has_tp = tp_order is not None
+        if has_sl:
+            send_telegram(f"🛡 Stop loss automatique à {stop_price}$", priority=PRIORITY_TRADE)
+        else:
+            has_sl = place_protective_order(direction, "STOP_MARKET", stop_price)
+        if has_tp:
+            send_telegram(f"🎯 Take profit automatique à {take_profit}$", priority=PRIORITY_TRADE)
+        else:
+            has_tp = place_protective_order(direction, "TAKE_PROFIT_MARKET", take_profit)
+        if not (has_sl and has_tp):
+            send_telegram("⚠️ SL/TP pas créés correctement. Vérifie manuellement.", priority=PRIORITY_TRADE)
+    except Exception as e:
+        send_telegram(f"❌ Erreur pose SL/TP initial : {e}", priority=PRIORITY_TRADE)
+        log_error(e)
+
 def set_initial_sl_tp(direction, entry_price, qty):
     """
     Pose un SL et un TP si aucun n'est présent, avec précision maximale.
+    entry_price est le prix moyen d'exécution confirmé par la réponse de l'ordre :
+    aucune attente ni relecture de la position n'est nécessaire.
     """
     try:
         side_close = "SELL" if direction == "bullish" else "BUY"
-        time.sleep(15)  # Attente pour s'assurer que la position est bien ouverte
-
-        # Récupère le prix d'entrée réel depuis Binance
-        positions = client.futures_position_information(symbol=symbol)
-        pos = next((p for p in positions if float(p["positionAmt"]) != 0), None)
-        if pos:
-            entry_price_real = float(pos["entryPrice"])
-        else:
-            entry_price_real = entry_price  # fallback si non dispo
-
-        # Récupère la précision du tickSize
-        exchange_info = client.futures_exchange_info()
-        symbol_info = next(s for s in exchange_info['symbols'] if s['symbol'] == symbol)
-        tick_size = float(next(f for f in symbol_info['filters'] if f['filterType'] == 'PRICE_FILTER')['tickSize'])
-        def round_to_tick(price, tick_size):
-            return round(round(price / tick_size) * tick_size, 8)
 
-        orders = client.futures_get_open_orders(symbol=symbol)
+        orders = get_open_orders(symbol, fresh=True)  # Juste après l'entrée : pas d'état du flux en retard
         sl_orders = [o for o in orders if o['type'] == "STOP_MARKET" and o['side'] == side_close and o.get('closePosition', False)]
         tp_orders = [o for o in orders if o['type'] == "TAKE_PROFIT_MARKET" and o['side'] == side_close and o.get('closePosition', False)]
 
         has_sl = len(sl_orders) > 0
         has_tp = len(tp_orders) > 0
+        # Ordres déjà présents : suivis pour que le trailing les remplace sans relister
+        if has_sl:
+            order_manager.track(symbol, ROLE_SL, sl_orders[0])
+        if has_tp:
+            order_manager.track(symbol, ROLE_TP, tp_orders[0])
 
-        stop_price = entry_price_real * (1 - stop_loss_pct) if direction == "bullish" else entry_price_real * (1 + stop_loss_pct)
-        take_profit = entry_price_real * (1 + take_profit_pct) if direction == "bullish" else entry_price_real * (1 - take_profit_pct)
-
-        stop_price = round_to_tick(stop_price, tick_size)
-        take_profit = round_to_tick(take_profit, tick_size)
+        stop_price, take_profit = protective_prices(direction, entry_price)
 
         if not has_sl:
-            retry_order(lambda: client.futures_create_order(
-                symbol=symbol,
-                side=side_close,
-                type="STOP_MARKET",
-                stopPrice=stop_price,
-                closePosition=True,
-                timeInForce="GTC"
-            ))
-            send_telegram(f"🛡 Stop loss automatique à {stop_price}$")
+            has_sl = place_protective_order(direction, "STOP_MARKET", stop_price)
 
         if not has_tp:
-            retry_order(lambda: client.futures_create_order(
-                symbol=symbol,
-                side=side_close,
-                type="TAKE_PROFIT_MARKET",
-                stopPrice=take_profit,
-                closePosition=True,
-                timeInForce="GTC"
-            ))
-            send_telegram(f"🎯 Take profit automatique à {take_profit}$")
-
-        # Vérification création SL/TP
-        orders = client.futures_get_open_orders(symbol=symbol)
-        has_sl = any(o['type'] == "STOP_MARKET" for o in orders)
-        has_tp = any(o['type'] == "TAKE_PROFIT_MARKET" for o in orders)
+            has_tp = place_protective_order(direction, "TAKE_PROFIT_MARKET", take_profit)
+
+        # Vérification création SL/TP (réponses des ordres, sans relecture)
         if not (has_sl and has_tp):
-            send_telegram("⚠️ SL/TP pas créés correctement. Vérifie manuellement.")
+            send_telegram("⚠️ SL/TP pas créés correctement. Vérifie manuellement.", priority=PRIORITY_TRADE)
 
     except Exception as e:
-        send_telegram(f"❌ Erreur pose SL/TP initial : {e}")
+        send_telegram(f"❌ Erreur pose SL/TP initial : {e}", priority=PRIORITY_TRADE)
         log_error(e)
 
 # === NETTOYAGE DES ORDRES SL/TP ORPHELINS ===
-def cancel_all_open_orders_if_no_position():
+def cancel_all_open_orders_if_no_position(fresh: bool = False):
     """
     Annule tous les ordres SL/TP restants UNIQUEMENT s'il n'y a plus de position ouverte.
     N'envoie un message Telegram que si au moins un ordre a été annulé.
+    fresh=True : position et ordres relus en REST (après un ordre du bot ou avant d'annuler).
     """
     try:
-        positions = client.futures_position_information(symbol=symbol)
+        positions = get_position_information(symbol, fresh=fresh)
         has_position = any(float(p["positionAmt"]) != 0 for p in positions)
         if has_position:
             # Il y a une position ouverte, on ne touche à rien
             return
         # Sinon, on annule les ordres SL/TP restants
-        open_orders = client.futures_get_open_orders(symbol=symbol)
+        open_orders = get_open_orders(symbol, fresh=fresh)
         cancelled = 0
         for order in open_orders:
             if order['type'] in ["STOP_MARKET", "TAKE_PROFIT_MARKET"]:
@@ -437,36 +631,45 @@ def sync_and_check_position():
     sync_position()
     return state.position_open or check_position_open(symbol=symbol)
 
-def sltp_watchdog_loop():
-    while True:
-        try:
-            cancel_all_open_orders_if_no_position()
-        except Exception as e:
-            log_error(e)
-        time.sleep(10)
-
-# Lance la surveillance au démarrage du module
-watchdog_thread = threading.Thread(target=sltp_watchdog_loop, daemon=True)
-watchdog_thread.start()
+# Tâches de fond planifiées par core/scheduler.py (enregistrées par core/bot.run_bot, rien n'est lancé à l'import)
+def sltp_watchdog_step():
+    """
+    Annule les SL/TP restés sans position. L'instantané partagé suffit pour le cas courant
+    (rien à faire) ; l'état est relu à jour avant toute annulation.
+    Jamais pendant une entrée/fermeture (position_lock) ni dans les ENTRY_GRACE_SECONDS qui suivent
+    une entrée : ses SL/TP peuvent précéder la position dans les lectures.
+    """
+    if time.monotonic() - last_entry_at < ENTRY_GRACE_SECONDS:
+        return
+    snapshot = account_snapshot(symbol)
+    if any(float(p["positionAmt"]) != 0 for p in snapshot.positions):
+        return
+    if not any(o["type"] in ("STOP_MARKET", "TAKE_PROFIT_MARKET") for o in snapshot.open_orders):
+        return
+    snapshots.invalidate(symbol)
+    if not position_lock.acquire(blocking=False):
+        return  # Entrée ou fermeture en cours : revu au prochain passage
+    try:
+        if time.monotonic() - last_entry_at < ENTRY_GRACE_SECONDS:
+            return
+        cancel_all_open_orders_if_no_position(fresh=True)
+    finally:
+        position_lock.release()
 
 # === SURVEILLANCE ET CORRECTION DU LEVIER EN TEMPS RÉEL ===
 def check_and_update_leverage():
     try:
         lev_file = int(get_leverage_from_file())
-        lev_real = get_real_leverage(symbol)
+        positions = account_snapshot(symbol).positions
+        if not all("leverage" in p for p in positions):
+            positions = None  # État du flux user-data : levier absent, relu en REST
+        lev_real = get_real_leverage(symbol, positions)
+        if lev_real is not None:
+            applied_leverage[symbol] = lev_real  # Levier modifié hors du bot : le cache suit le levier observé
         if lev_real is not None and lev_real != lev_file:
-            client.futures_change_leverage(symbol=symbol, leverage=lev_file)
+            set_leverage(symbol, lev_file)
             send_telegram(f"⚙️ Levier corrigé : {lev_real} ➔ {lev_file}")
             logging.warning(f"Levier corrigé : {lev_real} ➔ {lev_file}")
     except Exception as e:
         log_error(e)
         send_telegram(f"❌ Erreur correction levier : {e}")
-
-def leverage_watchdog_loop():
-    while True:
-        check_and_update_leverage()
-        time.sleep(60)  # Vérifie toutes les minutes
-
-# Lance la surveillance du levier au démarrage du module
-leverage_thread = threading.Thread(target=leverage_watchdog_loop, daemon=True)
-leverage_thread.start()
\ No newline at end of file
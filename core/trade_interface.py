@@ -22,51 +22,13 @@ RETRY_DELAY = 2
 def open_trade(direction, quantity=None, leverage=None):
     """
     Ouvre une position dans la direction donnée, avec quantité et levier personnalisés si fournis.
-    - Ferme la position existante si besoin (logique EMA cross).
-    - Vérifie la cohérence locale/Binance (point 1, 2, 6).
-    - Retry sur erreur temporaire (point 3, 7, 8).
-    - Notifie tout problème sur Telegram (point 5).
+    - La cohérence local/Binance et la fermeture de la position existante (logique EMA cross)
+      sont vérifiées une seule fois dans trade_executor.open_trade, sur un état réconcilié.
+    - Les erreurs Binance y sont déjà notifiées et journalisées (latence par étape comprise).
     """
     try:
-        sync_position()
         with position_lock:
-            # Vérification croisée local/Binance
-            local_open = state.position_open
-            real_open = check_position_open(symbol=symbol)
-            if local_open or real_open:
-                msg = "⚠️ Une position est déjà ouverte (local ou Binance). Tentative de fermeture avant ouverture."
-                logging.warning(msg)
-                send_telegram(msg)
-                # Tentative de fermeture propre
-                for attempt in range(MAX_RETRIES):
-                    try:
-                        real_close_position()
-                        state.position_open = False
-                        send_telegram("✅ Position précédente fermée automatiquement avant ouverture.")
-                        break
-                    except Exception as close_e:
-                        send_telegram(f"❌ Erreur fermeture auto (tentative {attempt+1}): {close_e}")
-                        if attempt < MAX_RETRIES - 1:
-                            import time; time.sleep(RETRY_DELAY)
-                        else:
-                            send_telegram("❌ Impossible de fermer la position précédente. Ouverture annulée.")
-                            return
-
-            # Tentative d'ouverture avec retry
-            for attempt in range(MAX_RETRIES):
-                try:
-                    # Passe quantity et leverage à real_open_trade
-                    real_open_trade(direction, quantity=quantity, leverage=leverage)
-                    state.position_open = True
-                    return
-                except Exception as open_e:
-                    send_telegram(f"❌ Erreur ouverture trade (tentative {attempt+1}): {open_e}")
-                    if attempt < MAX_RETRIES - 1:
-                        import time; time.sleep(RETRY_DELAY)
-                    else:
-                        send_telegram("❌ Toutes les tentatives d'ouverture ont échoué.")
-                        return
-
+            real_open_trade(direction, quantity=quantity, leverage=leverage)
     except Exception as e:
         logging.error(f"Erreur : {e}")
         traceback.print_exc()
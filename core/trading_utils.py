@@ -8,7 +8,9 @@ import logging
 
 from core.notifier import send_telegram
 from core.binance_client import client
+from core.symbol_info import symbol_info, get_quantizer
 from core.utils import safe_round
+from core.runtime_config import runtime_config
 from core.config import (
     symbol,
     stop_loss_pct,
@@ -43,91 +45,33 @@ config_lock = threading.Lock()  # protège lecture/écriture fichiers config (mo
 
 def get_mode() -> str:
     """
-    Lit le mode de fonctionnement (auto/alert) depuis mode.txt.
-    En cas d'erreur ou fichier absent, crée en mode 'auto' et notifie Telegram.
+    Mode de fonctionnement (auto/alert), tenu en mémoire par runtime_config.
     """
-    try:
-        with config_lock:
-            if not os.path.exists(mode_file):
-                with open(mode_file, "w") as f:
-                    f.write("auto")
-                # Import local pour éviter l'import circulaire
-                from core.telegram_controller import send_telegram
-                send_telegram("⚠️ mode.txt créé automatiquement en mode AUTO")
-                return "auto"
-
-            with open(mode_file, "r") as file:
-                mode = file.read().strip().lower()
-                if mode not in ["auto", "alert"]:
-                    from core.telegram_controller import send_telegram
-                    send_telegram("⚠️ mode.txt corrompu, passage en mode AUTO")
-                    return "auto"
-                return mode
-
-    except Exception as e:
-        err = traceback.format_exc()
-        from core.telegram_controller import send_telegram
-        send_telegram(f"⚠️ Erreur get_mode() : {e}\n{err}")
-        return "auto"
+    return runtime_config.mode
 
 
 def get_leverage_from_file(filepath=leverage_file, default_leverage=10) -> int:
     """
-    Lit le levier dans leverage.txt.
-    Valide que c'est un entier entre 1 et 125.
-    Envoie un warning si levier > 50 (risque).
+    Levier courant (leverage.txt validé entre 1 et 125, tenu en mémoire par runtime_config).
     """
-    try:
-        with config_lock:
-            with open(filepath, "r") as f:
-                content = f.read().strip()
-                if not content:
-                    raise ValueError("Fichier levier vide")
-                lev = int(content)
-                if lev < 1 or lev > 125:
-                    raise ValueError("Levier hors limites (1-125)")
-                if lev > 50:
-                    send_telegram(f"⚠️ Attention : levier élevé détecté ({lev})")
-                return lev
-    except Exception as e:
-        err = traceback.format_exc()
-        send_telegram(f"⚠️ Erreur lecture levier : {e}\n{err}")
-        print(f"⚠️ Erreur lecture levier : {e} → Levier par défaut : {default_leverage}")
-        return default_leverage
+    return runtime_config.leverage
 
 def get_quantity_from_file(filepath=quantity_file, default_quantity=1.0) -> float:
     """
-    Lit la quantité dans quantity.txt.
-    Valide que c'est un float > 0.1 (minimum Binance).
+    Quantité USDT courante (quantity.txt validé > 0, tenu en mémoire par runtime_config).
     """
-    try:
-        with config_lock:
-            with open(filepath, "r") as f:
-                content = f.read().strip()
-                if not content:
-                    raise ValueError("Fichier quantité vide")
-                qty = float(content)
-                if qty < 0.1:
-                    send_telegram(f"⚠️ Quantité trop faible détectée ({qty}), minimum 0.1")
-                if qty <= 0:
-                    raise ValueError("Quantité invalide (<=0)")
-                return qty
-    except Exception as e:
-        err = traceback.format_exc()
-        send_telegram(f"⚠️ Erreur lecture quantité : {e}\n{err}")
-        print(f"⚠️ Erreur lecture quantité : {e} → Quantité par défaut : {default_quantity}")
-        return default_quantity
+    return runtime_config.quantity
 
-def calculate_quantity(entry_price: float, quantity_usdt: float, leverage: int) -> float:
+def calculate_quantity(entry_price: float, quantity_usdt: float, leverage: int, trade_symbol: str = symbol) -> float:
     """
-    Calcule la quantité ALGO à trader en fonction du prix d'entrée, quantité USDT et levier.
-    Arrondi à 1 décimale (conforme Binance).
+    Calcule la quantité à trader en fonction du prix d'entrée, quantité USDT et levier.
+    Arrondi au stepSize du symbole (conforme Binance).
     Lève une erreur si quantité trop faible.
     """
-    qty = (quantity_usdt * leverage) / entry_price
-    qty = safe_round(qty, 1)
-    if qty < 0.1:
-        raise ValueError("❌ Quantité trop petite pour Binance Futures (min 0.1 ALGO)")
+    quantizer = get_quantizer(trade_symbol)
+    qty = quantizer.quantity((quantity_usdt * leverage) / entry_price)
+    if qty <= 0 or qty < float(quantizer.min_qty):
+        raise ValueError(f"❌ Quantité trop petite pour Binance Futures (min {float(quantizer.min_qty)} {trade_symbol})")
     return qty
 
 def log_trade(direction: str, entry_price: float, sl: float, tp: float, mode: str, status="OUVERT", gain: float = None):
@@ -215,6 +159,7 @@ def retry_order(order_function, max_attempts=5, initial_delay=0.2):
         try:
             return order_function()
         except Exception as e:
+            symbol_info.handle_order_error(e)
             msg = f"⚠️ Tentative {attempt+1}/{max_attempts} échouée : {e}"
             logging.warning(msg)
             send_telegram(msg)
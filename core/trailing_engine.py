@@ -0,0 +1,204 @@
+"""
+Module : trailing_engine.py
+But : Suivi dynamique du SL/TP piloté par les ticks de mark price (flux markPrice@1s via
+      core/market_data.price_book) au lieu d'une boucle de 15 secondes.
+      - Chaque tick : paliers get_trailing_sl / get_trailing_tp évalués en mémoire (quelques µs).
+      - L'exchange n'est sollicité que si le niveau cible change réellement.
+      - Anti-rafale : écart minimal entre deux niveaux (TRAILING_MIN_STEP, fraction du prix d'entrée)
+        et délai minimal entre deux remplacements d'un même ordre (TRAILING_DEBOUNCE) ;
+        un niveau retenu par le délai est appliqué dès qu'il expire.
+      - Position suivie en mémoire (core/user_stream.account_book), REST seulement si le flux est coupé.
+      - Sans flux (exchange simulé, WebSocket désactivé) : mark price relu en REST toutes les
+        TRAILING_INTERVAL secondes.
+"""
+
+import time
+import threading
+import traceback
+import logging
+
+from core.binance_client import check_position_open
+from core.market_data import price_book, get_mark_price
+from core.symbol_info import get_quantizer
+from core.user_stream import account_book
+from core.telegram_controller import send_telegram
+from core.notifier import PRIORITY_TRADE
+from core.metrics import metrics
+from core.trailing import get_trailing_sl, get_trailing_tp, replace_trailing_sl, replace_trailing_tp
+from core.config import symbol, take_profit_pct, trailing_check_interval, trailing_debounce, trailing_min_step
+from core.state import state
+
+logging.basicConfig(
+    filename='bot.log',
+    level=logging.WARNING,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+TICK_WAIT = 1.0  # Attente max d'un tick : borne aussi le délai d'arrêt du suivi
+
+
+class TrailingEngine:
+    """
+    Suivi d'une position : SL/TP remontés au fil des ticks jusqu'à la fermeture.
+        engine = TrailingEngine("bullish", 0.2512)
+        engine.run()            # bloquant, dans le thread du suivi
+        engine.stop()           # depuis un autre thread
+    """
+
+    def __init__(self, direction: str, entry_price: float, trade_symbol: str = symbol,
+                 default_tp_pct: float = take_profit_pct, debounce: float = trailing_debounce,
+                 min_step: float = trailing_min_step, poll_interval: float = trailing_check_interval,
+                 quantity: float = None):
+        self.direction = direction
+        self.entry_price = entry_price
+        self.symbol = trade_symbol
+        self.side = 1 if direction == "bullish" else -1
+        self.debounce = debounce
+        self.min_step = min_step
+        self.poll_interval = poll_interval
+        self.quantizer = get_quantizer(trade_symbol)
+        # Quantité des ordres de remplacement (reduceOnly) ; sans elle, ordres closePosition
+        self.quantity = quantity if quantity is not None else state.current_quantity
+
+        self.current_sl = None
+        self.current_tp_pct = default_tp_pct
+        self.sl_order_id = None
+        self.tp_order_id = None
+        self.max_gain_pct_notified = 0
+        self.last_price = None
+        self._sl_ready_at = 0.0   # Heure (monotonic) à partir de laquelle le SL peut être remplacé
+        self._tp_ready_at = 0.0
+        self._pending = False     # Un niveau attend la fin du délai anti-rafale
+        self._next_position_check = 0.0
+        self._stop = threading.Event()
+
+        self.ticks = 0
+        self.sl_updates = 0
+        self.tp_updates = 0
+
+    # === Évaluation d'un tick (sans réseau) ===
+    def evaluate(self, price: float, now: float):
+        """
+        Retourne (nouveau SL ou None, (nouveau TP en %, prix) ou None) pour ce mark price.
+        """
+        self._pending = False
+        new_sl = get_trailing_sl(self.entry_price, price, self.direction)
+        if new_sl:
+            new_sl = self.quantizer.price(new_sl)
+            if self.current_sl is not None and self.side * (new_sl - self.current_sl) < self.min_step * self.entry_price:
+                new_sl = None  # Pas meilleur, ou progrès trop faible pour remplacer l'ordre
+            elif now < self._sl_ready_at:
+                self._pending = True
+                new_sl = None
+
+        new_tp = None
+        new_tp_pct = get_trailing_tp(self.entry_price, price, self.direction, self.current_tp_pct)
+        if new_tp_pct and new_tp_pct - self.current_tp_pct >= self.min_step:
+            if now < self._tp_ready_at:
+                self._pending = True
+            else:
+                new_tp = (new_tp_pct, self.quantizer.price(self.entry_price * (1 + self.side * new_tp_pct)))
+        return new_sl, new_tp
+
+    def on_tick(self, price: float, now: float = None):
+        now = time.monotonic() if now is None else now
+        self.ticks += 1
+        self.last_price = price
+        self._notify_gain(price)
+
+        new_sl, new_tp = self.evaluate(price, now)
+        if new_sl:
+            self._apply_sl(new_sl, now)
+        if new_tp:
+            self._apply_tp(*new_tp, now)
+
+    def _notify_gain(self, price):
+        # 📢 Notifie à chaque +1%
+        gain_pct = self.side * (price - self.entry_price) / self.entry_price * 100
+        next_threshold = self.max_gain_pct_notified + 1
+        if gain_pct >= next_threshold:
+            self.max_gain_pct_notified = next_threshold
+            send_telegram(f"📊 Gain +{next_threshold:.0f}% atteint ({self.direction.upper()} - {price}$ 🤗)")
+
+    # === Ordres (seulement quand le niveau change) ===
+    def _apply_sl(self, new_sl, now):
+        try:
+            self.sl_order_id = replace_trailing_sl(self.direction, new_sl, self.quantity, self.symbol)
+            self.current_sl = new_sl
+            self.sl_updates += 1
+            self._sl_ready_at = now + self.debounce
+            logging.warning(f"🔵 SL trailing mis à jour à {new_sl}$ (orderId: {self.sl_order_id})")
+            send_telegram(f"🔵 Stop Loss dynamique mis à jour à {new_sl}$🎉...🥳", priority=PRIORITY_TRADE)
+        except Exception as e:
+            # Nouvel essai au prochain tick après le délai de relecture, pas à chaque tick
+            self._sl_ready_at = now + max(self.debounce, self.poll_interval)
+            send_telegram(f"❌ Erreur création SL dynamique : {e}", priority=PRIORITY_TRADE)
+            traceback.print_exc()
+
+    def _apply_tp(self, new_tp_pct, new_tp_price, now):
+        try:
+            self.tp_order_id = replace_trailing_tp(self.direction, new_tp_price, self.quantity, self.symbol)
+            self.current_tp_pct = new_tp_pct
+            self.tp_updates += 1
+            self._tp_ready_at = now + self.debounce
+            logging.warning(f"🎯 TP trailing mis à jour à {new_tp_price}$ (orderId: {self.tp_order_id})")
+            send_telegram(f"🎯 Take Profit dynamique mis à jour à {new_tp_price}$ 🥂💰", priority=PRIORITY_TRADE)
+        except Exception as e:
+            self._tp_ready_at = now + max(self.debounce, self.poll_interval)
+            send_telegram(f"❌ Erreur création TP dynamique : {e}", priority=PRIORITY_TRADE)
+            traceback.print_exc()
+
+    # === Boucle ===
+    def position_open(self, now: float) -> bool:
+        if not state.position_open:
+            return False
+        if account_book.is_live:
+            return account_book.position_amt(self.symbol) != 0
+        if now < self._next_position_check:
+            return True
+        self._next_position_check = now + self.poll_interval
+        return check_position_open(symbol=self.symbol)
+
+    def run(self, should_run=None):
+        """
+        Suit la position jusqu'à sa fermeture, stop() ou should_run() faux.
+        """
+        should_run = should_run or (lambda: True)
+        while should_run() and not self._stop.is_set():
+            wait = min(TICK_WAIT, self.debounce) if self._pending else TICK_WAIT
+            price_book.wait_for_update(self.symbol, timeout=wait)
+            if self._stop.is_set():
+                break
+            try:
+                # Prix du flux s'il est récent, sinon REST (au plus une fois par poll_interval)
+                price = get_mark_price(self.symbol, max_age=self.poll_interval)
+            except Exception as e:
+                send_telegram(f"❌ Erreur récupération prix : {e}")
+                traceback.print_exc()
+                self._stop.wait(self.poll_interval)
+                continue
+
+            started = time.perf_counter()
+            now = time.monotonic()
+            if not self.position_open(now):
+                send_telegram(" 💎 Fin du suivi dynamique SL/TP. 🙌")
+                break
+            if price == self.last_price and not self._pending:
+                continue  # Même prix, rien en attente : les paliers ne peuvent pas avoir changé
+            self.on_tick(price, now)
+            metrics.observe("trailing_iteration_ms", (time.perf_counter() - started) * 1000)
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self) -> dict:
+        return {
+            "direction": self.direction,
+            "entry_price": self.entry_price,
+            "last_price": self.last_price,
+            "sl": self.current_sl,
+            "tp_pct": self.current_tp_pct,
+            "ticks": self.ticks,
+            "sl_updates": self.sl_updates,
+            "tp_updates": self.tp_updates,
+        }
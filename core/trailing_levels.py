@@ -0,0 +1,148 @@
+"""
+Module : trailing_levels.py
+But : Paliers du trailing SL/TP (seuils de gain → niveau), sans dépendance.
+      Utilisés par core/trailing.py en réel et par le backtest (backtest/engine.py) :
+      une seule définition des paliers pour les deux.
+      - TrailingLadder : paliers validés et triés une fois, recherche par bisection,
+        évaluation vectorisée (NumPy) pour le backtest et les balayages.
+      - Paliers surchargeables via .env : TRAILING_SL_LEVELS / TRAILING_TP_LEVELS = "gain:niveau,..."
+"""
+
+import os
+from bisect import bisect_right
+
+
+class TrailingLadder:
+    """
+    Paliers (seuil de gain, niveau) puis progression ouverte : au-delà de step_from,
+    niveau = step_base + int((gain - step_from) / step) * step.
+    step_from / step_base : dernier palier par défaut. strict_step : progression seulement si gain > step_from.
+    Même calcul flottant que la boucle d'origine : résultats identiques au bit près.
+    """
+
+    __slots__ = ("thresholds", "values", "step_from", "step_base", "step", "strict_step")
+
+    def __init__(self, levels, step: float, step_from: float = None, step_base: float = None,
+                 strict_step: bool = False):
+        levels = sorted((float(t), float(v)) for t, v in levels)
+        if not levels:
+            raise ValueError("❌ Paliers du trailing vides")
+        thresholds = tuple(t for t, _ in levels)
+        values = tuple(v for _, v in levels)
+        if thresholds[0] <= 0:
+            raise ValueError(f"❌ Seuil de gain du trailing invalide : {thresholds[0]} (doit être > 0)")
+        if len(set(thresholds)) != len(thresholds):
+            raise ValueError(f"❌ Seuils de gain du trailing en double : {thresholds}")
+        if any(b < a for a, b in zip(values, values[1:])):
+            raise ValueError(f"❌ Niveaux du trailing décroissants : {values} (un palier ne peut que resserrer)")
+        if step <= 0:
+            raise ValueError(f"❌ Pas du trailing invalide : {step}")
+        self.thresholds = thresholds
+        self.values = values
+        self.step = float(step)
+        self.step_from = thresholds[-1] if step_from is None else float(step_from)
+        self.step_base = values[-1] if step_base is None else float(step_base)
+        self.strict_step = strict_step
+        if self.step_from < thresholds[-1] or self.step_base < values[-1]:
+            raise ValueError("❌ La progression du trailing doit partir du dernier palier ou au-delà")
+
+    @classmethod
+    def parse(cls, text: str, step: float, **kwargs) -> "TrailingLadder":
+        """
+        Paliers au format "gain:niveau,gain:niveau" (ex : "0.005:0.002,0.015:0.010").
+        """
+        try:
+            levels = [tuple(map(float, item.split(":"))) for item in text.split(",") if item.strip()]
+        except ValueError:
+            raise ValueError(f"❌ Paliers du trailing illisibles : {text!r} (attendu gain:niveau,...)")
+        return cls(levels, step, **kwargs)
+
+    @property
+    def levels(self) -> tuple:
+        return tuple(zip(self.thresholds, self.values))
+
+    def level(self, gain: float, default=None):
+        """
+        Niveau pour un gain : dernier palier atteint (bisection), default sous le premier.
+        """
+        if gain > self.step_from or (gain == self.step_from and not self.strict_step):
+            return self.step_base + int((gain - self.step_from) / self.step) * self.step
+        i = bisect_right(self.thresholds, gain)
+        return self.values[i - 1] if i else default
+
+    def evaluate(self, prices, entry_price: float, direction: str, default: float = float("nan")):
+        """
+        Niveaux pour un tableau de prix (même résultat que level(gain_pct(...)) élément par élément) ;
+        default (NaN par défaut) sous le premier palier.
+        """
+        import numpy as np  # Import local : NumPy seulement pour l'évaluation vectorisée
+        prices = np.asarray(prices, dtype=np.float64)
+        if direction == "bullish":
+            gains = (prices - entry_price) / entry_price
+        else:
+            gains = (entry_price - prices) / entry_price
+        table = np.array((default,) + self.values, dtype=np.float64)
+        out = table[np.searchsorted(np.array(self.thresholds), gains, side="right")]
+        stepped = gains > self.step_from if self.strict_step else gains >= self.step_from
+        out[stepped] = self.step_base + np.trunc((gains[stepped] - self.step_from) / self.step) * self.step
+        return out
+
+    def __repr__(self):
+        return (f"TrailingLadder({self.levels}, step={self.step}, step_from={self.step_from}, "
+                f"step_base={self.step_base}, strict_step={self.strict_step})")
+
+
+# === Paliers du Stop Loss dynamique : (gain atteint, SL en % de gain verrouillé) ===
+SL_STEP = float(os.getenv("TRAILING_SL_STEP", 0.005))  # Au-delà du dernier palier : +0.5% de SL par tranche de 0.5% de gain
+SL_MIN_DISTANCE = 0.001  # Distance minimale prix actuel ↔ SL (en % du prix d'entrée)
+SL_LADDER = TrailingLadder.parse(
+    os.getenv("TRAILING_SL_LEVELS", "0.005:0.002,0.006:0.003,0.010:0.005,0.012:0.006,0.015:0.010"),
+    SL_STEP,
+)
+SL_LEVELS = SL_LADDER.levels
+SL_STEP_FROM = SL_LADDER.step_from
+SL_STEP_BASE = SL_LADDER.step_base
+
+# === Paliers du Take Profit dynamique : (gain atteint, nouveau TP) ===
+TP_STEP = float(os.getenv("TRAILING_TP_STEP", 0.005))  # Au-delà (strictement) du dernier palier : +0.5% de TP par tranche de 0.5%
+TP_LADDER = TrailingLadder.parse(
+    os.getenv("TRAILING_TP_LEVELS", "0.012:0.02,0.018:0.025"),
+    TP_STEP,
+    strict_step=True,
+)
+TP_LEVELS = TP_LADDER.levels
+TP_STEP_FROM = TP_LADDER.step_from
+TP_STEP_BASE = TP_LADDER.step_base
+
+
+def gain_pct(entry_price, current_price, direction):
+    if direction == "bullish":
+        return (current_price - entry_price) / entry_price
+    return (entry_price - current_price) / entry_price
+
+def sl_level(gain):
+    """
+    Gain verrouillé par le SL pour un gain donné (ex : 0.005 → SL à +0.5%), None sous le premier palier.
+    """
+    return SL_LADDER.level(gain)
+
+def tp_level(gain, default_tp_pct):
+    """
+    TP (en % du prix d'entrée) pour un gain donné, default_tp_pct sous le premier palier.
+    """
+    return TP_LADDER.level(gain, default_tp_pct)
+
+def trailing_sl_price(entry_price, current_price, direction):
+    """
+    Prix du SL dynamique, ou None (palier non atteint ou SL trop proche du prix actuel).
+    """
+    level = sl_level(gain_pct(entry_price, current_price, direction))
+    if not level:
+        return None
+    if direction == "bullish":
+        new_sl = round(entry_price * (1 + level), 4)
+    else:
+        new_sl = round(entry_price * (1 - level), 4)
+    if abs(current_price - new_sl) < entry_price * SL_MIN_DISTANCE:
+        return None
+    return new_sl
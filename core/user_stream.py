@@ -0,0 +1,290 @@
+"""
+Module : user_stream.py
+But : Flux user-data Binance Futures (listenKey) qui tient en mémoire
+      la position, les ordres ouverts (SL/TP) et les exécutions du compte.
+      - listenKey renouvelé toutes les 30 minutes (keepalive).
+      - Resynchronisation REST à chaque (re)connexion.
+      - Tant que le flux est connecté, check_position_open, monitor_position,
+        le watchdog SL/TP et sync_position lisent cet état local sans appel réseau ;
+        sinon ils repassent automatiquement par REST.
+      - Tâches de fond : account_snapshot() partage une même lecture position + ordres ouverts
+        (SNAPSHOT_MAX_AGE secondes) entre toutes les tâches qui tombent au même moment.
+"""
+
+import time
+import threading
+import logging
+from collections import deque, namedtuple
+
+from core.binance_client import client
+from core.config import symbol, use_websocket
+from core.streams import ReconnectingWebSocket
+from core.async_gateway import gateway
+
+logging.basicConfig(
+    filename='bot.log',
+    level=logging.WARNING,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+USER_STREAM_URL = "wss://fstream.binance.com/ws/"
+KEEPALIVE_SECONDS = 30 * 60
+
+# Statuts d'ordre qui le retirent de la liste des ordres ouverts
+FINAL_ORDER_STATUSES = {"FILLED", "CANCELED", "EXPIRED", "REJECTED", "EXPIRED_IN_MATCH"}
+
+SNAPSHOT_MAX_AGE = 2.0  # Durée de partage d'une lecture REST entre tâches de fond (secondes)
+
+AccountSnapshot = namedtuple("AccountSnapshot", ["positions", "open_orders", "fetched_at"])
+
+
+class AccountBook:
+    """
+    Position, ordres ouverts et dernières exécutions, au format des réponses REST
+    (positionAmt/entryPrice, orderId/type/side/stopPrice/closePosition).
+    """
+
+    def __init__(self, max_fills: int = 100):
+        self._positions = {}
+        self._orders = {}
+        self._balances = {}
+        self.fills = deque(maxlen=max_fills)
+        self.live = False
+        self._updated = threading.Condition()
+
+    @property
+    def is_live(self) -> bool:
+        return self.live
+
+    def _notify(self):
+        self._updated.notify_all()
+
+    # === Resynchronisation complète par REST ===
+    def resync(self, trade_symbol: str = symbol):
+        positions = client.futures_position_information(symbol=trade_symbol)
+        orders = client.futures_get_open_orders(symbol=trade_symbol)
+        with self._updated:
+            for pos in positions:
+                self._positions[pos["symbol"]] = {
+                    "symbol": pos["symbol"],
+                    "positionAmt": pos["positionAmt"],
+                    "entryPrice": pos["entryPrice"],
+                }
+            # Les ordres du symbole sont remplacés en bloc par la réponse REST
+            self._orders = {oid: o for oid, o in self._orders.items() if o["symbol"] != trade_symbol}
+            for o in orders:
+                self._orders[o["orderId"]] = dict(o)
+            self._notify()
+
+    # === Événements du flux ===
+    def apply_account_update(self, data: dict):
+        account = data.get("a", {})
+        with self._updated:
+            for pos in account.get("P", []):
+                self._positions[pos["s"]] = {
+                    "symbol": pos["s"],
+                    "positionAmt": pos["pa"],
+                    "entryPrice": pos["ep"],
+                }
+            for balance in account.get("B", []):
+                self._balances[balance["a"]] = float(balance["cw"])
+            self._notify()
+
+    def apply_order_update(self, data: dict):
+        o = data["o"]
+        order = {
+            "symbol": o["s"],
+            "orderId": o["i"],
+            "clientOrderId": o["c"],
+            "side": o["S"],
+            "type": o["o"],
+            "origType": o.get("ot", o["o"]),
+            "status": o["X"],
+            "origQty": o["q"],
+            "price": o["p"],
+            "avgPrice": o["ap"],
+            "stopPrice": o["sp"],
+            "executedQty": o["z"],
+            "closePosition": o.get("cp", False),
+            "reduceOnly": o.get("R", False),
+            "updateTime": o["T"],
+        }
+        with self._updated:
+            if order["status"] in FINAL_ORDER_STATUSES:
+                self._orders.pop(order["orderId"], None)
+            else:
+                self._orders[order["orderId"]] = order
+            if o["x"] == "TRADE":
+                self.fills.append({
+                    "symbol": o["s"],
+                    "orderId": o["i"],
+                    "side": o["S"],
+                    "qty": float(o["l"]),
+                    "price": float(o["L"]),
+                    "realizedPnl": float(o.get("rp", 0)),
+                    "time": o["T"],
+                })
+            self._notify()
+
+    # === Lectures locales ===
+    def position_amt(self, trade_symbol: str = symbol) -> float:
+        with self._updated:
+            pos = self._positions.get(trade_symbol)
+            return float(pos["positionAmt"]) if pos else 0.0
+
+    def position(self, trade_symbol: str = symbol) -> dict:
+        with self._updated:
+            pos = self._positions.get(trade_symbol)
+            return dict(pos) if pos else {"symbol": trade_symbol, "positionAmt": "0", "entryPrice": "0"}
+
+    def open_orders(self, trade_symbol: str = symbol) -> list:
+        with self._updated:
+            return [dict(o) for o in self._orders.values() if o["symbol"] == trade_symbol]
+
+    def balance(self, asset: str = "USDT"):
+        with self._updated:
+            return self._balances.get(asset)
+
+    def wait_for_update(self, timeout: float) -> bool:
+        with self._updated:
+            return self._updated.wait(timeout)
+
+
+class UserDataStream(ReconnectingWebSocket):
+    """
+    Flux des événements du compte futures (ACCOUNT_UPDATE, ORDER_TRADE_UPDATE).
+    """
+
+    def __init__(self, book: AccountBook, trade_symbol: str = symbol):
+        self.book = book
+        self.symbol = trade_symbol
+        self.listen_key = None
+        super().__init__(USER_STREAM_URL, name="user-data")
+
+    def start(self):
+        threading.Thread(target=self._keepalive_loop, name="user-data-keepalive", daemon=True).start()
+        return super().start()
+
+    def before_connect(self):
+        # Binance renvoie la même clé tant qu'elle est valide, une nouvelle sinon
+        self.listen_key = client.futures_stream_get_listen_key()
+        self.url = USER_STREAM_URL + self.listen_key
+
+    def on_connect(self):
+        # Rattrapage REST : les événements manqués pendant la coupure sont perdus
+        self.book.resync(self.symbol)
+        self.book.live = True
+
+    def on_disconnect(self):
+        self.book.live = False
+
+    def _keepalive_loop(self):
+        while not self._stop_event.wait(KEEPALIVE_SECONDS):
+            if not self.listen_key:
+                continue
+            try:
+                client.futures_stream_keepalive(listenKey=self.listen_key)
+            except Exception as e:
+                logging.error(f"❌ Keepalive listenKey échoué : {e}")
+                self._reconnect()
+
+    def _reconnect(self):
+        self.book.live = False
+        if self._ws is not None:
+            try:
+                self._ws.close()
+            except Exception:
+                pass
+
+    def handle(self, data):
+        event = data.get("e")
+        if event == "ACCOUNT_UPDATE":
+            self.book.apply_account_update(data)
+        elif event == "ORDER_TRADE_UPDATE":
+            self.book.apply_order_update(data)
+        elif event == "listenKeyExpired":
+            logging.warning("⚠️ listenKey expirée, reconnexion du flux user-data")
+            self._reconnect()
+
+
+# ✅ Instance globale unique
+account_book = AccountBook()
+user_stream = None
+
+def start_user_stream():
+    global user_stream
+    if not use_websocket:
+        return None
+    if user_stream is None:
+        user_stream = UserDataStream(account_book)
+        user_stream.start()
+    return user_stream
+
+def stop_user_stream():
+    global user_stream
+    if user_stream is not None:
+        user_stream.stop()
+        user_stream = None
+    account_book.live = False
+
+
+# === Lectures avec repli REST quand le flux n'est pas connecté ===
+# fresh=True : REST direct, pour relire l'état juste après un ordre du bot (le flux peut être en retard)
+def get_position_information(trade_symbol: str = symbol, fresh: bool = False) -> list:
+    if account_book.is_live and not fresh:
+        return [account_book.position(trade_symbol)]
+    return client.futures_position_information(symbol=trade_symbol)
+
+def get_open_orders(trade_symbol: str = symbol, fresh: bool = False) -> list:
+    if account_book.is_live and not fresh:
+        return account_book.open_orders(trade_symbol)
+    return client.futures_get_open_orders(symbol=trade_symbol)
+
+
+# === Instantané partagé par les tâches de fond ===
+class SnapshotCache:
+    """
+    Position + ordres ouverts lus une fois (en parallèle) et réutilisés pendant max_age secondes.
+    Les tâches qui demandent l'instantané pendant une lecture attendent celle-ci au lieu d'en lancer une autre.
+    À ne pas utiliser pour décider d'un ordre : relire l'état à jour juste avant.
+    """
+
+    def __init__(self, max_age: float = SNAPSHOT_MAX_AGE):
+        self.max_age = max_age
+        self._snapshots = {}
+        self._lock = threading.Lock()
+        self.fetches = 0
+        self.hits = 0
+
+    def get(self, trade_symbol: str = symbol, max_age: float = None) -> AccountSnapshot:
+        if account_book.is_live:
+            return AccountSnapshot([account_book.position(trade_symbol)], account_book.open_orders(trade_symbol),
+                                   time.monotonic())
+        max_age = self.max_age if max_age is None else max_age
+        with self._lock:
+            snapshot = self._snapshots.get(trade_symbol)
+            if snapshot is not None and time.monotonic() - snapshot.fetched_at <= max_age:
+                self.hits += 1
+                return snapshot
+            positions, orders = gateway.gather(
+                lambda: client.futures_position_information(symbol=trade_symbol),
+                lambda: client.futures_get_open_orders(symbol=trade_symbol)
+            )
+            snapshot = AccountSnapshot(positions, orders, time.monotonic())
+            self._snapshots[trade_symbol] = snapshot
+            self.fetches += 1
+            return snapshot
+
+    def invalidate(self, trade_symbol: str = None):
+        with self._lock:
+            if trade_symbol is None:
+                self._snapshots.clear()
+            else:
+                self._snapshots.pop(trade_symbol, None)
+
+
+# ✅ Instance globale unique
+snapshots = SnapshotCache()
+
+def account_snapshot(trade_symbol: str = symbol, max_age: float = None) -> AccountSnapshot:
+    return snapshots.get(trade_symbol, max_age)
@@ -45,25 +45,13 @@ def safe_float(value):
 
 # === Lecture de la quantité dynamique ===
 def get_dynamic_quantity():
-    try:
-        with config_lock:
-            with open(QUANTITY_FILE, "r") as f:
-                qty = float(f.read().strip())
-                return qty
-    except Exception as e:
-        logging.error(f"❌ Erreur lecture quantity.txt : {e}")
-        return default_quantity_usdt  # <-- Utilise la valeur par défaut centralisée
+    from core.runtime_config import runtime_config  # Import local pour éviter l'import circulaire
+    return runtime_config.quantity
 
 # === Lecture du levier dynamique ===
 def get_dynamic_leverage():
-    try:
-        with config_lock:
-            with open(LEVERAGE_FILE, "r") as f:
-                leverage = int(f.read().strip())
-                return leverage
-    except Exception as e:
-        logging.error(f"❌ Erreur lecture leverage.txt : {e}")
-        return default_leverage  # <-- Utilise la valeur par défaut centralisée
+    from core.runtime_config import runtime_config  # Import local pour éviter l'import circulaire
+    return runtime_config.leverage
 
 # === Retry d’un ordre Binance en cas d’échec temporaire ===
 def retry_order(order_fn, max_retries=3, delay=2, label="ORDRE"):
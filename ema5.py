@@ -6,16 +6,13 @@ from dotenv import load_dotenv
 import os
 from binance.client import Client
 from core.telegram_controller import send_telegram
+from core.binance_client import get_client
 
 # Charger .env
 load_dotenv()
 
-# Clés API
-API_KEY = os.getenv("BINANCE_API_KEY")
-API_SECRET = os.getenv("BINANCE_API_SECRET")
-
-# Client Binance
-client = Client(API_KEY, API_SECRET)
+# Client Binance partagé (session HTTP et budget de poids communs au bot)
+client = get_client()
 
 # Configuration du logging
 logging.basicConfig(
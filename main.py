@@ -2,15 +2,21 @@ import threading
 import signal
 import sys
 import logging
-import time
-import gc
-import psutil
-from core.bot import launch_bot, stop_bot
+from core.bot import launch_bot, stop_bot, start_command_bus
 from core.telegram_controller import start_bot, stop_telegram_bot
-from strategies.ema_cross import start_ema_5m_loop, ema_live_watch_loop # ou autre chemin correct
-from strategies.ema_3m import start_ema_3m_loop
-from core.notifier import send_telegram
-from strategies.ema_tracker import track_ema_live_crossing
+from strategies.ema_cross import ema_5m_step, ema_live_step, interval as ema_interval
+from core.notifier import send_telegram, flush_telegram
+from strategies.ema_tracker import track_ema_step
+from core.streams import start_market_streams, stop_market_streams
+from core.user_stream import start_user_stream, stop_user_stream
+from core.scheduler import scheduler
+from core.symbol_info import symbol_info
+from core.runtime_config import runtime_config
+from core.config import intra_bar_tick, metrics_port
+from core.rate_limiter import REQUEST_LOW
+from core.metrics import start_metrics_server, stop_metrics_server
+from core.http_session import close_session
+from core.async_gateway import gateway
 
 logging.basicConfig(
     filename='bot.log',
@@ -18,36 +24,62 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
-def log_system_usage():
-    mem = psutil.virtual_memory()
-    cpu = psutil.cpu_percent()
-    logging.warning(f"RAM utilisée : {mem.percent}% | CPU : {cpu}%")
-    send_telegram(f"📊 Usage système - RAM : {mem.percent}% | CPU : {cpu}%")
-
 def main():
     logging.info("🚀 Lancement du bot de trading et du contrôleur Telegram...")
 
+    # Filtres des symboles chargés une seule fois (hors du chemin signal → ordre)
+    try:
+        symbol_info.load()
+    except Exception as e:
+        logging.error(f"❌ Chargement des filtres symboles échoué (nouvel essai au premier ordre) : {e}")
+
+    # Paramètres à chaud (mode, levier, quantité...) : modifications externes détectées
+    runtime_config.start_watching()
+
+    # Bus de commandes : fermeture manuelle / arrêt exécutés dès réception
+    start_command_bus()
+
+    # Latences et compteurs lisibles par Prometheus (127.0.0.1 uniquement)
+    start_metrics_server(metrics_port)
+
+    # Flux WebSocket bougies + mark price (alimentent le cache local)
+    start_market_streams()
+
+    # Flux user-data : position, ordres SL/TP et exécutions tenus en mémoire
+    start_user_stream()
+
     # Démarre le bot de trading dans un thread daemon
     bot_thread = threading.Thread(target=launch_bot, daemon=True)
     bot_thread.start()
     logging.info("✅ Bot de trading lancé.")
     
-    # Lancer les boucles EMA dans des threads séparés
-    ema_5m_thread = threading.Thread(target=start_ema_5m_loop, daemon=True)
-    ema_3m_thread = threading.Thread(target=start_ema_3m_loop, daemon=True)
-    ema_live_thread = threading.Thread(target=ema_live_watch_loop, daemon=True)
-
-    ema_5m_thread.start()
-    ema_3m_thread.start()
-    ema_live_thread.start()
+    # Stratégies EMA pilotées par un seul planificateur aligné sur l'heure serveur :
+    # évaluation à la clôture de bougie + vérifications intrabougie
+    scheduler.on_candle_close(ema_interval, ema_5m_step, name="ema_5m")
+    scheduler.every(intra_bar_tick, ema_live_step, name="ema_live")
+    # strategies/ema_3m.py : utilitaires EMA 3m seulement, aucune stratégie 3m planifiée
+    scheduler.every(intra_bar_tick, track_ema_step, name="ema_tracker")
+    # Filtres symboles rechargés hors du chemin d'ordre
+    scheduler.every(symbol_info.ttl, lambda: symbol_info.refresh(force=True), name="symbol_info",
+                    jitter=min(60, symbol_info.ttl / 10), priority=REQUEST_LOW)
+    scheduler.start()
+    send_telegram(f"🚦 Stratégies EMA lancées (clôture {ema_interval} + contrôle toutes les {intra_bar_tick:g}s)")
 
-    threading.Thread(target=track_ema_live_crossing, daemon=True).start()
+    shutdown_event = threading.Event()
 
     # Fonction pour gérer l'arrêt propre sur Ctrl+C
     def signal_handler(sig, frame):
         logging.warning("🔴 Arrêt demandé. Fermeture en cours...")
         stop_bot()
+        scheduler.stop()
+        stop_market_streams()
+        stop_user_stream()
         stop_telegram_bot()
+        flush_telegram()
+        gateway.stop()
+        close_session()
+        stop_metrics_server()
+        shutdown_event.set()
         sys.exit(0)
 
     # Liaison du signal SIGINT (Ctrl+C) à la fonction d'arrêt
@@ -57,18 +89,8 @@ def main():
     # Le bot Telegram tourne dans le thread principal
     start_bot()
 
-    while True:
-        try:
-            # Ton code principal ici
-            pass
-        except Exception as e:
-            logging.error(f"Erreur critique : {e}")
-        gc.collect()
-        mem = psutil.virtual_memory()
-        if mem.percent > 90:
-            logging.error("RAM presque pleine !")
-        log_system_usage()
-        time.sleep(15)
+    # Thread principal au repos jusqu'à l'arrêt : l'usage système est suivi par la tâche "system_usage"
+    shutdown_event.wait()
 
 if __name__ == "__main__":
     main()
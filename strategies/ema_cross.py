@@ -1,10 +1,12 @@
 import os
 import threading
 import traceback
-import pandas as pd
 import logging
 from ta.trend import EMAIndicator
-from core.binance_client import client
+from core.binance_client import client, set_leverage
+from core.market_data import market_data
+from core.indicators import get_ema_pair
+from core.metrics import metrics
 from core.trade_interface import open_trade, close_position
 from core.trading_utils import get_leverage_from_file
 from core.state import state
@@ -35,16 +37,16 @@ def can_send_telegram():
 
 def detect_ema_cross(ema_short, ema_long, bullish=True):
     """
-    Détecte les croisements EMA20 / EMA50 dans deux séries pandas.
+    Détecte les croisements EMA20 / EMA50 dans deux séquences (précédente, actuelle).
     Renvoie 'bullish_cross', 'bearish_cross' ou None.
     """
     if len(ema_short) < 2 or len(ema_long) < 2:
         return None
 
-    ema20_now = ema_short.iloc[-1]
-    ema50_now = ema_long.iloc[-1]
-    ema20_prev = ema_short.iloc[-2]
-    ema50_prev = ema_long.iloc[-2]
+    ema20_now = ema_short[-1]
+    ema50_now = ema_long[-1]
+    ema20_prev = ema_short[-2]
+    ema50_prev = ema_long[-2]
 
     if bullish:
         if ema20_prev < ema50_prev and ema20_now > ema50_now:
@@ -63,13 +65,19 @@ def detect_ema_cross(ema_short, ema_long, bullish=True):
         else:
             return None
 
-def get_ema_values(live=False):
+@metrics.timed("ema_values_ms")
+def get_ema_values(live=False, close_time=None):
     """
     Récupère les EMA20 et EMA50 sur les données Binance, retourne le signal, le timestamp et les EMA.
+    Les EMA sont incrémentales (core/indicators.py) : (valeur bougie clôturée, valeur provisoire).
+    close_time (secondes serveur) : garantit que la bougie clôturée à cet instant est prise en compte.
     """
     try:
-        klines = client.get_klines(symbol=symbol, interval=interval, limit=52)
-        closes = [float(k[4]) for k in klines]
+        if close_time is not None:
+            snapshot = market_data.get_closed(symbol, interval, close_time, limit=52)
+        else:
+            snapshot = market_data.get(symbol, interval, limit=52)
+        closes = snapshot.closes[-52:]
         if len(closes) < 50:
             msg = f"⏳ Pas assez de données EMA ({len(closes)} < 50)"
             logging.warning(msg)
@@ -77,11 +85,9 @@ def get_ema_values(live=False):
                 send_telegram(msg)
             return None, None, None
 
-        closes_series = pd.Series(closes)
-        ema20 = closes_series.ewm(span=20, adjust=False).mean()
-        ema50 = closes_series.ewm(span=50, adjust=False).mean()
+        ema20, ema50 = get_ema_pair(symbol, interval, 20, 50).sync(snapshot)
 
-        candle_close_time = int(klines[-2][6] // 1000)  # candle N-1
+        candle_close_time = snapshot.last_closed_time  # candle N-1
         signal = detect_ema_cross(ema20, ema50)
         return signal, candle_close_time, (ema20, ema50)
 
@@ -95,7 +101,7 @@ def get_ema_values(live=False):
 
 def set_leverage_if_needed(new_leverage):
     try:
-        client.futures_change_leverage(symbol=symbol, leverage=new_leverage)
+        set_leverage(symbol, new_leverage)
         logging.info(f"🔧 Levier fixé à {new_leverage}x")
         if can_send_telegram():
             send_telegram(f"🔧 Levier fixé à {new_leverage}x")
@@ -153,50 +159,64 @@ def execute_ema_cross_strategy(signal=None, candle_close_time=None):
         if can_send_telegram():
             send_telegram(err_msg)
 
+_last_live_signal = None
+
+def ema_live_step():
+    """
+    Une vérification intrabougie (appelée par le planificateur core/scheduler.py).
+    """
+    global _last_live_signal
+    try:
+        _, _, (ema20, ema50) = get_ema_values()
+        if ema20 is None or ema50 is None:
+            return
+
+        signal = detect_ema_cross(ema20, ema50)
+
+        # On trade dès qu'un croisement est détecté, même si la bougie n'est pas clôturée
+        if signal and signal != _last_live_signal:
+            logging.info(f"⚡ Croisement EMA détecté en temps réel : {signal}")
+            if can_send_telegram():
+                send_telegram(f"⚡ [INTRABOUGIE] Croisement EMA détecté : {signal}")
+            _last_live_signal = signal
+
+            # On prend le timestamp de la dernière bougie clôturée pour la traçabilité
+            candle_close_time = market_data.get(symbol, interval, limit=2).last_closed_time
+
+            if signal == "bullish_cross":
+                execute_ema_cross_strategy("bullish", candle_close_time)
+            elif signal == "bearish_cross":
+                execute_ema_cross_strategy("bearish", candle_close_time)
+
+    except Exception as e:
+        logging.error(f"Erreur dans la boucle EMA temps réel : {e}")
+
 def ema_live_watch_loop():
-    last_live_signal = None
     logging.info("🚨 Surveillance EMA en temps réel (toutes les 5s) activée.")
     while True:
-        try:
-            _, _, (ema20, ema50) = get_ema_values()
-            if ema20 is None or ema50 is None:
-                time.sleep(5)
-                continue
-
-            signal = detect_ema_cross(ema20, ema50)
+        ema_live_step()
+        # Réveil dès qu'une nouvelle bougie arrive du flux (5s max sans flux)
+        market_data.wait_for_update(symbol, interval, timeout=5)
 
-            # On trade dès qu'un croisement est détecté, même si la bougie n'est pas clôturée
-            if signal and signal != last_live_signal:
-                logging.info(f"⚡ Croisement EMA détecté en temps réel : {signal}")
-                if can_send_telegram():
-                    send_telegram(f"⚡ [INTRABOUGIE] Croisement EMA détecté : {signal}")
-                last_live_signal = signal
 
-                # On prend le timestamp de la dernière bougie clôturée pour la traçabilité
-                klines = client.get_klines(symbol=symbol, interval=interval, limit=2)
-                candle_close_time = int(klines[-2][6] // 1000)
-
-                if signal == "bullish_cross":
-                    execute_ema_cross_strategy("bullish", candle_close_time)
-                elif signal == "bearish_cross":
-                    execute_ema_cross_strategy("bearish", candle_close_time)
+def ema_5m_step(close_time=None):
+    """
+    Évaluation à la clôture de bougie (appelée par le planificateur avec l'heure de clôture).
+    """
+    global _last_ping
+    try:
+        signal, candle_close_time, _ = get_ema_values(close_time=close_time)
+        execute_ema_cross_strategy(signal, candle_close_time)
 
-        except Exception as e:
-            logging.error(f"Erreur dans la boucle EMA temps réel : {e}")
-        time.sleep(5)
+        if time.time() - _last_ping > 3600:
+            send_telegram(" strategies 5m actif - en attente de croisement ...")
+            _last_ping = time.time()
 
+    except Exception as e:
+        logging.error(f"Erreur boucle EMA 5m : {e}")
 
 def start_ema_5m_loop():
     send_telegram("🚦 Boucle EMA 5m lancée !")
-    global _last_ping
     while True:
-        try:
-            signal, candle_close_time, _ = get_ema_values()
-            execute_ema_cross_strategy(signal, candle_close_time)
-
-            if time.time() - _last_ping > 3600:
-                send_telegram(" strategies 5m actif - en attente de croisement ...")
-                _last_ping = time.time()
-
-        except Exception as e:
-            logging.error(f"Erreur boucle EMA 5m : {e}")
+        ema_5m_step()
+        market_data.wait_for_update(symbol, interval, timeout=5)
@@ -0,0 +1,69 @@
+"""
+Tests : EMA incrémentales (core/indicators.py) face au calcul pandas de référence.
+"""
+
+import random
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from core.indicators import EMAPair
+
+WINDOW = 52
+STEP_MS = 300_000
+
+
+def _klines(count, seed=7):
+    # Marche aléatoire de prix au format API (open_time, open, high, low, close)
+    rng = random.Random(seed)
+    price, rows = 0.25, []
+    for i in range(count):
+        price *= 1 + rng.gauss(0, 0.004)
+        rows.append([i * STEP_MS, price, price, price, price])
+    return rows
+
+def _pandas_emas(klines, span):
+    # Référence : ancien get_ema_values, ewm sur les 52 dernières bougies (bougie en cours comprise)
+    ema = pd.Series([k[4] for k in klines[-WINDOW:]]).ewm(span=span, adjust=False).mean()
+    return ema.iloc[-2], ema.iloc[-1]
+
+def _snapshot(klines):
+    return SimpleNamespace(klines=tuple(tuple(k) for k in klines))
+
+
+def test_sync_matches_pandas_on_sliding_window():
+    rows = _klines(400)
+    pair = EMAPair(20, 50, window=WINDOW)
+    for end in range(WINDOW, len(rows)):
+        klines = rows[end - WINDOW:end]
+        (fast_prev, fast_now), (slow_prev, slow_now) = pair.sync(_snapshot(klines))
+        assert (fast_prev, fast_now) == pytest.approx(_pandas_emas(klines, 20), rel=1e-12)
+        assert (slow_prev, slow_now) == pytest.approx(_pandas_emas(klines, 50), rel=1e-12)
+
+def test_sync_intrabar_ticks_match_pandas():
+    # Même bougie clôturée, prix en cours qui bouge : seule la valeur provisoire change
+    rows = _klines(WINDOW)
+    pair = EMAPair(20, 50, window=WINDOW)
+    for price in (0.24, 0.26, 0.25, 0.3):
+        klines = rows[:-1] + [[rows[-1][0], price, price, price, price]]
+        (fast_prev, fast_now), (slow_prev, slow_now) = pair.sync(_snapshot(klines))
+        assert (fast_prev, fast_now) == pytest.approx(_pandas_emas(klines, 20), rel=1e-12)
+        assert (slow_prev, slow_now) == pytest.approx(_pandas_emas(klines, 50), rel=1e-12)
+
+def test_sync_uses_window_of_longer_snapshot():
+    # Cache plus long que la fenêtre (flux WebSocket) : seules les 52 dernières bougies comptent
+    rows = _klines(500)
+    (_, fast_now), (_, slow_now) = EMAPair(20, 50, window=WINDOW).sync(_snapshot(rows))
+    assert fast_now == pytest.approx(_pandas_emas(rows, 20)[1], rel=1e-12)
+    assert slow_now == pytest.approx(_pandas_emas(rows, 50)[1], rel=1e-12)
+
+def test_sync_after_gap_and_restart():
+    # Trou dans l'historique puis retour en arrière : valeurs toujours celles de la fenêtre reçue
+    rows = _klines(300)
+    pair = EMAPair(20, 50, window=WINDOW)
+    for end in (60, 61, 200, 90):
+        klines = rows[end - WINDOW:end]
+        (_, fast_now), (_, slow_now) = pair.sync(_snapshot(klines))
+        assert fast_now == pytest.approx(_pandas_emas(klines, 20)[1], rel=1e-12)
+        assert slow_now == pytest.approx(_pandas_emas(klines, 50)[1], rel=1e-12)